@@ -0,0 +1,212 @@
+import heapq
+import time
+from collections import deque
+from typing import Iterator, NamedTuple
+
+from backend.storage import SampleLog
+
+CAPACITY = 4096  # samples buffered per channel
+
+
+class Frame(NamedTuple):
+    t: int  # ns on the aligner's timebase, a multiple of the period
+    values: dict[str, float | None]  # keyed "channel.field"
+
+
+class Timebase:
+    """
+    Monotonic nanoseconds mapped to epoch time by an offset taken once.
+
+    Stamps from one Timebase never go backwards and keep their spacing when
+    the wall clock is stepped. NTP slews CLOCK_MONOTONIC as well, so over
+    long runs they still follow the wall clock's rate.
+    """
+
+    def __init__(self) -> None:
+        self.offset = time.time_ns() - time.monotonic_ns()
+
+    def epoch_ns(self, monotonic_ns: int) -> int:
+        return monotonic_ns + self.offset
+
+    def now_ns(self) -> int:
+        return time.monotonic_ns() + self.offset
+
+
+class Track:
+    """Buffered samples of one channel, oldest first."""
+
+    def __init__(self, channel: str, fields: list[str], hold: set[str]) -> None:
+        self.fields = [
+            (
+                field,
+                f"{channel}.{field}",
+                channel in hold or f"{channel}.{field}" in hold,
+            )
+            for field in fields
+        ]
+        self.samples: deque[tuple[int, dict[str, float | None]]] = deque()
+
+    def values_at(self, t: int, max_age: int) -> Iterator[tuple[str, float | None]]:
+        samples = self.samples
+        # The sample at or before t is the oldest one any later point needs
+        while len(samples) > 1 and samples[1][0] <= t:
+            samples.popleft()
+        t0, before = samples[0]
+        if t0 > t or t - t0 > max_age:
+            for _, key, _ in self.fields:
+                yield key, None
+            return
+        t1, after = samples[1] if len(samples) > 1 else (None, None)
+        for field, key, hold in self.fields:
+            v0 = before.get(field)
+            if hold or t1 is None or v0 is None:
+                yield key, v0
+                continue
+            v1 = after.get(field)
+            yield key, v0 if v1 is None else v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+
+class Aligner:
+    """
+    Description:
+    Resamples several channels onto one time grid and emits fused frames.
+
+    Samples arrive in time order per channel, channels interleaved in any
+    order, stamped in ns on one timebase. Grid points are multiples of
+    ``period``, so aligners fed the same samples agree, live or from logs.
+    Fields are interpolated linearly between the samples either side of a
+    point, or hold the last value for channels and ``channel.field`` names
+    in ``hold``. Values more than ``max_age`` (default ``latency``) older
+    than a point are None.
+
+    A point is emitted once every channel has a sample at or after it, or
+    at the latest when the newest sample of any channel, or the time given
+    to flush(), is ``latency`` past it; channels without a later sample
+    then hold. Which channels take part is fixed by ``channels``, or else
+    by those seen during the first ``latency`` of data. Each channel keeps
+    only the samples from the one before the next point on, at most
+    ``capacity``, so memory stays bounded whatever the rates.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        latency: float = 2.0,
+        channels: list[str] | None = None,
+        hold: tuple[str, ...] = (),
+        max_age: float | None = None,
+        capacity: int = CAPACITY,
+    ) -> None:
+        if period <= 0:
+            raise ValueError(f"period must be positive, not {period}")
+        self.period = round(period * 1e9)
+        self.latency = round(latency * 1e9)
+        self.max_age = self.latency if max_age is None else round(max_age * 1e9)
+        self.channels = None if channels is None else list(channels)
+        self.hold = set(hold)
+        self.capacity = capacity
+        self.tracks: dict[str, Track] = {}
+        self.fields: list[str] | None = None  # set by the first frame
+        self.next_t: int | None = None
+        self.first_t: int | None = None
+        self.newest_t: int | None = None
+        self.frames = 0
+        self.late = 0  # samples not after their channel's previous one
+        self.ignored = 0  # samples of channels not taking part
+        self.dropped = 0  # samples pushed out of a full buffer
+
+    def push(
+        self, channel: str, t: int, values: dict[str, float | None]
+    ) -> list[Frame]:
+        """Add one sample; returns the frames it completed."""
+        track = self.tracks.get(channel)
+        if track is None:
+            if self.fields is not None or (
+                self.channels is not None and channel not in self.channels
+            ):
+                self.ignored += 1
+                return []
+            track = self.tracks[channel] = Track(channel, list(values), self.hold)
+        samples = track.samples
+        if samples and t <= samples[-1][0]:
+            self.late += 1
+            return []
+        if len(samples) >= self.capacity:
+            samples.popleft()
+            self.dropped += 1
+        samples.append((t, values))
+        if self.first_t is None:
+            self.first_t = t
+            self.next_t = -(-t // self.period) * self.period
+        if self.newest_t is None or t > self.newest_t:
+            self.newest_t = t
+        return self._emit(self.newest_t - self.latency)
+
+    def flush(self, now: int) -> list[Frame]:
+        """Frames due by ``now`` on the timebase, for channels gone quiet."""
+        return self._emit(now - self.latency)
+
+    def finish(self) -> list[Frame]:
+        """Every frame up to the newest sample, at the end of a finite stream."""
+        if self.newest_t is None:
+            return []
+        return self._emit(self.newest_t)
+
+    def _emit(self, watermark: int) -> list[Frame]:
+        if self.next_t is None:
+            return []
+        if self.fields is None:
+            seen = self.channels is not None and all(
+                channel in self.tracks for channel in self.channels
+            )
+            waited = max(self.newest_t, watermark + self.latency) - self.first_t
+            if not seen and waited < self.latency:
+                return []
+            self.fields = [
+                key for track in self.tracks.values() for _, key, _ in track.fields
+            ]
+        tracks = self.tracks.values()
+        limit = max(watermark, min(track.samples[-1][0] for track in tracks))
+        stale = max(track.samples[-1][0] for track in tracks) + self.max_age
+        frames = []
+        while self.next_t <= limit:
+            if self.next_t > stale:
+                # Every channel is silent; resume at the next sample
+                self.next_t = -(-(limit + 1) // self.period) * self.period
+                break
+            values: dict[str, float | None] = {}
+            for track in tracks:
+                values.update(track.values_at(self.next_t, self.max_age))
+            frames.append(Frame(self.next_t, values))
+            self.next_t += self.period
+        self.frames += len(frames)
+        return frames
+
+    @property
+    def buffered(self) -> int:
+        return sum(len(track.samples) for track in self.tracks.values())
+
+
+def align_logs(
+    logs: dict[str, SampleLog], start: float, end: float, aligner: Aligner
+) -> Iterator[Frame]:
+    """
+    Fused frames from logged channels over [start, end) epoch seconds, read
+    one segment view at a time; frame times are epoch ns.
+    """
+
+    def samples(channel: str, log: SampleLog):
+        for records in log.iter_range(start, end):
+            for t_ns, *row in records.tolist():
+                yield t_ns, channel, {
+                    field: None if value != value else value
+                    for field, value in zip(log.fields, row)
+                }
+
+    merged = heapq.merge(
+        *(samples(channel, log) for channel, log in logs.items()),
+        key=lambda sample: sample[0],
+    )
+    for t, channel, values in merged:
+        yield from aligner.push(channel, t, values)
+    yield from aligner.finish()
@@ -0,0 +1,724 @@
+import asyncio
+import contextlib
+import datetime
+import fcntl
+import os
+import socket
+import time
+
+import socketio
+from fastapi import FastAPI, HTTPException, Response, WebSocket
+
+from backend import metrics
+from backend.align import Aligner, Timebase, align_logs
+from backend.binary import BinaryHub
+from backend.broadcast import Broadcaster, socketio_backlog
+from backend.config import Config, config_from_env
+from backend.deadband import (
+    BMP280_DEADBAND,
+    BMP280_RESOLUTION,
+    DeadBand,
+    DeltaEncoder,
+)
+from backend.gateway import Gateway, Spool, Uplink
+from backend.rules import build_rules
+from backend.storage import SampleLog, replay
+from backend.timeseries import TimeSeriesStore
+
+LOCK_FILE = "acquisition.lock"
+FUSED = "fused"  # channel of the aligned frames
+MAX_ALIGNED = 100_000  # grid points per /aligned request
+
+
+class SensorServer:
+    """
+    Description:
+    The sensor streaming server: REST and Socket.IO endpoints, history,
+    subscriptions and, in one process, acquisition.
+
+    Background tasks start and stop with the ASGI lifespan. With several
+    workers, the one that holds ``acquisition.lock`` in the data directory
+    samples the sensors and writes the sample logs; the others tail those
+    logs and fan the samples out to their own clients, taking the lock over
+    if the acquiring worker exits. Hardware modules are only imported once
+    a worker starts acquiring. Nodes can be federated: the acquiring worker
+    of an edge with an ``uplink`` pushes its samples to the gateway of a
+    central node, which logs and serves them as ``node:channel``.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.registry = metrics.Registry()
+        self._metrics()
+        self.sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+        self.api = FastAPI(lifespan=self.lifespan)
+        self.api.state.server = self
+        self.app = socketio.ASGIApp(self.sio, other_asgi_app=self.api)
+        self.broadcaster = Broadcaster(
+            self.emit_frame, backlog=socketio_backlog(self.sio)
+        )
+        self.broadcaster.attach(self.sio)
+        # Every sample, packed once, for /ws/binary clients
+        self.binary = BinaryHub()
+        self.history = TimeSeriesStore()
+        self.clients: set[str] = set()
+        # Legacy sensor_data emits are skipped while readings sit inside the
+        # dead-band; clients that send "delta" get compact sensor_delta frames
+        self.deadbands = {"bmp280": DeadBand(BMP280_DEADBAND)}
+        self.encoders = {"bmp280": DeltaEncoder(BMP280_RESOLUTION)}
+        self.logs: dict[str, SampleLog] = {}
+        self.last_t: dict[str, int] = {}  # newest logged ns timestamp per channel
+        # Readings are stamped from the monotonic clock, on one timebase
+        self.timebase = Timebase()
+        self.aligner = self.new_aligner() if config.align_period > 0 else None
+        # Every worker alerts its own clients; GPIO and webhook actions only
+        # run in the acquiring one
+        self.rules = build_rules(config.rules, self.sio.emit) if config.rules else None
+        self.acquiring = False
+        self.engine = None
+        self.gpio_monitor = None
+        self.gateway: Gateway | None = None
+        self.uplink: Uplink | None = None
+        self._lock_file = None
+        self._routes()
+
+    def _metrics(self) -> None:
+        registry = self.registry
+        self.sample_seconds = metrics.Histogram(
+            "sensor_sample_seconds",
+            "Dispatch to result of one sensor read",
+            ("sensor",),
+            registry=registry,
+        )
+        metrics.Collector(
+            "sensor_errors",
+            "Failed sensor reads",
+            "counter",
+            lambda: (
+                ("_total", {"sensor": name}, count)
+                for name, count in (self.engine.errors if self.engine else {}).items()
+            ),
+            registry=registry,
+        )
+        metrics.Collector(
+            "sensor_period_seconds",
+            "Time between samples, as chosen by adaptive sensors",
+            "gauge",
+            lambda: (
+                ("", {"sensor": driver.name}, driver.period / driver.time_scale)
+                for driver in (self.engine.drivers if self.engine else ())
+            ),
+            registry=registry,
+        )
+        self.emit_seconds = metrics.Histogram(
+            "socketio_emit_seconds",
+            "Time to fan one event out to clients",
+            ("event",),
+            registry=registry,
+        )
+        self.emit_errors = metrics.Counter(
+            "socketio_emit_errors", "Emits that raised", ("event",), registry=registry
+        )
+        metrics.Gauge(
+            "socketio_clients", "Connected Socket.IO clients", registry=registry
+        ).set_function(lambda: len(self.clients))
+        for name, attribute, help in (
+            ("broadcast_frames", "sent", "Frames sent to subscribers"),
+            ("broadcast_dropped_frames", "dropped", "Frames skipped for slow clients"),
+            ("broadcast_timeouts", "timeouts", "Frames not sent within the timeout"),
+        ):
+            metrics.Collector(
+                name,
+                help,
+                "counter",
+                lambda attribute=attribute: (
+                    ("_total", {}, getattr(self.broadcaster, attribute)),
+                ),
+                registry=registry,
+            )
+        metrics.Gauge(
+            "binary_clients", "Connected /ws/binary clients", registry=registry
+        ).set_function(lambda: len(self.binary.subscribers))
+        metrics.Gauge(
+            "acquiring", "1 in the worker that samples the sensors", registry=registry
+        ).set_function(lambda: self.acquiring)
+        metrics.Gauge(
+            "align_buffered_samples",
+            "Samples waiting in the fused channel's aligner",
+            registry=registry,
+        ).set_function(lambda: self.aligner.buffered if self.aligner else 0)
+        metrics.Collector(
+            "align_skipped_samples",
+            "Samples the aligner could not use",
+            "counter",
+            lambda: (
+                ("_total", {"reason": reason}, getattr(self.aligner, reason))
+                for reason in ("late", "ignored", "dropped")
+                if self.aligner is not None
+            ),
+            registry=registry,
+        )
+        for name, attribute, help in (
+            ("gateway_batches", "batches", "Batches applied per edge node"),
+            ("gateway_samples", "samples", "Samples received per edge node"),
+            ("gateway_duplicate_batches", "duplicates", "Batches resent per node"),
+            ("gateway_lost_batches", "lost", "Batches edges dropped unsent"),
+            ("gateway_received_bytes", "bytes", "Compressed batch bytes per node"),
+        ):
+            metrics.Collector(
+                name,
+                help,
+                "counter",
+                lambda attribute=attribute: (
+                    ("_total", {"node": node}, getattr(stats, attribute))
+                    for node, stats in (
+                        self.gateway.nodes if self.gateway else {}
+                    ).items()
+                ),
+                registry=registry,
+            )
+        metrics.Gauge(
+            "gateway_nodes", "Edge nodes connected to the gateway", registry=registry
+        ).set_function(
+            lambda: sum(
+                stats.connected
+                for stats in (self.gateway.nodes if self.gateway else {}).values()
+            )
+        )
+        self.gateway_latency = metrics.Histogram(
+            "gateway_latency_seconds",
+            "Edge sample time to central ingest, with synchronized clocks",
+            registry=registry,
+        )
+        metrics.Gauge(
+            "uplink_pending_batches",
+            "Batches spooled and not yet acknowledged by the gateway",
+            registry=registry,
+        ).set_function(lambda: len(self.uplink.spool.pending) if self.uplink else 0)
+        metrics.Gauge(
+            "uplink_spool_bytes", "Size of the uplink spool", registry=registry
+        ).set_function(lambda: self.uplink.spool.nbytes if self.uplink else 0)
+        metrics.Collector(
+            "uplink_dropped_batches",
+            "Batches dropped unsent from a full spool",
+            "counter",
+            lambda: (
+                (("_total", {}, self.uplink.spool.dropped),) if self.uplink else ()
+            ),
+            registry=registry,
+        )
+        metrics.Gauge(
+            "rules_active", "Rules currently firing", registry=registry
+        ).set_function(lambda: len(self.rules.active) if self.rules else 0)
+        self.rule_events = metrics.Counter(
+            "rule_events", "Rules firing and clearing", ("state",), registry=registry
+        )
+        self.loop_lag = metrics.Histogram(
+            "event_loop_lag_seconds",
+            "Event loop wake-up delay after a 100 ms sleep",
+            registry=registry,
+        )
+        for name, attribute, help in (
+            ("i2c_transactions", "transactions", "I2C transactions per device"),
+            ("i2c_errors", "errors", "Failed I2C transactions per device"),
+            ("i2c_read_bytes", "bytes_read", "Payload bytes read per device"),
+            ("i2c_written_bytes", "bytes_written", "Payload bytes written per device"),
+        ):
+            metrics.Collector(
+                name,
+                help,
+                "counter",
+                lambda attribute=attribute: i2c_samples(attribute),
+                registry=registry,
+            )
+        metrics.Collector(
+            "i2c_device_present",
+            "1 while a device answers, 0 after a scan found it missing",
+            "gauge",
+            lambda: (
+                ("", labels, value) for _, labels, value in i2c_samples("present")
+            ),
+            registry=registry,
+        )
+        metrics.Collector(
+            "i2c_transaction_seconds",
+            "I2C transaction latency per device",
+            "histogram",
+            lambda: i2c_samples("histogram"),
+            registry=registry,
+        )
+
+    def _routes(self) -> None:
+        api, sio = self.api, self.sio
+
+        @api.get("/metrics")
+        async def get_metrics():
+            return Response(self.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+        @api.get("/history/{channel}")
+        async def get_history(
+            channel: str,
+            start: float,
+            end: float | None = None,
+            resolution: float = 0.0,
+        ):
+            try:
+                return self.query_history(channel, start, end, resolution)
+            except KeyError:
+                raise HTTPException(
+                    status_code=404, detail=f"Unknown channel {channel}"
+                )
+
+        @api.get("/aligned")
+        async def get_aligned(
+            start: float, end: float | None = None, period: float = 1.0
+        ):
+            """Logged channels resampled onto one grid; see backend.align."""
+            end = time.time() if end is None else end
+            if period <= 0 or (end - start) / period > MAX_ALIGNED:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {MAX_ALIGNED} points, with a positive period",
+                )
+            return self.query_aligned(start, end, period)
+
+        @api.websocket("/ws/binary")
+        async def binary_stream(websocket: WebSocket, channels: str | None = None):
+            """Binary frames, see backend.binary; ?channels=a,b to filter."""
+            await websocket.accept()
+            wanted = None if channels is None else set(channels.split(","))
+            await self.binary.serve(websocket, wanted)
+
+        @sio.on("history")
+        async def history_request(sid, data):
+            try:
+                return self.query_history(**data)
+            except (KeyError, TypeError, ValueError) as e:
+                return {"error": f"Bad history request: {e}"}
+
+        @sio.on("gpio_state")
+        async def gpio_state(sid, data=None):
+            """Header metadata and full pin state; ``gpio_diff`` events follow."""
+            if self.gpio_monitor is None:
+                return {"error": "GPIO monitor is not running in this worker"}
+            return self.gpio_monitor.snapshot()
+
+        @sio.on("delta")
+        async def delta_request(sid, data=None):
+            """Switch a client from sensor_data to sensor_delta frames."""
+            await sio.leave_room(sid, "full")
+            await sio.enter_room(sid, "delta")
+            return {
+                channel: encoder.key_frame()
+                for channel, encoder in self.encoders.items()
+            }
+
+        @sio.event
+        async def connect(sid, environ):
+            self.clients.add(sid)
+            await sio.enter_room(sid, "full")
+            await sio.emit("message", {"data": "Connected to sensor"}, room=sid)
+
+        @sio.event
+        async def disconnect(sid, reason=None):
+            self.clients.discard(sid)
+            self.broadcaster.remove_client(sid)
+
+    def query_history(
+        self,
+        channel: str,
+        start: float,
+        end: float | None = None,
+        resolution: float = 0.0,
+    ) -> dict:
+        end = time.time() if end is None else end
+        return self.history.query(channel, float(start), float(end), float(resolution))
+
+    def new_aligner(self, period: float | None = None) -> Aligner:
+        config = self.config
+        return Aligner(
+            config.align_period if period is None else period,
+            config.align_latency,
+            channels=list(config.align_channels) or None,
+            hold=config.align_hold,
+        )
+
+    def query_aligned(self, start: float, end: float, period: float) -> dict:
+        aligner = self.new_aligner(period)
+        result: dict = {"period": period, "t": []}
+        for frame in align_logs(self.logs, start, end, aligner):
+            result["t"].append(frame.t / 1e9)
+            for key, value in frame.values.items():
+                result.setdefault(key, []).append(value)
+        return result
+
+    async def emit_frame(self, event: str, data: dict, sid: str, ack: bool) -> None:
+        started = time.perf_counter()
+        try:
+            if ack:
+                # Resolves on the client's ack; the broadcaster bounds the wait
+                await self.sio.call(event, data, to=sid, timeout=None)
+            else:
+                await self.sio.emit(event, data, to=sid)
+        except Exception:
+            self.emit_errors.labels(event=event).inc()
+        finally:
+            self.emit_seconds.labels(event=event).observe(time.perf_counter() - started)
+
+    async def publish_sample(self, channel: str, now: float, values: dict) -> None:
+        """Fan one sample out to history, subscribers and legacy clients."""
+        self.history.append(channel, now, values)
+        self.broadcaster.publish(channel, now, values)
+        self.binary.publish(channel, now, values)
+        if self.aligner is not None:
+            self.publish_fused(self.aligner.push(channel, int(now * 1e9), values))
+        if self.rules is not None:
+            await self.run_rules(self.rules.update(channel, now, values))
+        kind = self.deadbands.setdefault(channel, DeadBand({})).check(now, values)
+        if kind is None:
+            return
+        delta = self.encoders.setdefault(channel, DeltaEncoder({})).encode(now, values)
+        await self.sio.emit("sensor_delta", {"channel": channel, **delta}, room="delta")
+        if channel != self.config.legacy_channel:
+            return
+        data = {
+            **values,
+            "timestamp": datetime.datetime.fromtimestamp(now).isoformat(),
+        }
+        started = time.perf_counter()
+        try:
+            await self.sio.emit("sensor_data", data, room="full")
+        except Exception:
+            # Counted, not raised: the sample is already logged and fanned out
+            self.emit_errors.labels(event="sensor_data").inc()
+        finally:
+            self.emit_seconds.labels(event="sensor_data").observe(
+                time.perf_counter() - started
+            )
+
+    async def run_rules(self, events: list) -> None:
+        for event in events:
+            self.rule_events.labels(state=event.state).inc()
+            for action in event.rule.actions:
+                if action.once and not self.acquiring:
+                    continue
+                try:
+                    result = action(event)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    print(f"Rule {event.rule.name}: {action!r} failed: {e}")
+
+    async def watch_rules(self) -> None:
+        """Fire rules whose condition has held long enough between samples."""
+        while True:
+            await asyncio.sleep(1.0)
+            lag = 0.0 if self.acquiring else self.config.flush_interval
+            await self.run_rules(self.rules.tick(time.time() - lag))
+
+    def publish_fused(self, frames: list) -> None:
+        for frame in frames:
+            t = frame.t / 1e9
+            self.history.append(FUSED, t, frame.values)
+            self.broadcaster.publish(FUSED, t, frame.values)
+            self.binary.publish(FUSED, t, frame.values)
+
+    async def align(self) -> None:
+        """Emit fused frames that are waiting on a sensor gone quiet."""
+        while True:
+            await asyncio.sleep(min(self.config.align_period, 1.0))
+            # Followers see samples up to a flush interval late
+            lag = 0.0 if self.acquiring else self.config.flush_interval
+            now = self.timebase.now_ns() - int(lag * 1e9)
+            self.publish_fused(self.aligner.flush(now))
+
+    # Sample logs
+
+    def _channels(self) -> list[str]:
+        data_dir = self.config.data_dir
+        return sorted(
+            name
+            for name in os.listdir(data_dir)
+            if os.path.exists(os.path.join(data_dir, name, "meta.json"))
+        )
+
+    def _open_logs(self, readonly: bool) -> None:
+        for channel in self._channels():
+            if channel not in self.logs:
+                self.logs[channel] = SampleLog(
+                    os.path.join(self.config.data_dir, channel),
+                    readonly=readonly,
+                    retention=self.config.retention,
+                    flush_interval=self.config.flush_interval,
+                )
+
+    def _close_logs(self) -> None:
+        for log in self.logs.values():
+            log.close()
+        self.logs.clear()
+
+    def _publish_new(
+        self, channel: str, log: SampleLog, start: float, end: float, after: int = -1
+    ):
+        for records in log.iter_range(start, end):
+            for record in records.tolist():
+                t_ns, *row = record
+                if t_ns <= after:
+                    continue
+                self.last_t[channel] = t_ns
+                values = {
+                    field: None if value != value else value
+                    for field, value in zip(log.fields, row)
+                }
+                yield t_ns / 1e9, values
+
+    def load_history(self) -> None:
+        """Refill the in-memory history from the end of each log."""
+        self._open_logs(readonly=True)
+        now = time.time()
+        for channel, log in self.logs.items():
+            for t, values in self._publish_new(
+                channel, log, now - self.config.history, now + 60
+            ):
+                self.history.append(channel, t, values)
+
+    async def follow(self) -> None:
+        """Publish what the acquiring worker logged since the last call."""
+        self._open_logs(readonly=True)
+        for channel, log in self.logs.items():
+            log.refresh()
+            last = self.last_t.get(channel, -1)
+            # Epoch seconds in a float are only good to a few hundred ns, so
+            # start early and skip the records already published
+            start = last / 1e9 - 1e-6
+            new = self._publish_new(channel, log, start, 2**62 / 1e9, after=last)
+            for t, values in new:
+                await self.publish_sample(channel, t, values)
+
+    def log_for(self, channel: str, values: dict) -> SampleLog | None:
+        log = self.logs.get(channel)
+        if log is None:
+            try:
+                log = SampleLog(
+                    os.path.join(self.config.data_dir, channel),
+                    list(values),
+                    retention=self.config.retention,
+                    flush_interval=self.config.flush_interval,
+                )
+            except ValueError as e:
+                print(f"Not logging {channel}: {e}")
+                return None
+            self.logs[channel] = log
+        return log
+
+    # Roles
+
+    def _take_lock(self) -> bool:
+        if self._lock_file is None:
+            path = os.path.join(self.config.data_dir, LOCK_FILE)
+            self._lock_file = open(path, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    async def run_role(self) -> None:
+        while not self._take_lock():
+            await self.follow()
+            await asyncio.sleep(self.config.flush_interval)
+        self.acquiring = True
+        print(f"Worker {os.getpid()} is acquiring")
+        if self.config.replay:
+            await self.replay()
+            return
+        # Read-only views were for following; the writer reopens them
+        self._close_logs()
+        tasks = [self.acquire()]
+        if self.config.gateway_port:
+            tasks.append(self.serve_gateway())
+        await asyncio.gather(*tasks)
+
+    async def record(self, channel: str, now: float, values: dict) -> None:
+        """Log a sample acquired in this worker and publish it."""
+        log = self.log_for(channel, values)
+        if log is not None:
+            log.append(now, values)
+        await self.publish_sample(channel, now, values)
+
+    async def flush_logs(self) -> None:
+        """Write out samples of slow channels that no later append would flush."""
+        interval = self.config.flush_interval
+        while True:
+            await asyncio.sleep(interval / 4)
+            for log in list(self.logs.values()):
+                log.flush_if_due()
+
+    async def on_reading(self, reading) -> None:
+        now = self.timebase.epoch_ns(reading.t_ns) / 1e9
+        self.sample_seconds.labels(sensor=reading.sensor).observe(reading.latency)
+        if self.uplink is not None:
+            self.uplink.add(reading.sensor, now, reading.values)
+        await self.record(reading.sensor, now, reading.values)
+
+    async def ingest(self, channel: str, t: float, values: dict) -> None:
+        """A sample pushed by an edge node."""
+        self.gateway_latency.observe(max(time.time() - t, 0.0))
+        await self.record(channel, t, values)
+
+    async def serve_gateway(self) -> None:
+        self.gateway = Gateway(
+            self.ingest, os.path.join(self.config.data_dir, "gateway.json")
+        )
+        print(f"Gateway listening on port {self.config.gateway_port}")
+        await self.gateway.serve(self.config.host, self.config.gateway_port)
+
+    async def acquire(self) -> None:
+        from sensors import backend
+        from sensors.engine import build_engine
+
+        config = self.config
+        if config.fake:
+            backend.select("sim", seed=config.seed, speedup=config.speedup)
+        self.engine = build_engine(
+            config.sensors,
+            on_reading=self.on_reading,
+            speedup=config.speedup if config.fake else 1.0,
+        )
+        tasks = [asyncio.create_task(self.flush_logs())]
+        # A central node may only aggregate, with no sensors of its own
+        if self.engine.drivers:
+            tasks.append(asyncio.create_task(self.engine.run()))
+        if self.config.gpio_monitor:
+            tasks.append(asyncio.create_task(self.monitor_gpio()))
+        if config.uplink:
+            host, port = config.uplink.rsplit(":", 1)
+            spool = Spool(
+                os.path.join(config.data_dir, "uplink"), max_bytes=config.spool_bytes
+            )
+            self.uplink = Uplink(
+                config.node or socket.gethostname(),
+                host,
+                int(port),
+                spool,
+                interval=config.uplink_interval,
+            )
+            tasks.append(asyncio.create_task(self.uplink.run()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.uplink is not None:
+                self.uplink.spool.close()
+            self.engine.close()
+
+    async def replay(self) -> None:
+        """Stream logged samples through the live emit path, for demos and tests."""
+        self._open_logs(readonly=True)
+        await asyncio.gather(
+            *(
+                replay(
+                    log,
+                    channel,
+                    self.publish_sample,
+                    start=self.config.since,
+                    speed=self.config.speed,
+                    loop=True,
+                )
+                for channel, log in self.logs.items()
+            )
+        )
+
+    async def monitor_gpio(self, poll_interval: float = 1.0) -> None:
+        """Mirror the GPIO header: edge callbacks push diffs as they happen and
+        a slow poll catches output pins and direction changes."""
+        from sensors.ultrasonic import UltrasonicDriver
+        from state import GPIO_PINS, GPIOMonitor
+
+        # HC-SR04 drivers drive their pins through RPi.GPIO; gpiozero must
+        # not claim them
+        taken = {
+            pin
+            for driver in self.engine.drivers
+            if isinstance(driver, UltrasonicDriver)
+            for pin in (driver.sensor.trigger_pin, driver.sensor.echo_pin)
+        }
+        try:
+            self.gpio_monitor = GPIOMonitor(
+                pins=[bcm for bcm in GPIO_PINS if bcm not in taken]
+            )
+        except Exception as e:
+            # No gpiozero, or no pin factory it can use on this machine
+            print(f"GPIO monitor unavailable: {e}")
+            return
+        loop = asyncio.get_running_loop()
+
+        def on_diff(diff: dict) -> None:
+            # Edge callbacks arrive on the GPIO library's thread
+            loop.call_soon_threadsafe(
+                lambda: loop.create_task(self.sio.emit("gpio_diff", diff))
+            )
+
+        self.gpio_monitor.start(on_diff)
+        try:
+            while True:
+                await asyncio.sleep(poll_interval)
+                self.gpio_monitor.poll()
+        finally:
+            self.gpio_monitor.close()
+            self.gpio_monitor = None
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, api: FastAPI):
+        os.makedirs(self.config.data_dir, exist_ok=True)
+        self.load_history()
+        tasks = [
+            asyncio.create_task(self.broadcaster.run()),
+            asyncio.create_task(metrics.monitor_loop_lag(self.loop_lag)),
+            asyncio.create_task(self.run_role()),
+        ]
+        if self.aligner is not None:
+            tasks.append(asyncio.create_task(self.align()))
+        if self.rules is not None:
+            tasks.append(asyncio.create_task(self.watch_rules()))
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.rules is not None:
+                self.rules.close()
+            self._close_logs()
+            if self._lock_file is not None:
+                self._lock_file.close()  # releases the lock
+                self._lock_file = None
+            self.acquiring = False
+
+
+def i2c_samples(attribute: str):
+    from sensors.i2c import bus_stats
+
+    for bus_number, devices in bus_stats().items():
+        for addr, stats in devices.items():
+            labels = {"bus": str(bus_number), "address": f"0x{addr:02x}"}
+            if attribute == "histogram":
+                total = 0
+                for bound, count in stats["histogram"].items():
+                    total += count
+                    le = "+Inf" if bound == float("inf") else repr(bound / 1e6)
+                    yield "_bucket", {**labels, "le": le}, total
+                yield "_sum", labels, stats["latency"]
+                yield "_count", labels, stats["transactions"]
+            else:
+                yield "_total", labels, stats[attribute]
+
+
+def create_app(config: Config | None = None) -> socketio.ASGIApp:
+    """
+    ASGI application factory. Without a config it reads the one the launcher
+    left in the environment, which is how uvicorn worker processes get it.
+    """
+    return SensorServer(config or config_from_env()).app
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import math
+import struct
+from collections import deque
+
+# Every frame starts with the channel id (u16) and an epoch timestamp in ns
+# (i64), followed by one little-endian float32 per field; NaN means missing
+HEADER = struct.Struct("<Hq")
+MAX_QUEUE = 256  # frames waiting for one slow client before the oldest drop
+
+
+class BinaryEncoder:
+    """
+    Channel ids and fixed-layout frames.
+
+    A channel gets an id the first time it is seen, and a new id if its
+    fields ever change, so a frame's length always follows from its id.
+    The schema maps ids to names and fields and is sent to clients as JSON.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[tuple[str, tuple[str, ...]], int] = {}
+        self.channels: list[tuple[str, tuple[str, ...], struct.Struct]] = []
+
+    def schema(self) -> dict:
+        return {
+            "type": "schema",
+            "header": HEADER.format,
+            "channels": {
+                str(channel_id): {"name": name, "fields": list(fields)}
+                for channel_id, (name, fields, _) in enumerate(self.channels)
+            },
+        }
+
+    def encode(
+        self, channel: str, t: float, values: dict[str, float | None]
+    ) -> tuple[bytes, bool]:
+        """The frame for one sample, and whether it introduced a new layout."""
+        fields = tuple(values)
+        key = (channel, fields)
+        channel_id = self.ids.get(key)
+        added = channel_id is None
+        if added:
+            channel_id = self.ids[key] = len(self.channels)
+            layout = struct.Struct(HEADER.format + "f" * len(fields))
+            self.channels.append((channel, fields, layout))
+        frame = self.channels[channel_id][2].pack(
+            channel_id,
+            int(t * 1e9),
+            *(math.nan if value is None else value for value in values.values()),
+        )
+        return frame, added
+
+
+class Subscriber:
+    """
+    One websocket's queue; frames are shared, never copied per client.
+
+    Schema messages never queue up behind frames: every schema lists all
+    channels so far, so only the newest one is kept, and it goes out before
+    any frame queued after it. Only frames are dropped when the queue is full.
+    """
+
+    def __init__(self, websocket, channels: set[str] | None) -> None:
+        self.websocket = websocket
+        self.channels = channels
+        self.queue: deque[bytes] = deque()
+        self.schema: str | None = None  # newest schema not yet sent
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, message: bytes | str) -> None:
+        if isinstance(message, str):
+            self.schema = message
+        else:
+            if len(self.queue) >= MAX_QUEUE:
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append(message)
+        self.ready.set()
+
+    async def send(self) -> None:
+        websocket = self.websocket
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.schema is not None or self.queue:
+                if self.schema is not None:
+                    # Frames offered after a schema were queued after it,
+                    # so checking before each batch keeps the order
+                    schema, self.schema = self.schema, None
+                    await websocket.send_text(schema)
+                    continue
+                # A backlog of frames goes out as one message; frames have
+                # fixed lengths, so the client can split them again
+                message = b"".join(self.queue)
+                self.queue.clear()
+                await websocket.send_bytes(message)
+                self.sent += 1
+
+
+class BinaryHub:
+    """
+    Description:
+    Raw samples to websocket clients as binary frames.
+
+    Each sample is packed once and the same bytes object is queued for
+    every subscriber. A client first receives the schema as a text
+    message, and again whenever a channel or layout is added. Clients
+    that fall MAX_QUEUE frames behind lose the oldest ones.
+    """
+
+    def __init__(self) -> None:
+        self.encoder = BinaryEncoder()
+        self.subscribers: set[Subscriber] = set()
+
+    def publish(self, channel: str, t: float, values: dict[str, float | None]) -> None:
+        if not self.subscribers:
+            # Still register the layout so the first schema is complete
+            if (channel, tuple(values)) not in self.encoder.ids:
+                self.encoder.encode(channel, t, values)
+            return
+        frame, added = self.encoder.encode(channel, t, values)
+        if added:
+            schema = json.dumps(self.encoder.schema())
+            for subscriber in self.subscribers:
+                subscriber.offer(schema)
+        for subscriber in self.subscribers:
+            if subscriber.channels is None or channel in subscriber.channels:
+                subscriber.offer(frame)
+
+    async def serve(self, websocket, channels: set[str] | None = None) -> None:
+        """Stream to an accepted websocket until the client goes away."""
+        subscriber = Subscriber(websocket, channels)
+        subscriber.offer(json.dumps(self.encoder.schema()))
+        self.subscribers.add(subscriber)
+        sender = asyncio.create_task(subscriber.send())
+        try:
+            # Nothing is expected from the client; this only notices it leave
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        finally:
+            self.subscribers.discard(subscriber)
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+
+def decode(
+    schema: dict, message: bytes
+) -> list[tuple[str, float, dict[str, float | None]]]:
+    """
+    Reference decoder: (channel, epoch seconds, values) for every frame in
+    one binary message, given the latest schema message.
+    """
+    layouts = {
+        int(channel_id): (
+            info["name"],
+            info["fields"],
+            struct.Struct(schema["header"] + "f" * len(info["fields"])),
+        )
+        for channel_id, info in schema["channels"].items()
+    }
+    samples = []
+    offset = 0
+    while offset < len(message):
+        channel_id, _ = HEADER.unpack_from(message, offset)
+        name, fields, layout = layouts[channel_id]
+        _, t_ns, *row = layout.unpack_from(message, offset)
+        offset += layout.size
+        samples.append(
+            (
+                name,
+                t_ns / 1e9,
+                {
+                    field: None if math.isnan(value) else value
+                    for field, value in zip(fields, row)
+                },
+            )
+        )
+    return samples
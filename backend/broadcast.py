@@ -0,0 +1,309 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+# Resolves once the event is queued for the client, or with ``ack`` set once
+# the client has acknowledged it
+Emit = Callable[[str, dict, str, bool], Awaitable[None]]
+# Packets queued on a client's transport and not yet written out
+Backlog = Callable[[str], int]
+
+MAX_RATE = 50.0  # Hz, the fastest a client may ask for
+MIN_WINDOW = 0.05  # s, shortest batching window
+ACK_TIMEOUT = 5.0  # s, longest a frame may take to go out or be acknowledged
+MAX_BACKLOG = 4  # packets a client's transport may hold before frames are skipped
+
+
+class Group:
+    """
+    Subscribers that share a channel, rate, batching window and payload
+    layout. Decimation and frame encoding happen once per group, not once
+    per client.
+    """
+
+    __slots__ = (
+        "channel",
+        "interval",
+        "window",
+        "columnar",
+        "clients",
+        "pending",
+        "last_kept",
+        "next_flush",
+    )
+
+    def __init__(
+        self, channel: str, interval: float, window: float, columnar: bool
+    ) -> None:
+        self.channel = channel
+        self.interval = interval
+        self.window = window
+        self.columnar = columnar
+        self.clients: set[str] = set()
+        self.pending: list[tuple[float, dict[str, float | None]]] = []
+        self.last_kept = float("-inf")
+        self.next_flush = 0.0
+
+    def offer(self, timestamp: float, values: dict[str, float | None]) -> None:
+        if timestamp - self.last_kept >= self.interval:
+            self.last_kept = timestamp
+            self.pending.append((timestamp, values))
+
+    def take(self) -> list[tuple[float, dict[str, float | None]]]:
+        samples, self.pending = self.pending, []
+        return samples
+
+    def frame(self, samples: list[tuple[float, dict[str, float | None]]]) -> dict:
+        if self.columnar:
+            columns: dict[str, list] = {"t": [round(t * 1000) for t, _ in samples]}
+            for key in samples[0][1]:
+                columns[key] = [values.get(key) for _, values in samples]
+            return {"channel": self.channel, "columns": columns}
+        return {
+            "channel": self.channel,
+            "samples": [{"t": round(t * 1000), **values} for t, values in samples],
+        }
+
+
+class Client:
+    __slots__ = (
+        "sid",
+        "groups",
+        "acked",
+        "in_flight",
+        "held",
+        "sent",
+        "dropped",
+        "timeouts",
+    )
+
+    def __init__(self, sid: str) -> None:
+        self.sid = sid
+        self.groups: dict[str, Group] = {}  # channel -> group
+        self.acked: set[str] = set()  # channels the client acknowledges frames of
+        self.in_flight: set[str] = set()  # channels with a frame still going out
+        # Newest sample of each channel that arrived while a frame was going out
+        self.held: dict[str, tuple[float, dict[str, float | None]]] = {}
+        self.sent = 0
+        self.dropped = 0
+        self.timeouts = 0
+
+
+class Broadcaster:
+    """
+    Fan sensor samples out to subscribed clients in batched frames.
+
+    A client sends ``subscribe`` with ``{"channel", "rate", "window",
+    "format"}``: ``rate`` (Hz) decimates the channel, ``window`` (s) sets how
+    many samples get coalesced into one ``sensor_frame`` and ``format`` picks
+    row ("rows") or column ("columns") payloads. Timestamps are epoch
+    milliseconds.
+
+    While the client's previous frame of a channel is still going out, a
+    new frame is not queued behind it. Only its newest sample is held, and
+    is sent as soon as the channel is free, on its own or at the front of
+    the next frame, so a slow reader costs the server at most one frame and
+    one sample per channel. Skipped frames are counted in ``dropped``.
+
+    By default a frame has gone out once ``backlog`` reports the client's
+    transport has drained to ``max_backlog`` packets: Socket.IO's own emit
+    returns as soon as the packet is queued, and a client that stops
+    reading only shows up as a growing transport queue. Clients that
+    subscribe with ``"ack": true`` acknowledge every ``sensor_frame`` of
+    that channel instead, and the next frame waits for the ack. A frame
+    that has not gone out within ``ack_timeout`` seconds is given up on and
+    counted in ``timeouts``; a client that has stopped reading altogether
+    is disconnected by the engine.io ping timeout.
+    """
+
+    def __init__(
+        self,
+        emit: Emit,
+        event: str = "sensor_frame",
+        tick: float = MIN_WINDOW,
+        ack_timeout: float = ACK_TIMEOUT,
+        backlog: Backlog | None = None,
+        max_backlog: int = MAX_BACKLOG,
+    ) -> None:
+        self.emit = emit
+        self.event = event
+        self.tick = tick
+        self.ack_timeout = ack_timeout
+        self.backlog = backlog
+        self.max_backlog = max_backlog
+        # Totals over every client, including ones that have left
+        self.sent = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.channels: dict[str, dict[tuple, Group]] = {}
+        self.clients: dict[str, Client] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def for_socketio(cls, sio, **options) -> "Broadcaster":
+        async def emit(event: str, data: dict, sid: str, ack: bool) -> None:
+            if ack:
+                # The broadcaster bounds the wait with its own ack_timeout
+                await sio.call(event, data, to=sid, timeout=None)
+            else:
+                await sio.emit(event, data, to=sid)
+
+        options.setdefault("backlog", socketio_backlog(sio))
+        broadcaster = cls(emit, **options)
+        broadcaster.attach(sio)
+        return broadcaster
+
+    def attach(self, sio) -> None:
+        @sio.on("subscribe")
+        async def subscribe(sid, data):
+            try:
+                self.subscribe(sid, **data)
+            except (TypeError, ValueError) as e:
+                return {"error": str(e)}
+            return {"ok": True}
+
+        @sio.on("unsubscribe")
+        async def unsubscribe(sid, data):
+            try:
+                self.unsubscribe(sid, data["channel"])
+            except (TypeError, KeyError) as e:
+                return {"error": str(e)}
+            return {"ok": True}
+
+    def subscribe(
+        self,
+        sid: str,
+        channel: str,
+        rate: float | None = None,
+        window: float = 1.0,
+        format: str = "rows",
+        ack: bool = False,
+    ) -> None:
+        if format not in ("rows", "columns"):
+            raise ValueError(f"unknown format {format!r}")
+        if rate is not None and not float(rate) > 0:
+            raise ValueError(f"rate must be positive, not {rate!r}")
+        interval = 0.0 if rate is None else 1.0 / min(float(rate), MAX_RATE)
+        window = max(float(window), MIN_WINDOW)
+        key = (interval, window, format == "columns")
+        client = self.clients.setdefault(sid, Client(sid))
+        self._leave(client, channel)
+        groups = self.channels.setdefault(channel, {})
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = Group(channel, *key)
+        client.groups[channel] = group
+        group.clients.add(sid)
+        if ack:
+            client.acked.add(channel)
+
+    def _leave(self, client: Client, channel: str) -> None:
+        group = client.groups.pop(channel, None)
+        if group is None:
+            return
+        group.clients.discard(client.sid)
+        client.acked.discard(channel)
+        client.held.pop(channel, None)
+        if not group.clients:
+            del self.channels[channel][(group.interval, group.window, group.columnar)]
+
+    def unsubscribe(self, sid: str, channel: str) -> None:
+        client = self.clients.get(sid)
+        if client is not None:
+            self._leave(client, channel)
+
+    def remove_client(self, sid: str) -> None:
+        client = self.clients.pop(sid, None)
+        if client is not None:
+            for channel in list(client.groups):
+                self._leave(client, channel)
+
+    def publish(
+        self, channel: str, timestamp: float, values: dict[str, float | None]
+    ) -> None:
+        for group in self.channels.get(channel, {}).values():
+            group.offer(timestamp, values)
+
+    def _blocked(self, client: Client, channel: str) -> bool:
+        """Whether the client's previous frame of the channel is still going out."""
+        if channel in client.in_flight:
+            return True
+        if channel in client.acked or self.backlog is None:
+            return False
+        return self.backlog(client.sid) > self.max_backlog
+
+    async def _deliver(self, client: Client, channel: str, frame: dict) -> None:
+        try:
+            await asyncio.wait_for(
+                self.emit(self.event, frame, client.sid, channel in client.acked),
+                self.ack_timeout,
+            )
+            client.sent += 1
+            self.sent += 1
+        except TimeoutError:
+            client.timeouts += 1
+            self.timeouts += 1
+        finally:
+            client.in_flight.discard(channel)
+            if channel in client.held and self.clients.get(client.sid) is client:
+                # An acked client is free again as soon as the ack is in
+                self._release(client, channel)
+
+    def _send(self, client: Client, channel: str, frame: dict) -> None:
+        client.in_flight.add(channel)
+        task = asyncio.create_task(self._deliver(client, channel, frame))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _release(self, client: Client, channel: str) -> bool:
+        """Send the sample held back for the channel, if the client is free."""
+        if self._blocked(client, channel):
+            return False
+        sample = client.held.pop(channel)
+        self._send(client, channel, client.groups[channel].frame([sample]))
+        return True
+
+    def flush(self, now: float | None = None) -> int:
+        """Send every group whose window has elapsed; returns frames started."""
+        now = time.monotonic() if now is None else now
+        started = 0
+        for groups in self.channels.values():
+            for group in groups.values():
+                if now < group.next_flush or not group.pending:
+                    continue
+                group.next_flush = now + group.window
+                samples = group.take()
+                frame = group.frame(samples)
+                for sid in group.clients:
+                    client = self.clients[sid]
+                    if self._blocked(client, group.channel):
+                        client.held[group.channel] = samples[-1]
+                        client.dropped += 1
+                        self.dropped += 1
+                        continue
+                    held = client.held.pop(group.channel, None)
+                    if held is not None:
+                        self._send(client, group.channel, group.frame([held, *samples]))
+                    else:
+                        self._send(client, group.channel, frame)
+                    started += 1
+        # Clients whose transport drained between their channels' windows
+        for client in self.clients.values():
+            for channel in list(client.held):
+                started += self._release(client, channel)
+        return started
+
+    async def run(self) -> None:
+        while True:
+            self.flush()
+            await asyncio.sleep(self.tick)
+
+
+def socketio_backlog(sio, namespace: str = "/") -> Backlog:
+    """Packets waiting in each client's engine.io send queue."""
+
+    def backlog(sid: str) -> int:
+        socket = sio.eio.sockets.get(sio.manager.eio_sid_from_sid(sid, namespace))
+        return 0 if socket is None else socket.queue.qsize()
+
+    return backlog
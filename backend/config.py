@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import tomllib
+from typing import NamedTuple
+
+# Workers started by uvicorn re-read the configuration from this variable
+CONFIG_ENV = "SENSOR_SERVER_CONFIG"
+
+DEFAULT_SENSORS = (
+    {
+        "driver": "bmp280",
+        "name": "bmp280",
+        "period": 1.0,
+        "profile": {"osrs_t": "x16", "osrs_p": "x16", "mode": "forced", "filter": "16"},
+    },
+)
+
+
+class Config(NamedTuple):
+    host: str = "localhost"
+    port: int = 5000
+    workers: int = 1
+    # Engine specs, e.g. {"driver": "bmp280", "period": 1.0}; see sensors.registry
+    sensors: tuple[dict, ...] = DEFAULT_SENSORS
+    fake: bool = False  # simulated devices (sensors.backend.Simulation)
+    seed: int = 0  # of the simulated signals
+    speedup: float = 1.0  # simulated time runs this many times faster
+    data_dir: str = "data"
+    retention: float = 30 * 86400  # s of samples kept on disk
+    history: float = 86400  # s of the log loaded into memory on startup
+    flush_interval: float = 1.0  # s; also how far other workers lag behind
+    gpio_monitor: bool = True
+    legacy_channel: str = "bmp280"  # sent as sensor_data to pre-subscription clients
+    # Fused channel: every sensor resampled onto one grid, see backend.align
+    align_period: float = 0.0  # s between grid points; 0 turns it off
+    align_latency: float = 2.0  # s a grid point waits for slow sensors
+    align_channels: tuple[str, ...] = ()  # empty for those seen at startup
+    align_hold: tuple[str, ...] = ()  # channels or channel.field not interpolated
+    # Federation, see backend.gateway: edges push to a central gateway
+    node: str = ""  # name in the central's channels (node:channel); host name
+    uplink: str = ""  # host:port of the central gateway, on edges
+    uplink_interval: float = 0.5  # s of samples per batch
+    spool_bytes: int = 64 << 20  # on-disk queue for batches not yet acknowledged
+    gateway_port: int = 0  # > 0 on the central node: accept edges on this port
+    # Alert rules, e.g. {"channel": "bmp280", "field": "temperature", "op": ">",
+    # "threshold": 30, "for": 60, "actions": ["alert"]}; see backend.rules
+    rules: tuple[dict, ...] = ()
+    replay: bool = False  # serve the recorded log instead of sampling
+    since: float = 0.0  # epoch seconds to start the replay from
+    speed: float = 1.0
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+    @classmethod
+    def from_json(cls, text: str) -> "Config":
+        options = json.loads(text)
+        for key in ("sensors", "align_channels", "align_hold", "rules"):
+            options[key] = tuple(options[key])
+        return cls(**options)
+
+
+def load_config(
+    path: str | None = None, defaults: dict | None = None, **overrides
+) -> Config:
+    """
+    Built-in defaults, then ``defaults``, then the TOML file at ``path``,
+    then the non-None ``overrides`` (command-line flags).
+    """
+    options = dict(defaults or {})
+    if path is not None:
+        with open(path, "rb") as f:
+            settings = tomllib.load(f)
+        unknown = set(settings) - set(Config._fields)
+        if unknown:
+            raise ValueError(f"{path}: unknown settings {sorted(unknown)}")
+        options.update(settings)
+    options.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    for key in ("sensors", "align_channels", "align_hold", "rules"):
+        if key in options:
+            options[key] = tuple(options[key])
+    return Config(**options)
+
+
+def config_from_env() -> Config:
+    text = os.environ.get(CONFIG_ENV)
+    return Config() if text is None else Config.from_json(text)
+
+
+def parse_args(argv: list[str] | None = None, **defaults) -> Config:
+    """Config from the command line; ``defaults`` sit below the config file."""
+    parser = argparse.ArgumentParser(description="Sensor streaming server")
+    parser.add_argument("--config", help="TOML file, see config.example.toml")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int, help="server processes")
+    parser.add_argument(
+        "--fake", action="store_true", default=None, help="simulated sensors"
+    )
+    parser.add_argument("--seed", type=int, help="of the simulated signals")
+    parser.add_argument(
+        "--speedup", type=float, help="run simulated sensors this many times faster"
+    )
+    parser.add_argument("--data-dir", dest="data_dir")
+    parser.add_argument("--node", help="name of this node in the central's channels")
+    parser.add_argument("--uplink", help="host:port of the central gateway")
+    parser.add_argument(
+        "--gateway-port", dest="gateway_port", type=int, help="accept edge nodes"
+    )
+    parser.add_argument(
+        "--align-period",
+        dest="align_period",
+        type=float,
+        help="s between fused frames of all sensors; 0 for none",
+    )
+    parser.add_argument(
+        "--no-gpio-monitor", dest="gpio_monitor", action="store_false", default=None
+    )
+    parser.add_argument(
+        "--replay", action="store_true", default=None, help="replay the log"
+    )
+    parser.add_argument("--since", type=float, help="epoch seconds")
+    parser.add_argument("--speed", type=float)
+    args = vars(parser.parse_args(argv))
+    return load_config(args.pop("config"), defaults, **args)
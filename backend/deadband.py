@@ -0,0 +1,134 @@
+import math
+from typing import NamedTuple
+
+HEARTBEAT = 30.0  # s
+
+# About four times the BMP280 RMS noise at x16 oversampling
+BMP280_DEADBAND = {"temperature": 0.05, "pressure": 0.05}  # °C, hPa
+BMP280_RESOLUTION = {"temperature": 0.01, "pressure": 0.01}
+RESOLUTION = 1e-6  # for fields without one
+
+
+def _changed(old: float | None, new: float | None, delta: float) -> bool:
+    if old is None or new is None:
+        return old is not new
+    if math.isnan(old) or math.isnan(new):
+        return math.isnan(old) != math.isnan(new)
+    return abs(new - old) > delta
+
+
+class DeadBand:
+    """
+    Change suppression for one channel.
+
+    A sample passes when any field moved by more than its ``deltas`` entry
+    since the last sample that passed (fields without one pass on any
+    change), or when ``heartbeat`` seconds went by without one, so clients
+    can tell a steady reading from a dead sensor.
+    """
+
+    def __init__(self, deltas: dict[str, float], heartbeat: float = HEARTBEAT) -> None:
+        self.deltas = deltas
+        self.heartbeat = heartbeat
+        self.sent: dict[str, float | None] | None = None
+        self.sent_t = -math.inf
+        self.passed = 0
+        self.suppressed = 0
+
+    def check(self, t: float, values: dict[str, float | None]) -> str | None:
+        """Returns "key" for a heartbeat or first sample, "change", or None."""
+        if self.sent is None or t - self.sent_t >= self.heartbeat:
+            kind = "key"
+        elif any(
+            _changed(self.sent.get(field), value, self.deltas.get(field, 0.0))
+            for field, value in values.items()
+        ):
+            kind = "change"
+        else:
+            self.suppressed += 1
+            return None
+        self.sent = dict(values)
+        self.sent_t = t
+        self.passed += 1
+        return kind
+
+
+class DeltaEncoder:
+    """
+    Opt-in compact updates for one channel.
+
+    Values are quantized to ``resolution`` and sent as integer steps. A key
+    frame carries every field and the resolution; later frames carry only
+    the fields whose step count changed, as differences, so the client's
+    running sum stays exact. Heartbeats go out as (possibly empty) delta
+    frames; a field going missing or coming back forces a key frame.
+    """
+
+    def __init__(self, resolution: dict[str, float]) -> None:
+        self.resolution = dict(resolution)
+        self.steps: dict[str, int | None] = {}
+        self.t = 0.0
+
+    def _quantize(self, field: str, value: float | None) -> int | None:
+        if value is None or math.isnan(value):
+            return None
+        return round(value / self.resolution.setdefault(field, RESOLUTION))
+
+    def key_frame(self) -> dict:
+        """Current state, also for a client that just opted in."""
+        return {
+            "t": round(self.t * 1000),
+            "key": {
+                field: None if q is None else round(q * self.resolution[field], 9)
+                for field, q in self.steps.items()
+            },
+            "res": dict(self.resolution),
+        }
+
+    def encode(
+        self, t: float, values: dict[str, float | None], key: bool = False
+    ) -> dict:
+        steps = {field: self._quantize(field, value) for field, value in values.items()}
+        previous, self.steps, self.t = self.steps, steps, t
+        if key or previous.keys() != steps.keys():
+            return self.key_frame()
+        changes = {}
+        for field, q in steps.items():
+            if q == previous[field]:
+                continue
+            if q is None or previous[field] is None:
+                return self.key_frame()
+            changes[field] = q - previous[field]
+        return {"t": round(t * 1000), "d": changes}
+
+
+class DeltaState(NamedTuple):
+    """Client-side state of the reference decoder."""
+
+    steps: dict[str, int | None]
+    resolution: dict[str, float]
+
+
+def decode(
+    state: DeltaState | None, message: dict
+) -> tuple[DeltaState, dict[str, float | None]]:
+    """Reference decoder: apply one frame, return the new state and values."""
+    if "key" in message:
+        resolution = message["res"]
+        steps = {
+            field: None if value is None else round(value / resolution[field])
+            for field, value in message["key"].items()
+        }
+        state = DeltaState(steps, resolution)
+    elif state is None:
+        raise ValueError("delta frame before the first key frame")
+    else:
+        steps = dict(state.steps)
+        for field, change in message["d"].items():
+            steps[field] += change
+        state = DeltaState(steps, state.resolution)
+    values = {
+        field: None if q is None else q * state.resolution[field]
+        for field, q in state.steps.items()
+    }
+    return state, values
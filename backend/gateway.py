@@ -0,0 +1,454 @@
+import asyncio
+import itertools
+import json
+import os
+import struct
+import zlib
+from collections import deque
+from typing import Awaitable, Callable, NamedTuple
+
+# Every message, and every record in a spool segment, is a header followed
+# by ``length`` payload bytes
+HEADER = struct.Struct("<BQI")  # kind, sequence number, length
+HELLO, BATCH, ACK = 1, 2, 3
+MAX_PAYLOAD = 16 << 20
+SPOOL_BYTES = 64 << 20
+SEGMENT_BYTES = 1 << 20
+
+Publish = Callable[[str, float, dict[str, float | None]], Awaitable[None] | None]
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    kind, seq, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"{length} byte message is over {MAX_PAYLOAD}")
+    return kind, seq, await reader.readexactly(length)
+
+
+def write_message(
+    writer: asyncio.StreamWriter, kind: int, seq: int, payload: bytes = b""
+) -> None:
+    writer.write(HEADER.pack(kind, seq, len(payload)) + payload)
+
+
+def encode_batch(samples: list[tuple[str, float, dict[str, float | None]]]) -> bytes:
+    """
+    Samples grouped by channel, field names once per channel and timestamps
+    as ns deltas, then zlib-compressed JSON.
+    """
+    channels: dict[str, list] = {}
+    for channel, t, values in samples:
+        group = channels.get(channel)
+        if group is None:
+            group = channels[channel] = [channel, list(values), [], [], 0]
+        t_ns = int(t * 1e9)
+        group[2].append(t_ns - group[4])
+        group[3].append([values.get(field) for field in group[1]])
+        group[4] = t_ns
+    body = [group[:4] for group in channels.values()]
+    return zlib.compress(json.dumps(body, separators=(",", ":")).encode())
+
+
+def decode_batch(payload: bytes) -> list[tuple[str, float, dict[str, float | None]]]:
+    samples = []
+    for channel, fields, deltas, rows in json.loads(zlib.decompress(payload)):
+        t_ns = 0
+        for delta, row in zip(deltas, rows):
+            t_ns += delta
+            samples.append((channel, t_ns / 1e9, dict(zip(fields, row))))
+    return samples
+
+
+class Entry(NamedTuple):
+    seq: int
+    path: str
+    offset: int  # of the record header
+    size: int  # header and payload
+
+
+class Spool:
+    """
+    Bounded on-disk FIFO of numbered batches, so an edge keeps its samples
+    through uplink outages and its own restarts.
+
+    Batches are appended as HEADER-framed records to segment files that
+    rotate every ``segment_bytes``, and forgotten once acknowledged; the
+    highest acknowledged number is kept in ``acked``. Over ``max_bytes``
+    the oldest segment is deleted, acknowledged or not, and its batches
+    counted in ``dropped``. ``epoch`` is a random name given to the spool
+    when its directory is first used, so a node that lost its spool, and
+    numbers batches from 1 again, is told apart from one that did not.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = SPOOL_BYTES,
+        segment_bytes: int = SEGMENT_BYTES,
+        fsync: bool = True,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.dropped = 0
+        self.acked = 0
+        epoch_path = os.path.join(directory, "epoch")
+        if os.path.exists(epoch_path):
+            with open(epoch_path) as f:
+                self.epoch = f.read().strip()
+        else:
+            self.epoch = os.urandom(8).hex()
+            with open(epoch_path, "w") as f:
+                f.write(self.epoch)
+        acked_path = os.path.join(directory, "acked")
+        if os.path.exists(acked_path):
+            with open(acked_path) as f:
+                self.acked = int(f.read())
+        self.pending: deque[Entry] = deque()
+        self.segments: dict[str, int] = {}  # path to size, oldest first
+        self.last_seq = self.acked
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".spool"):
+                self._recover(os.path.join(directory, name))
+        self._file = None
+
+    def _recover(self, path: str) -> None:
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            kind, seq, length = HEADER.unpack_from(data, offset)
+            end = offset + HEADER.size + length
+            if kind != BATCH or end > len(data):
+                break
+            if seq > self.acked:
+                self.pending.append(Entry(seq, path, offset, end - offset))
+            self.last_seq = max(self.last_seq, seq)
+            offset = end
+        if offset < len(data):
+            # Torn by a crash mid-write
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        self.segments[path] = offset
+
+    def put(self, payload: bytes) -> int:
+        """Append a batch and return its sequence number."""
+        self.last_seq += 1
+        if self._file is None or self._file.tell() >= self.segment_bytes:
+            self._rotate()
+        record = HEADER.pack(BATCH, self.last_seq, len(payload)) + payload
+        offset = self._file.tell()
+        self._file.write(record)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        path = self._file.name
+        self.segments[path] += len(record)
+        self.pending.append(Entry(self.last_seq, path, offset, len(record)))
+        while sum(self.segments.values()) > self.max_bytes and len(self.segments) > 1:
+            self._remove(next(iter(self.segments)))
+        return self.last_seq
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{self.last_seq:020d}.spool")
+        self._file = open(path, "ab")
+        self.segments[path] = self._file.tell()
+
+    def _remove(self, path: str) -> None:
+        while self.pending and self.pending[0].path == path:
+            self.pending.popleft()
+            self.dropped += 1
+        del self.segments[path]
+        os.remove(path)
+
+    def ack(self, seq: int) -> None:
+        """Forget every batch up to and including ``seq``."""
+        if seq <= self.acked:
+            return
+        self.acked = seq
+        while self.pending and self.pending[0].seq <= seq:
+            self.pending.popleft()
+        active = None if self._file is None else self._file.name
+        first = self.pending[0].path if self.pending else active
+        for path in list(self.segments):
+            if path == first or path == active:
+                break
+            self._remove(path)
+        acked_path = os.path.join(self.directory, "acked")
+        with open(acked_path + ".tmp", "w") as f:
+            f.write(str(seq))
+        os.replace(acked_path + ".tmp", acked_path)
+
+    def record(self, entry: Entry) -> bytes:
+        """A pending batch as it goes on the wire."""
+        with open(entry.path, "rb") as f:
+            f.seek(entry.offset)
+            return f.read(entry.size)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self.segments.values())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Uplink:
+    """
+    Description:
+    Pushes this node's samples to a central Gateway over one connection.
+
+    add() collects samples; every ``interval`` they are sealed into one
+    compressed, numbered batch in the spool and sent. At most ``window``
+    batches are in flight unacknowledged, beyond that batches wait on
+    disk, so a slow or unreachable gateway costs spool space and not
+    memory. After a reconnect every unacknowledged batch is sent again
+    and the gateway drops those it has already applied.
+    """
+
+    def __init__(
+        self,
+        node: str,
+        host: str,
+        port: int,
+        spool: Spool,
+        interval: float = 0.5,
+        window: int = 8,
+        max_samples: int = 10_000,
+    ) -> None:
+        self.node = node
+        self.host = host
+        self.port = port
+        self.spool = spool
+        self.interval = interval
+        self.window = window
+        self.max_samples = max_samples
+        self.samples: list[tuple[str, float, dict[str, float | None]]] = []
+        self.connected = False
+        self.sent = 0  # batches, resends included
+        self._wake = asyncio.Event()
+
+    def add(self, channel: str, t: float, values: dict[str, float | None]) -> None:
+        self.samples.append((channel, t, values))
+        if len(self.samples) >= self.max_samples:
+            self.seal()
+
+    def seal(self) -> None:
+        if self.samples:
+            self.spool.put(encode_batch(self.samples))
+            self.samples = []
+            self._wake.set()
+
+    async def run(self) -> None:
+        sealer = asyncio.create_task(self._seal_every())
+        backoff = 0.5
+        try:
+            while True:
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError as e:
+                    print(f"Uplink to {self.host}:{self.port} failed: {e}")
+                else:
+                    backoff = 0.5
+                    try:
+                        await self._session(reader, writer)
+                    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                        print(f"Uplink to {self.host}:{self.port} lost: {e}")
+                    finally:
+                        self.connected = False
+                        writer.close()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+        finally:
+            sealer.cancel()
+            self.seal()
+
+    async def _seal_every(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.seal()
+
+    async def _session(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        hello = {
+            "node": self.node,
+            "epoch": self.spool.epoch,
+            "acked": self.spool.acked,
+        }
+        write_message(writer, HELLO, self.spool.last_seq, json.dumps(hello).encode())
+        kind, seq, _ = await read_message(reader)
+        if kind != ACK:
+            raise ValueError(f"expected an ACK, got message kind {kind}")
+        self.spool.ack(seq)
+        self.connected = True
+        receiver = asyncio.create_task(self._receive_acks(reader))
+        try:
+            sent = self.spool.acked
+            while not receiver.done():
+                # Unacknowledged batches in flight are the first in the spool
+                in_flight = sum(
+                    1
+                    for entry in itertools.islice(self.spool.pending, self.window)
+                    if entry.seq <= sent
+                )
+                batch = [
+                    entry
+                    for entry in itertools.islice(self.spool.pending, self.window)
+                    if entry.seq > sent
+                ][: self.window - in_flight]
+                if not batch:
+                    self._wake.clear()
+                    waiter = asyncio.ensure_future(self._wake.wait())
+                    await asyncio.wait(
+                        [waiter, receiver], return_when=asyncio.FIRST_COMPLETED
+                    )
+                    waiter.cancel()
+                    continue
+                for entry in batch:
+                    writer.write(self.spool.record(entry))
+                    sent = entry.seq
+                    self.sent += 1
+                await writer.drain()
+            receiver.result()
+        finally:
+            receiver.cancel()
+
+    async def _receive_acks(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            kind, seq, _ = await read_message(reader)
+            if kind == ACK:
+                self.spool.ack(seq)
+                self._wake.set()
+
+
+class NodeStats:
+    def __init__(self) -> None:
+        self.batches = 0
+        self.samples = 0
+        self.duplicates = 0  # batches applied before, e.g. resent after a reconnect
+        self.lost = 0  # batches the edge dropped from its spool
+        self.bytes = 0
+        self.connected = False
+
+
+class Gateway:
+    """
+    Description:
+    Accepts edge Uplinks and hands their samples to ``publish`` as
+    ``node:channel``.
+
+    Batches are applied in order per node and acknowledged with the
+    highest number applied, which is kept in ``state_path`` so batches
+    resent after a reconnect or a restart are acknowledged but not
+    published twice. An edge that comes back with a new spool epoch has
+    restarted its numbering, and is counted from its own ``acked`` again.
+    A connection is not read while ``publish`` is busy, which holds the
+    edge back through TCP flow control and its window.
+    """
+
+    def __init__(self, publish: Publish, state_path: str | None = None) -> None:
+        self.publish = publish
+        self.state_path = state_path
+        self.applied: dict[str, int] = {}
+        self.epochs: dict[str, str] = {}  # spool epoch each node last sent
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            self.applied = state["applied"]
+            self.epochs = state["epochs"]
+        self.nodes: dict[str, NodeStats] = {}
+        self.connections: set[asyncio.StreamWriter] = set()
+        # A reconnecting edge can overlap its old, not yet closed connection
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _save(self) -> None:
+        if self.state_path is None:
+            return
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump({"applied": self.applied, "epochs": self.epochs}, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """One edge connection, for asyncio.start_server()."""
+        node = None
+        self.connections.add(writer)
+        try:
+            kind, last_seq, payload = await read_message(reader)
+            if kind != HELLO:
+                raise ValueError(f"expected HELLO, got message kind {kind}")
+            hello = json.loads(payload)
+            if not isinstance(hello, dict) or not isinstance(hello.get("node"), str):
+                raise ValueError(f"malformed HELLO {payload[:64]!r}")
+            node = hello["node"]
+            epoch = hello.get("epoch")
+            known = self.epochs.get(node)
+            if (
+                epoch is not None and known is not None and epoch != known
+            ) or self.applied.get(node, 0) > last_seq:
+                # The edge lost its spool and numbers from scratch again
+                print(f"Gateway: {node} restarted its sequence numbers")
+                self.applied[node] = hello["acked"]
+            if epoch is not None:
+                self.epochs[node] = epoch
+            self._save()
+            stats = self.nodes.setdefault(node, NodeStats())
+            stats.connected = True
+            write_message(writer, ACK, self.applied.get(node, 0))
+            while True:
+                kind, seq, payload = await read_message(reader)
+                if kind != BATCH:
+                    raise ValueError(f"expected BATCH, got message kind {kind}")
+                stats.bytes += HEADER.size + len(payload)
+                async with self._locks.setdefault(node, asyncio.Lock()):
+                    await self._apply(node, stats, seq, payload)
+                write_message(writer, ACK, self.applied[node])
+                await writer.drain()
+        except (
+            OSError,
+            asyncio.IncompleteReadError,
+            ValueError,
+            KeyError,
+            zlib.error,
+        ) as e:
+            if not isinstance(e, asyncio.IncompleteReadError) or e.partial:
+                print(f"Gateway connection from {node or 'unknown node'}: {e!r}")
+        finally:
+            if node in self.nodes:
+                self.nodes[node].connected = False
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _apply(self, node: str, stats: NodeStats, seq: int, payload: bytes):
+        applied = self.applied.get(node, 0)
+        if seq <= applied:
+            stats.duplicates += 1
+            return
+        if applied:
+            stats.lost += seq - applied - 1
+        samples = decode_batch(payload)
+        for channel, t, values in samples:
+            result = self.publish(f"{node}:{channel}", t, values)
+            if asyncio.iscoroutine(result):
+                await result
+        self.applied[node] = seq
+        self._save()
+        stats.batches += 1
+        stats.samples += len(samples)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for writer in list(self.connections):
+                writer.transport.abort()
@@ -0,0 +1,225 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Default histogram bounds in seconds, 100 µs to 10 s
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+Sample = tuple[str, dict[str, str], float]  # name suffix, labels, value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+def _format_value(value: float) -> str:
+    # The exposition format spells these NaN, +Inf and -Inf, not Python's way
+    if math.isnan(value):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    One metric family. Children for each label combination are created on
+    first use by labels() and should be kept by hot paths, so an update is
+    a plain attribute change with no lookup.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        registry: "Registry | None" = None,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.children: dict[tuple[str, ...], Metric] = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self._child()
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Sample]:
+        if not self.labelnames:
+            yield from self._own_samples({})
+            return
+        for key, child in self.children.items():
+            yield from child._own_samples(dict(zip(self.labelnames, key)))
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.value = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _child(self) -> "Counter":
+        child = Counter.__new__(Counter)
+        child.value = 0.0
+        return child
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterable[Sample]:
+        yield "_total", labels, self.value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None
+        super().__init__(*args, **kwargs)
+
+    def _child(self) -> "Gauge":
+        child = Gauge.__new__(Gauge)
+        child.value = 0.0
+        child.function = None
+        return child
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from ``function`` at scrape time instead."""
+        self.function = function
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterable[Sample]:
+        yield "", labels, self.function() if self.function else self.value
+
+
+class Histogram(Metric):
+    """
+    Counts per bucket plus sum and count. Buckets are stored individually
+    and only made cumulative when scraped, so observe() is one bisection
+    and three additions.
+    """
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = BUCKETS, **kwargs) -> None:
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.bounds)
+        self.sum = 0.0
+        self.count = 0
+        super().__init__(*args, **kwargs)
+
+    def _child(self) -> "Histogram":
+        child = Histogram.__new__(Histogram)
+        child.bounds = self.bounds
+        child.counts = [0] * len(self.bounds)
+        child.sum = 0.0
+        child.count = 0
+        return child
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterable[Sample]:
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield "_bucket", {**labels, "le": _format_value(bound)}, total
+        yield "_sum", labels, self.sum
+        yield "_count", labels, self.count
+
+
+class Collector(Metric):
+    """A family whose samples are produced by ``collect()`` at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        collect: Callable[[], Iterable[Sample]],
+        registry: "Registry | None" = None,
+    ) -> None:
+        self.type = type
+        self.collect = collect
+        super().__init__(name, help, registry=registry)
+
+    def samples(self) -> Iterable[Sample]:
+        return self.collect()
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def unregister(self, name: str) -> None:
+        self.metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            # Counter samples carry the _total suffix, and so must their header
+            family = metric.name + ("_total" if metric.type == "counter" else "")
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(
+                    f"{metric.name}{suffix}{_format_labels(labels)} "
+                    f"{_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def monitor_loop_lag(histogram: Histogram, interval: float = 0.1) -> None:
+    """Observe how late the event loop wakes from a fixed sleep."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        histogram.observe(max(time.perf_counter() - started - interval, 0.0))
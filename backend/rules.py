@@ -0,0 +1,461 @@
+import heapq
+import json
+import queue
+import threading
+import urllib.request
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Awaitable, Callable, Iterable, Iterator, NamedTuple
+
+OPS = (">", ">=", "<", "<=")
+KINDS = ("value", "drop", "rise")
+
+
+class Event(NamedTuple):
+    rule: "Rule"
+    state: str  # "firing" or "cleared"
+    t: float
+    value: float  # what the rule compares: the value, or the drop or rise
+
+    def to_dict(self) -> dict:
+        rule = self.rule
+        return {
+            "rule": rule.name,
+            "state": self.state,
+            "channel": rule.channel,
+            "field": rule.field,
+            "kind": rule.kind,
+            "op": rule.op,
+            "threshold": rule.threshold,
+            "value": self.value,
+            "t": self.t,
+        }
+
+
+class Action:
+    """
+    Something a rule does when it fires and when it clears. Actions with
+    ``once`` set have effects outside this process (GPIO, webhooks), so
+    only the acquiring worker runs them.
+    """
+
+    once = False
+
+    def __call__(self, event: Event) -> Awaitable[None] | None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class Rule:
+    """
+    One declarative rule over a channel's field, e.g.
+
+        {"channel": "bmp280", "field": "temperature", "op": ">",
+         "threshold": 30, "for": 60}
+        {"channel": "bmp280", "field": "pressure", "kind": "drop",
+         "op": ">", "threshold": 2, "within": 1800}
+        {"channel": "hcsr04", "field": "distance", "op": "<", "threshold": 20}
+
+    ``kind`` "value" compares the value itself, "drop" the fall from the
+    highest value of the last ``within`` seconds and "rise" the climb from
+    the lowest. The rule fires once its condition has held for ``for``
+    seconds and clears as soon as it stops holding.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        field: str,
+        op: str,
+        threshold: float,
+        kind: str = "value",
+        within: float = 0.0,
+        duration: float = 0.0,
+        actions: Iterable[Action] = (),
+        name: str | None = None,
+    ) -> None:
+        if op not in OPS:
+            raise ValueError(f"Unknown operator {op!r}, expected one of {OPS}")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown rule kind {kind!r}, expected one of {KINDS}")
+        if kind != "value" and within <= 0:
+            raise ValueError(f"A {kind} rule needs a positive 'within' window")
+        self.channel = channel
+        self.field = field
+        self.op = op
+        self.threshold = float(threshold)
+        self.kind = kind
+        self.within = float(within) if kind != "value" else 0.0
+        self.duration = float(duration)
+        self.actions = list(actions)
+        if name is None:
+            change = "" if kind == "value" else f"{kind} "
+            name = f"{channel}.{field} {change}{op} {threshold:g}"
+        self.name = name
+        self.condition = False
+        self.active = False
+        self.generation = 0  # bumped on every change, to cancel stale timers
+        self.quantity: Quantity | None = None
+
+    @classmethod
+    def from_spec(cls, spec: dict, actions: Iterable[Action] = ()) -> "Rule":
+        options = dict(spec)
+        options.pop("actions", None)
+        options["duration"] = options.pop("for", 0.0)
+        return cls(**options, actions=actions)
+
+
+class Extreme:
+    """
+    Running maximum (or minimum) of the last ``within`` seconds.
+
+    A monotonic deque keeps only samples that could still be the extreme:
+    each sample is pushed once and popped at most once, so an update costs
+    O(1) amortized however long the window is.
+    """
+
+    def __init__(self, within: float, largest: bool = True) -> None:
+        self.within = within
+        self.sign = 1.0 if largest else -1.0
+        self.window: deque[tuple[float, float]] = deque()
+
+    def update(self, t: float, value: float) -> float:
+        window = self.window
+        key = self.sign * value
+        while window and window[-1][1] <= key:
+            window.pop()
+        window.append((t, key))
+        while window[0][0] < t - self.within:
+            window.popleft()
+        return self.sign * window[0][1]
+
+
+class Thresholds:
+    """
+    The rules over one quantity, sorted by threshold per operator.
+
+    For ">" and ">=" the rules whose condition holds are a prefix of the
+    sorted list and for "<" and "<=" a suffix, so a new value only moves
+    a boundary: bisection finds it and exactly the rules between the old
+    and the new boundary change state.
+    """
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.lists: list[tuple[str, list[float], list[Rule], int]] = []
+        for op in OPS:
+            ordered = sorted(
+                (rule for rule in rules if rule.op == op), key=lambda r: r.threshold
+            )
+            if ordered:
+                boundary = 0 if op[0] == ">" else len(ordered)
+                self.lists.append(
+                    (op, [rule.threshold for rule in ordered], ordered, boundary)
+                )
+
+    def update(self, q: float) -> Iterator[tuple[Rule, bool]]:
+        for i, (op, thresholds, rules, old) in enumerate(self.lists):
+            if op == ">":
+                new = bisect_left(thresholds, q)  # threshold < q
+            elif op == ">=":
+                new = bisect_right(thresholds, q)
+            elif op == "<":
+                new = bisect_right(thresholds, q)  # threshold > q
+            else:
+                new = bisect_left(thresholds, q)
+            if new == old:
+                continue
+            self.lists[i] = (op, thresholds, rules, new)
+            rising = new > old
+            holds = rising if op[0] == ">" else not rising
+            for rule in rules[min(old, new) : max(old, new)]:
+                yield rule, holds
+
+
+class Quantity:
+    """What a group of rules compares: a field, or its drop or rise."""
+
+    def __init__(self, field: str, kind: str, within: float, rules: list[Rule]):
+        self.field = field
+        self.kind = kind
+        self.extreme = (
+            Extreme(within, largest=kind == "drop") if kind != "value" else None
+        )
+        self.thresholds = Thresholds(rules)
+        self.last = 0.0
+        for rule in rules:
+            rule.quantity = self
+
+    def measure(self, t: float, value: float) -> float:
+        if self.kind == "value":
+            q = value
+        elif self.kind == "drop":
+            q = self.extreme.update(t, value) - value
+        else:
+            q = value - self.extreme.update(t, value)
+        self.last = q
+        return q
+
+
+class RuleEngine:
+    """
+    Description:
+    Evaluates rules incrementally on the live sample stream.
+
+    Rules over the same channel, field, kind and window share one
+    Quantity, so a sample costs one window update per distinct quantity
+    plus a bisection per operator, and only rules whose condition changes
+    are touched; cost grows with the rules that change state, not with the
+    rules defined. Rules with a ``for`` duration arm a timer when their
+    condition starts to hold; tick() fires the timers that came due.
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules = list(rules)
+        groups: dict[tuple, list[Rule]] = {}
+        for rule in self.rules:
+            key = (rule.channel, rule.field, rule.kind, rule.within)
+            groups.setdefault(key, []).append(rule)
+        self.quantities: dict[str, list[Quantity]] = {}
+        for (channel, field, kind, within), rules in groups.items():
+            self.quantities.setdefault(channel, []).append(
+                Quantity(field, kind, within, rules)
+            )
+        self._timers: list[tuple[float, int, int, Rule]] = []
+        self._order = 0  # heap tie-breaker
+        self.evaluated = 0  # quantity updates
+        self.changes = 0  # condition changes
+
+    def update(
+        self, channel: str, t: float, values: dict[str, float | None]
+    ) -> list[Event]:
+        quantities = self.quantities.get(channel)
+        events = self.tick(t) if self._timers else []
+        if quantities is None:
+            return events
+        for quantity in quantities:
+            value = values.get(quantity.field)
+            if value is None:
+                continue
+            self.evaluated += 1
+            q = quantity.measure(t, value)
+            for rule, holds in quantity.thresholds.update(q):
+                self._change(rule, holds, t, q, events)
+        return events
+
+    def _change(
+        self, rule: Rule, holds: bool, t: float, q: float, events: list[Event]
+    ) -> None:
+        self.changes += 1
+        rule.condition = holds
+        rule.generation += 1
+        if holds:
+            if rule.duration > 0:
+                self._order += 1
+                heapq.heappush(
+                    self._timers,
+                    (t + rule.duration, self._order, rule.generation, rule),
+                )
+            else:
+                rule.active = True
+                events.append(Event(rule, "firing", t, q))
+        elif rule.active:
+            rule.active = False
+            events.append(Event(rule, "cleared", t, q))
+
+    def tick(self, now: float) -> list[Event]:
+        """Fire rules whose condition has now held for their duration."""
+        events = []
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            due, _, generation, rule = heapq.heappop(timers)
+            # A later change bumped the generation; that timer is stale
+            if generation == rule.generation and rule.condition:
+                rule.active = True
+                events.append(Event(rule, "firing", due, rule.quantity.last))
+        return events
+
+    @property
+    def active(self) -> list[Rule]:
+        return [rule for rule in self.rules if rule.active]
+
+    def close(self) -> None:
+        for action in {id(a): a for rule in self.rules for a in rule.actions}.values():
+            action.close()
+
+
+# Actions
+
+
+class Alert(Action):
+    """Emit an ``alert`` event, e.g. to Socket.IO clients."""
+
+    def __init__(self, emit: Callable[[str, dict], Awaitable[None] | None]) -> None:
+        self.emit = emit
+
+    def __call__(self, event: Event) -> Awaitable[None] | None:
+        return self.emit("alert", event.to_dict())
+
+
+PATTERNS = {
+    "on": None,
+    "blink": (0.5, 0.5),  # on, off seconds
+    "fast": (0.1, 0.1),
+    "flash": (0.05, 1.95),
+}
+
+
+class LEDs:
+    """
+    gpiozero LEDs by pin, opened on first use with the current backend's
+    pin factory. Patterns run on gpiozero's background thread, so nothing
+    here blocks. A pin shows the pattern of the latest rule firing on it
+    and goes dark once none is.
+    """
+
+    def __init__(self) -> None:
+        self.leds: dict[int, object] = {}
+        self.firing: dict[int, dict[str, str]] = {}  # pin: rule name to pattern
+
+    def _led(self, pin: int):
+        led = self.leds.get(pin)
+        if led is None:
+            from gpiozero import LED
+
+            from sensors.backend import current
+
+            led = self.leds[pin] = LED(pin, pin_factory=current().pin_factory())
+        return led
+
+    def _show(self, led, pattern: str) -> None:
+        timing = PATTERNS[pattern]
+        if timing is None:
+            led.on()
+        else:
+            led.blink(on_time=timing[0], off_time=timing[1], background=True)
+
+    def show(self, pin: int, rule: str, pattern: str) -> None:
+        firing = self.firing.setdefault(pin, {})
+        firing.pop(rule, None)
+        firing[rule] = pattern
+        self._show(self._led(pin), pattern)
+
+    def clear(self, pin: int, rule: str) -> None:
+        firing = self.firing.get(pin, {})
+        if firing.pop(rule, None) is None:
+            return
+        led = self._led(pin)
+        if firing:
+            self._show(led, next(reversed(firing.values())))
+        else:
+            led.off()
+
+    def close(self) -> None:
+        for led in self.leds.values():
+            led.close()
+        self.leds.clear()
+        self.firing.clear()
+
+
+class LEDPattern(Action):
+    once = True
+
+    def __init__(self, leds: LEDs, pin: int, pattern: str = "blink") -> None:
+        if pattern not in PATTERNS:
+            raise ValueError(
+                f"Unknown LED pattern {pattern!r}, expected {list(PATTERNS)}"
+            )
+        self.leds = leds
+        self.pin = pin
+        self.pattern = pattern
+
+    def __call__(self, event: Event) -> None:
+        if event.state == "firing":
+            self.leds.show(self.pin, event.rule.name, self.pattern)
+        else:
+            self.leds.clear(self.pin, event.rule.name)
+
+    def close(self) -> None:
+        self.leds.close()
+
+
+class Webhook(Action):
+    """
+    POST each event as JSON to ``url`` from a background thread, so a slow
+    receiver never stalls the event loop. At most ``max_pending`` events
+    wait; beyond that new ones are dropped and counted.
+    """
+
+    once = True
+
+    def __init__(self, url: str, timeout: float = 2.0, max_pending: int = 100) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.queue: queue.Queue = queue.Queue(max_pending)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="webhook", daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(json.dumps(event.to_dict()).encode())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            body = self.queue.get()
+            if body is None:
+                return
+            request = urllib.request.Request(
+                self.url, body, {"Content-Type": "application/json"}
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    self.sent += 1
+            except OSError as e:
+                self.failed += 1
+                print(f"Webhook {self.url} failed: {e}")
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self._thread.join(self.timeout)
+
+
+def build_rules(
+    specs: Iterable[dict],
+    alert: Callable[[str, dict], Awaitable[None] | None] | None = None,
+) -> RuleEngine:
+    """
+    A RuleEngine from rule specs whose ``actions`` are "alert" or tables
+    like {"type": "led", "pin": 17, "pattern": "blink"} and
+    {"type": "webhook", "url": "http://localhost:9000/alerts"}. Alerts go
+    to ``alert(event_name, data)``; without it they are left out.
+    """
+    leds = LEDs()
+    webhooks: dict[str, Webhook] = {}
+    rules = []
+    for spec in specs:
+        actions: list[Action] = []
+        for action in spec.get("actions", ()):
+            if isinstance(action, str):
+                action = {"type": action}
+            options = dict(action)
+            kind = options.pop("type")
+            if kind == "alert":
+                if alert is not None:
+                    actions.append(Alert(alert))
+            elif kind == "led":
+                actions.append(LEDPattern(leds, **options))
+            elif kind == "webhook":
+                url = options["url"]
+                if url not in webhooks:
+                    webhooks[url] = Webhook(**options)
+                actions.append(webhooks[url])
+            else:
+                raise ValueError(f"Unknown action type {kind!r}")
+        rules.append(Rule.from_spec(spec, actions))
+    return RuleEngine(rules)
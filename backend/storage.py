@@ -0,0 +1,287 @@
+import asyncio
+import json
+import mmap
+import os
+import time
+from typing import Awaitable, Callable, Iterator
+
+import numpy as np
+
+SEGMENT_RECORDS = 1 << 20  # about 24 MB per segment for two fields
+FLUSH_RECORDS = 256
+FLUSH_INTERVAL = 1.0  # s
+
+
+def record_dtype(fields: list[str]) -> np.dtype:
+    """Little-endian int64 nanosecond timestamp followed by float64 fields."""
+    return np.dtype([("t", "<i8")] + [(field, "<f8") for field in fields])
+
+
+class Segment:
+    """One append-only file of fixed-width records, read through mmap."""
+
+    def __init__(self, path: str, dtype: np.dtype) -> None:
+        self.path = path
+        self.dtype = dtype
+        self.first_t = int(os.path.basename(path).split(".")[0])
+        self._map: mmap.mmap | None = None
+        self._mapped_size = 0
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path) // self.dtype.itemsize
+
+    def records(self) -> np.ndarray:
+        """Zero-copy view of every complete record in the file."""
+        size = self.size * self.dtype.itemsize
+        if size == 0:
+            return np.empty(0, self.dtype)
+        if self._map is None or size != self._mapped_size:
+            self.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return np.frombuffer(self._map, dtype=self.dtype)
+
+    def close(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; let the GC unmap it later
+                pass
+            self._map = None
+
+
+class SampleLog:
+    """
+    Append-only on-disk log for one channel.
+
+    Records are buffered and written in batches, every ``flush_records``
+    samples or ``flush_interval`` seconds, with one fsync per batch. The
+    interval is checked on every append; a channel sampled more slowly
+    than that relies on its owner calling flush_if_due() on a timer. A crash
+    loses at most the unflushed batch; a torn final record is trimmed on
+    open. Segments rotate after ``segment_records`` records and the oldest
+    are deleted beyond ``retention`` seconds or ``max_segments`` files.
+
+    With ``readonly`` the log only reads, e.g. to follow a log another
+    process is writing; refresh() picks up segments created since.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fields: list[str] | None = None,
+        segment_records: int = SEGMENT_RECORDS,
+        flush_records: int = FLUSH_RECORDS,
+        flush_interval: float = FLUSH_INTERVAL,
+        retention: float | None = None,
+        max_segments: int | None = None,
+        fsync: bool = True,
+        readonly: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                stored = json.load(f)["fields"]
+            if fields is not None and list(fields) != stored:
+                raise ValueError(f"{directory} stores fields {stored}, not {fields}")
+            fields = stored
+        elif fields is None or readonly:
+            raise ValueError(f"{directory} is not a sample log; fields are required")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"fields": list(fields)}, f)
+        self.fields = list(fields)
+        self.dtype = record_dtype(self.fields)
+        self.segment_records = segment_records
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.max_segments = max_segments
+        self.fsync = fsync
+
+        self.segments: list[Segment] = []
+        self.refresh()
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._written = 0  # flushed records in the active segment
+        self._last_flush = time.monotonic()
+        self._file = None
+        if self.segments and not readonly:
+            self._recover(self.segments[-1])
+
+    def refresh(self) -> None:
+        """Sync the segment list with the directory."""
+        names = sorted(
+            name for name in os.listdir(self.directory) if name.endswith(".seg")
+        )
+        known = {os.path.basename(segment.path): segment for segment in self.segments}
+        for segment in self.segments:
+            if os.path.basename(segment.path) not in names:
+                segment.close()
+        self.segments = [
+            known.get(name) or Segment(os.path.join(self.directory, name), self.dtype)
+            for name in names
+        ]
+
+    def _recover(self, segment: Segment) -> None:
+        itemsize = self.dtype.itemsize
+        size = os.path.getsize(segment.path)
+        if size % itemsize:
+            with open(segment.path, "r+b") as f:
+                f.truncate(size - size % itemsize)
+        if segment.size < self.segment_records:
+            self._file = open(segment.path, "ab")
+            self._written = segment.size
+
+    def _rotate(self, first_t: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{first_t:020d}.seg")
+        self._file = open(path, "ab")
+        self._written = 0
+        self.segments.append(Segment(path, self.dtype))
+        self._expire(first_t)
+
+    def _expire(self, now_t: int) -> None:
+        horizon = None if self.retention is None else now_t - int(self.retention * 1e9)
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            too_many = self.max_segments and len(self.segments) > self.max_segments
+            # A segment expires once the one after it starts past the horizon
+            too_old = horizon is not None and self.segments[1].first_t < horizon
+            if not (too_many or too_old):
+                break
+            oldest.close()
+            os.remove(oldest.path)
+            self.segments.pop(0)
+
+    def append(self, t: float, values: dict[str, float | None]) -> None:
+        """Buffer one sample; ``t`` is in epoch seconds."""
+        t_ns = int(t * 1e9)
+        record = np.zeros(1, self.dtype)
+        record["t"] = t_ns
+        for field in self.fields:
+            value = values.get(field)
+            record[field] = np.nan if value is None else value
+        self._append_bytes(record.tobytes(), 1, t_ns)
+
+    def append_many(self, records: np.ndarray) -> None:
+        """Bulk append an array already in this log's record dtype."""
+        records = np.ascontiguousarray(records, dtype=self.dtype)
+        while len(records):
+            room = self.segment_records - self._active_size()
+            if room <= 0:
+                self.flush()
+                self._rotate(int(records["t"][0]))
+                room = self.segment_records
+            chunk, records = records[:room], records[room:]
+            self._append_bytes(chunk.tobytes(), len(chunk), int(chunk["t"][0]))
+
+    def _active_size(self) -> int:
+        if self._file is None:
+            return self.segment_records
+        return self._written + self._buffered
+
+    def _append_bytes(self, data: bytes, count: int, first_t: int) -> None:
+        if self.readonly:
+            raise OSError(f"{self.directory} is open read-only")
+        if self._active_size() + count > self.segment_records:
+            self.flush()
+            self._rotate(first_t)
+        self._buffer += data
+        self._buffered += count
+        if self._buffered >= self.flush_records:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Flush if ``flush_interval`` has passed since the last flush."""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        self._file.write(self._buffer)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._buffer.clear()
+        self._written += self._buffered
+        self._buffered = 0
+
+    def iter_range(self, start: float, end: float) -> Iterator[np.ndarray]:
+        """Zero-copy views, one per segment, of records with start <= t < end."""
+        start_ns, end_ns = int(start * 1e9), int(end * 1e9)
+        for i, segment in enumerate(self.segments):
+            if segment.first_t >= end_ns:
+                break
+            if i + 1 < len(self.segments) and self.segments[i + 1].first_t <= start_ns:
+                continue
+            records = segment.records()
+            t = records["t"]
+            lo = np.searchsorted(t, start_ns, side="left")
+            hi = np.searchsorted(t, end_ns, side="left")
+            if hi > lo:
+                yield records[lo:hi]
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        """Records in [start, end); a view when they sit in one segment."""
+        views = list(self.iter_range(start, end))
+        if len(views) == 1:
+            return views[0]
+        if not views:
+            return np.empty(0, self.dtype)
+        return np.concatenate(views)
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for segment in self.segments:
+            segment.close()
+
+
+async def replay(
+    log: SampleLog,
+    channel: str,
+    publish: Callable[[str, float, dict[str, float | None]], Awaitable[None] | None],
+    start: float = 0.0,
+    end: float = float("inf"),
+    speed: float = 1.0,
+    loop: bool = False,
+) -> None:
+    """
+    Feed stored samples to ``publish`` with their original spacing divided by
+    ``speed``, re-stamped to the current time so clients see them as live.
+    """
+    while True:
+        first_t = None
+        began = time.monotonic()
+        for records in log.iter_range(start, min(end, 2**62 / 1e9)):
+            for record in records:
+                t = int(record["t"]) / 1e9
+                if first_t is None:
+                    first_t = t
+                delay = began + (t - first_t) / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                values = {
+                    field: None if np.isnan(record[field]) else float(record[field])
+                    for field in log.fields
+                }
+                result = publish(channel, time.time(), values)
+                if asyncio.iscoroutine(result):
+                    await result
+        if not loop or first_t is None:
+            return
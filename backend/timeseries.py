@@ -0,0 +1,227 @@
+import math
+from array import array
+from bisect import bisect_left
+
+# Default retention per tier: (bucket width in seconds, number of buckets)
+TIERS = ((1.0, 86400), (60.0, 30 * 1440), (3600.0, 365 * 24))
+RAW_CAPACITY = 36000  # one hour at 10 Hz
+
+
+class Ring:
+    """
+    Fixed-capacity columns of doubles sharing one write position.
+
+    Column 0 holds timestamps, which must be appended in increasing order so
+    ranges can be found by bisection.
+    """
+
+    def __init__(self, capacity: int, columns: int) -> None:
+        self.capacity = capacity
+        self.columns = [array("d", bytes(8 * capacity)) for _ in range(columns)]
+        self.head = 0  # next write position
+        self.count = 0
+
+    def append(self, row) -> None:
+        for column, value in zip(self.columns, row):
+            column[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> float:
+        # Logical index into the timestamp column, oldest first
+        return self.columns[0][(self.head - self.count + index) % self.capacity]
+
+    def span(self, start: float, end: float) -> range:
+        return range(bisect_left(self, start), bisect_left(self, end))
+
+    def column(self, column: int, indexes: range) -> list[float]:
+        values = self.columns[column]
+        offset = self.head - self.count
+        return [values[(offset + i) % self.capacity] for i in indexes]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+
+class Tier:
+    """
+    Pre-aggregated buckets of one width: per field min, max, sum and count.
+
+    Buckets are accumulated while open and written to the ring when the
+    first sample of a later bucket arrives; closed buckets are handed to the
+    next coarser tier.
+    """
+
+    def __init__(self, width: float, capacity: int, fields: int) -> None:
+        self.width = width
+        self.fields = fields
+        # t, then min/max/sum/count per field
+        self.ring = Ring(capacity, 1 + 4 * fields)
+        self.open_t: float | None = None
+        self.open: list[float] = []
+
+    def _reset(self, bucket_t: float) -> None:
+        self.open_t = bucket_t
+        self.open = [math.inf, -math.inf, 0.0, 0.0] * self.fields
+
+    def add(self, t: float, stats: list[float]) -> list[float] | None:
+        """Merge per-field (min, max, sum, count) stats; returns the bucket
+        that was closed by this call, if any."""
+        bucket_t = math.floor(t / self.width) * self.width
+        closed = None
+        if self.open_t != bucket_t:
+            if self.open_t is not None:
+                closed = [self.open_t, *self.open]
+                self.ring.append(closed)
+            self._reset(bucket_t)
+        acc = self.open
+        for i in range(0, 4 * self.fields, 4):
+            if stats[i + 3]:
+                acc[i] = min(acc[i], stats[i])
+                acc[i + 1] = max(acc[i + 1], stats[i + 1])
+                acc[i + 2] += stats[i + 2]
+                acc[i + 3] += stats[i + 3]
+        return closed
+
+
+class Series:
+    """Raw samples plus aggregate tiers for one channel."""
+
+    def __init__(
+        self,
+        fields: list[str],
+        raw_capacity: int = RAW_CAPACITY,
+        tiers: tuple[tuple[float, int], ...] = TIERS,
+    ) -> None:
+        self.fields = list(fields)
+        self.raw = Ring(raw_capacity, 1 + len(self.fields))
+        self.tiers = [
+            Tier(width, capacity, len(self.fields)) for width, capacity in tiers
+        ]
+
+    def append(self, t: float, values: dict[str, float | None]) -> None:
+        row = [values.get(field) for field in self.fields]
+        row = [math.nan if value is None else float(value) for value in row]
+        self.raw.append([t, *row])
+        stats: list[float] = []
+        for value in row:
+            if math.isnan(value):
+                stats += (math.inf, -math.inf, 0.0, 0.0)
+            else:
+                stats += (value, value, value, 1.0)
+        for tier in self.tiers:
+            closed = tier.add(t, stats)
+            if closed is None:
+                break
+            t, stats = closed[0], closed[1:]
+
+    def query(self, start: float, end: float, resolution: float = 0.0) -> dict:
+        """
+        Samples in [start, end) at roughly ``resolution`` seconds per point.
+
+        Resolutions below the finest tier return raw samples; otherwise the
+        coarsest tier no wider than the resolution is read and its buckets
+        merged into resolution-sized bins, so cost scales with the number of
+        points returned rather than the raw samples covered. The newest bin
+        is partial, and includes the samples of every still-open bucket.
+        """
+        finer = [candidate for candidate in self.tiers if candidate.width <= resolution]
+        if not finer:
+            indexes = self.raw.span(start, end)
+            result = {"resolution": 0.0, "t": self.raw.column(0, indexes)}
+            for i, field in enumerate(self.fields):
+                # Gaps are stored as NaN, which JSON cannot carry
+                result[field] = [
+                    None if math.isnan(value) else value
+                    for value in self.raw.column(i + 1, indexes)
+                ]
+            return result
+
+        tier = finer[-1]
+        indexes = tier.ring.span(start, end)
+        times = tier.ring.column(0, indexes)
+        columns = [
+            tier.ring.column(c, indexes) for c in range(1, 1 + 4 * len(self.fields))
+        ]
+        # Samples since the last closed bucket sit in the open buckets: this
+        # tier's, and those of the finer tiers that have not been handed on
+        # yet. Each holds different samples, so all of them are merged in.
+        for open_tier in finer:
+            if open_tier.open_t is not None and start <= open_tier.open_t < end:
+                times.append(open_tier.open_t)
+                for column, value in zip(columns, open_tier.open):
+                    column.append(value)
+
+        width = max(resolution, tier.width)
+        bins: dict[float, list[float]] = {}
+        for row, t in enumerate(times):
+            acc = bins.get(math.floor(t / width) * width)
+            if acc is None:
+                acc = [math.inf, -math.inf, 0.0, 0.0] * len(self.fields)
+                bins[math.floor(t / width) * width] = acc
+            for i in range(0, len(columns), 4):
+                if columns[i + 3][row]:
+                    acc[i] = min(acc[i], columns[i][row])
+                    acc[i + 1] = max(acc[i + 1], columns[i + 1][row])
+                    acc[i + 2] += columns[i + 2][row]
+                    acc[i + 3] += columns[i + 3][row]
+
+        result = {"resolution": width, "t": list(bins)}
+        for f, field in enumerate(self.fields):
+            i = 4 * f
+            stats = [acc[i : i + 4] for acc in bins.values()]
+            result[field] = {
+                "min": [lo if n else None for lo, _, _, n in stats],
+                "max": [hi if n else None for _, hi, _, n in stats],
+                "mean": [total / n if n else None for _, _, total, n in stats],
+            }
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + sum(tier.ring.nbytes for tier in self.tiers)
+
+
+class TimeSeriesStore:
+    """
+    Bounded in-memory history for every channel.
+
+    Memory is allocated up front and never grows. Per channel with F fields:
+    the raw ring takes ``8 * (1 + F) * raw_capacity`` bytes and each tier
+    ``8 * (1 + 4F) * capacity``. With the defaults and the two BMP280 fields
+    that is 0.86 MB of raw samples plus 6.2 MB per retained day at 1 s,
+    3.1 MB per 30 days at 1 min and 0.63 MB per year at 1 h — about 11 MB
+    per channel in total.
+    """
+
+    def __init__(
+        self,
+        raw_capacity: int = RAW_CAPACITY,
+        tiers: tuple[tuple[float, int], ...] = TIERS,
+    ) -> None:
+        self.raw_capacity = raw_capacity
+        self.tiers = tiers
+        self.series: dict[str, Series] = {}
+
+    def append(self, channel: str, t: float, values: dict[str, float | None]) -> None:
+        series = self.series.get(channel)
+        if series is None:
+            series = Series(list(values), self.raw_capacity, self.tiers)
+            self.series[channel] = series
+        series.append(t, values)
+
+    def query(
+        self, channel: str, start: float, end: float, resolution: float = 0.0
+    ) -> dict:
+        series = self.series.get(channel)
+        if series is None:
+            raise KeyError(channel)
+        return {"channel": channel, **series.query(start, end, resolution)}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self.series.values())
@@ -0,0 +1,239 @@
+"""
+Adaptive sample rates: replay full-rate traces through AdaptiveRate, keep
+only the samples it asks for and rebuild the trace by linear interpolation,
+reporting samples saved against reconstruction error (and against a fixed
+rate with the same number of samples). Then run the engine on the simulated
+BMP280 with and without adaptation and compare reads, bus transactions and
+CPU.
+
+Run with: python -m benchmarks.adaptive [data_dir]
+With a data_dir the channels recorded there are replayed as well.
+"""
+
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from sensors import backend
+from sensors.adaptive import AdaptiveRate
+from sensors.bmp280 import BMP280Driver
+from sensors.ds18b20 import DS18B20Driver
+from sensors.engine import build_engine
+from sensors.sim import Target, Weather, WeatherBMP280
+from sensors.ultrasonic import UltrasonicDriver
+
+START = 1_700_000_000.0  # simulated epoch seconds
+SCALES = (0.5, 1, 2, 4)  # of the drivers' default tolerances
+TOLERANCES = {
+    "bmp280": BMP280Driver.tolerance,
+    "ds18b20": DS18B20Driver.tolerance,
+    "hcsr04": UltrasonicDriver.tolerance,
+    "ultrasonic": UltrasonicDriver.tolerance,
+}
+
+
+class Clock:
+    def __init__(self, t: float) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def window(t: float, opened: float) -> float:
+    """°C a room loses when a window is open for 20 minutes from ``opened``."""
+    if t < opened:
+        return 0.0
+    if t < opened + 1200:
+        return -3 * (1 - math.exp(-(t - opened) / 120))
+    return -3 * math.exp(-(t - opened - 1200) / 600)
+
+
+def bmp280_trace(
+    hours: float = 24.0, seed: int = 0, indoor: bool = False
+) -> tuple[np.ndarray, dict]:
+    """
+    1 Hz over a simulated day at x2/x16 noise. Outdoors is the simulation's
+    Weather, whose drift is rough on every time scale; indoors is a steady
+    room whose windows open at 08:00 and 14:00.
+    """
+    rng = random.Random(seed)
+    weather = Weather(seed, clock=Clock(START))
+    times = START + np.arange(int(hours * 3600), dtype=float)
+    temperature = np.empty(len(times))
+    pressure = np.empty(len(times))
+    for i, t in enumerate(times):
+        if indoor:
+            hour = (t - START) / 3600
+            temperature[i] = 21 + 0.5 * math.cos(2 * math.pi * (hour - 15) / 24)
+            temperature[i] += window(t, START + 8 * 3600) + window(t, START + 14 * 3600)
+            pressure[i] = 1013.25 + math.cos(4 * math.pi * (hour - 10) / 24)
+        else:
+            temperature[i], pressure[i] = weather.at(t)
+        temperature[i] += rng.gauss(0, WeatherBMP280.T_NOISE / math.sqrt(2))
+        pressure[i] += rng.gauss(0, WeatherBMP280.P_NOISE / 4)
+    return times, {"temperature": temperature, "pressure": pressure}
+
+
+def hcsr04_trace(hours: float = 1.0, seed: int = 0) -> tuple[np.ndarray, dict]:
+    """10 Hz of a swaying wall with people walking past, echoes dropped now and then."""
+    clock = Clock(START)
+    target = Target(Weather(seed, clock=clock), seed=seed)
+    times = START + np.arange(int(hours * 36000), dtype=float) / 10
+    distance = np.empty(len(times))
+    for i, t in enumerate(times):
+        clock.t = t
+        value = target()
+        distance[i] = np.nan if value is None else value
+    return times, {"distance": distance}
+
+
+def logged_traces(data_dir: str) -> dict[str, tuple[np.ndarray, dict]]:
+    from backend.storage import SampleLog
+
+    traces = {}
+    for name in sorted(os.listdir(data_dir)):
+        if not os.path.exists(os.path.join(data_dir, name, "meta.json")):
+            continue
+        log = SampleLog(os.path.join(data_dir, name), readonly=True)
+        records = np.array(log.range(0, 2**62 / 1e9))
+        log.close()
+        if len(records) > 2:
+            fields = {field: records[field] for field in log.fields}
+            traces[name] = (records["t"] / 1e9, fields)
+    return traces
+
+
+def replay(times: np.ndarray, fields: dict, controller: AdaptiveRate) -> np.ndarray:
+    """Indices of the samples the controller would have taken."""
+    kept = []
+    i = 0
+    while i < len(times):
+        kept.append(i)
+        values = {
+            field: None if math.isnan(series[i]) else float(series[i])
+            for field, series in fields.items()
+        }
+        period = controller.update(float(times[i]), values)
+        # The next recorded sample at or after the chosen time
+        i = max(int(np.searchsorted(times, times[i] + period - 1e-9)), i + 1)
+    return np.array(kept)
+
+
+def errors(times: np.ndarray, series: np.ndarray, kept: np.ndarray) -> np.ndarray:
+    """Linear-interpolation error at every recorded point, gaps left out."""
+    kept = kept[~np.isnan(series[kept])]
+    rebuilt = np.interp(times, times[kept], series[kept])
+    valid = ~np.isnan(series)
+    return np.abs(rebuilt[valid] - series[valid])
+
+
+def report(
+    name: str,
+    times: np.ndarray,
+    fields: dict,
+    bounds: tuple[float, float],
+    tolerance: dict[str, float],
+) -> None:
+    print(
+        f"{name}: {len(times)} samples, period {bounds[0]:g}-{bounds[1]:g} s; "
+        "interpolation error, adaptive vs a fixed rate with as many samples"
+    )
+    for scale in SCALES:
+        scaled = {field: value * scale for field, value in tolerance.items()}
+        controller = AdaptiveRate(*bounds, scaled)
+        kept = replay(times, fields, controller)
+        fixed = np.linspace(0, len(times) - 1, len(kept)).round().astype(int)
+        parts = []
+        for field, series in fields.items():
+            limit = controller.tolerance_for(field)
+            if not limit:
+                continue
+            adaptive = errors(times, series, kept)
+            uniform = errors(times, series, fixed)
+            parts.append(
+                f"{field} ±{limit:g}: rms {np.sqrt(np.mean(adaptive**2)):.3f} "
+                f"max {adaptive.max():.2f}, {np.mean(adaptive > limit):.1%} beyond "
+                f"(fixed {np.sqrt(np.mean(uniform**2)):.3f} / {uniform.max():.2f} / "
+                f"{np.mean(uniform > limit):.1%})"
+            )
+        print(
+            f"  tolerance x{scale:<4g} {1 - len(kept) / len(times):6.1%} saved | "
+            + " | ".join(parts)
+        )
+
+
+async def engine(adaptive: bool, seconds: float, speedup: float) -> dict:
+    backend.select("sim", seed=0, speedup=speedup)
+    spec = {"driver": "bmp280", "period": 0.1}
+    if adaptive:
+        spec["adaptive"] = {"min_period": 0.1, "max_period": 30.0}
+    periods = []
+
+    def on_reading(reading) -> None:
+        periods.append(acquisition.drivers[0].period * speedup)
+
+    acquisition = build_engine([spec], on_reading=on_reading, speedup=speedup)
+    bus = backend.current()._handles[1]
+    cpu = time.process_time()
+    task = asyncio.create_task(acquisition.run())
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        task.cancel()
+        cpu = time.process_time() - cpu
+        profile = acquisition.drivers[0].profile
+        acquisition.close()
+        backend.current().close()
+    return {
+        "reads": acquisition.counts["bmp280"],
+        "transactions": bus.transactions,
+        "cpu": cpu / seconds,
+        "periods": periods,
+        "profile": profile,
+    }
+
+
+def main() -> None:
+    for indoor, name in ((True, "indoors"), (False, "outdoors")):
+        report(
+            f"bmp280 {name}, 24 h at 1 Hz",
+            *bmp280_trace(indoor=indoor),
+            (1.0, 60.0),
+            BMP280Driver.tolerance,
+        )
+    report(
+        "hcsr04, 1 h at 10 Hz", *hcsr04_trace(), (0.1, 5.0), UltrasonicDriver.tolerance
+    )
+    if len(sys.argv) > 1:
+        for name, (times, fields) in logged_traces(sys.argv[1]).items():
+            tolerance = TOLERANCES.get(name.rsplit(":", 1)[-1])
+            if tolerance is None:
+                print(f"{name}: skipped, no tolerance for this channel")
+                continue
+            step = float(np.median(np.diff(times)))
+            report(name, times, fields, (step, step * 60), tolerance)
+
+    seconds, speedup = 3.0, 100.0
+    fixed = asyncio.run(engine(False, seconds, speedup))
+    adaptive = asyncio.run(engine(True, seconds, speedup))
+    periods = adaptive["periods"]
+    print(
+        f"engine, {seconds * speedup:.0f} simulated s: fixed 0.1 s period "
+        f"{fixed['reads']} reads, {fixed['transactions']} transactions, "
+        f"CPU {fixed['cpu']:.1%} | adaptive {adaptive['reads']} reads, "
+        f"{adaptive['transactions']} transactions, CPU {adaptive['cpu']:.1%}; "
+        f"period {min(periods):.2f}-{max(periods):.1f} s, now "
+        f"{periods[-1]:.1f} s with {adaptive['profile'].osrs_t}/"
+        f"{adaptive['profile'].osrs_p} oversampling"
+    )
+    assert adaptive["reads"] < fixed["reads"]
+
+
+if __name__ == "__main__":
+    main()
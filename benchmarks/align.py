@@ -0,0 +1,205 @@
+"""
+Cross-sensor alignment: accuracy of the resampled values, agreement between
+the live and logged paths, the latency and memory bounds when a sensor goes
+quiet, push throughput, and the fused channel over the simulated sensors.
+
+Run with: python -m benchmarks.align [seconds]
+"""
+
+import asyncio
+import math
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from backend.align import Aligner, Timebase, align_logs
+from backend.storage import SampleLog
+from sensors import backend
+from sensors.engine import build_engine
+
+T0 = 1_700_000_000 * 10**9
+PERIOD = 0.1
+LATENCY = 1.0
+
+
+def signal(t: int) -> float:
+    return 20 + math.sin(t / 1e9)
+
+
+def streams(seconds: float, seed: int = 1) -> list[tuple[int, str, dict]]:
+    """Three jittered channels at 20, 1 and 3 Hz, merged in time order."""
+    rng = random.Random(seed)
+    samples = []
+    for channel, period in (("fast", 0.05), ("slow", 1.0), ("ranger", 1 / 3)):
+        t = T0 + rng.randrange(10**9)
+        while t < T0 + seconds * 1e9:
+            if channel == "ranger":
+                values = {"distance": None if rng.random() < 0.05 else 100.0}
+            else:
+                values = {"temperature": signal(t)}
+            samples.append((t, channel, values))
+            t += round(period * rng.uniform(0.8, 1.2) * 1e9)
+    samples.sort(key=lambda sample: sample[0])
+    return samples
+
+
+def check_accuracy() -> list:
+    aligner = Aligner(PERIOD, LATENCY, hold=("ranger",))
+    frames = []
+    for t, channel, values in streams(600):
+        frames += aligner.push(channel, t, values)
+    frames += aligner.finish()
+    errors = {"fast": [], "slow": []}
+    for frame in frames:
+        assert frame.t % aligner.period == 0
+        for channel, error in errors.items():
+            value = frame.values[f"{channel}.temperature"]
+            if value is not None:
+                error.append(abs(value - signal(frame.t)))
+    gaps = sum(frame.values["ranger.distance"] is None for frame in frames)
+    for channel, error in errors.items():
+        print(
+            f"accuracy {channel:>4}: {len(error)} points, mean error "
+            f"{statistics.mean(error):.5f}, worst {max(error):.5f}"
+        )
+    # Linear interpolation of sin over <= 1.2 s steps is within h²/8
+    assert max(errors["fast"]) < 0.0005 and max(errors["slow"]) < 0.2
+    print(f"accuracy: {len(frames)} frames, ranger held with {gaps} gaps kept")
+    return frames
+
+
+def check_logged(frames: list) -> None:
+    directory = tempfile.mkdtemp(prefix="align-")
+    try:
+        logs = {}
+        for t, channel, values in streams(600):
+            log = logs.get(channel)
+            if log is None:
+                log = logs[channel] = SampleLog(f"{directory}/{channel}", list(values))
+            log.append(t / 1e9, values)
+        for log in logs.values():
+            log.flush()
+        aligner = Aligner(PERIOD, LATENCY, hold=("ranger",))
+        logged = list(align_logs(logs, 0, 2**62 / 1e9, aligner))
+        for log in logs.values():
+            log.close()
+    finally:
+        shutil.rmtree(directory)
+    assert [frame.t for frame in logged] == [frame.t for frame in frames]
+    worst = max(
+        abs(a - b)
+        for live, log in zip(frames, logged)
+        for a, b in zip(live.values.values(), log.values.values())
+        if a is not None and b is not None
+    )
+    # Logs keep epoch seconds through a float, so stamps move by up to 1 µs
+    assert worst < 1e-5, worst
+    print(f"logged: same {len(logged)} frames as live, values within {worst:.1e}")
+
+
+def check_bounds() -> None:
+    """The slow sensor stops after 60 s; frames keep coming, memory stays put."""
+    aligner = Aligner(PERIOD, LATENCY, capacity=256)
+    newest = 0
+    lags = []
+    buffered = 0
+    frames = 0
+    for t, channel, values in streams(600):
+        if channel == "slow" and t > T0 + 60 * 10**9:
+            continue
+        newest = max(newest, t)
+        for frame in aligner.push(channel, t, values):
+            lags.append((newest - frame.t) / 1e9)
+            frames += 1
+        buffered = max(buffered, aligner.buffered)
+    worst = max(lags)
+    assert worst <= LATENCY + PERIOD, worst
+    assert buffered < 100
+    print(
+        f"bounds: {frames} frames with one sensor stopped, emit lag p50 "
+        f"{statistics.median(lags) * 1e3:.0f} ms worst {worst * 1e3:.0f} ms "
+        f"(latency {LATENCY * 1e3:.0f} ms), at most {buffered} samples buffered"
+    )
+
+
+def throughput() -> None:
+    samples = streams(3600)
+    aligner = Aligner(PERIOD, LATENCY)
+    start = time.perf_counter()
+    frames = 0
+    for t, channel, values in samples:
+        frames += len(aligner.push(channel, t, values))
+    elapsed = time.perf_counter() - start
+    print(
+        f"throughput: {len(samples) / elapsed:,.0f} samples/s in, "
+        f"{frames / elapsed:,.0f} frames/s out"
+    )
+
+
+async def live(seconds: float) -> None:
+    """The fused channel over simulated sensors, stamped as the server does."""
+    speedup = 100.0
+    backend.select("sim", seed=0, speedup=speedup)
+    timebase = Timebase()
+    aligner = Aligner(0.01, 0.1, hold=("hcsr04",))
+    lags = []
+    differences = []
+
+    def publish(frames) -> None:
+        now = timebase.now_ns()
+        for frame in frames:
+            lags.append((now - frame.t) / 1e9)
+            bmp280 = frame.values.get("bmp280.temperature")
+            probes = [
+                value
+                for key, value in frame.values.items()
+                if key.startswith("ds18b20.") and value is not None
+            ]
+            if bmp280 is not None and probes:
+                differences.append(bmp280 - statistics.mean(probes))
+
+    def on_reading(reading) -> None:
+        t = timebase.epoch_ns(reading.t_ns)
+        publish(aligner.push(reading.sensor, t, reading.values))
+
+    engine = build_engine(
+        [
+            {"driver": "bmp280", "period": 1.0},
+            {"driver": "ds18b20", "period": 2.0},
+            {"driver": "hcsr04", "period": 0.5},
+        ],
+        on_reading=on_reading,
+        speedup=speedup,
+    )
+    task = asyncio.create_task(engine.run())
+    try:
+        for _ in range(int(seconds / 0.01)):
+            await asyncio.sleep(0.01)
+            publish(aligner.flush(timebase.now_ns()))
+    finally:
+        task.cancel()
+        engine.close()
+        backend.current().close()
+    lags.sort()
+    print(
+        f"live: {len(lags) / seconds:.0f} fused frames/s of {aligner.fields}, "
+        f"emit lag p50 {lags[len(lags) // 2] * 1e3:.1f} ms "
+        f"p99 {lags[int(len(lags) * 0.99)] * 1e3:.1f} ms, "
+        f"bmp280 - ds18b20 {statistics.mean(differences):+.2f} °C"
+    )
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    frames = check_accuracy()
+    check_logged(frames)
+    check_bounds()
+    throughput()
+    asyncio.run(live(seconds))
+
+
+if __name__ == "__main__":
+    main()
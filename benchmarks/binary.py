@@ -0,0 +1,170 @@
+"""
+Binary websocket frames against the Socket.IO JSON sensor_data path:
+bytes on the wire per sample and server CPU to fan one sample out to 1000
+clients.
+
+Clients are in-process fake websockets, so the numbers cover the server's
+own work. The JSON path does what python-socketio does for a room emit:
+the event packet is JSON-encoded once and put on each client's Engine.IO
+queue, whose writer task prefixes the packet type and sends text. The
+binary path is backend.binary.BinaryHub.
+
+Run with: python -m benchmarks.binary [clients]
+"""
+
+import asyncio
+import datetime
+import json
+import math
+import sys
+import time
+
+from backend.binary import BinaryEncoder, BinaryHub, decode
+
+SAMPLES = 200
+VALUES = {"temperature": 21.53, "pressure": 1006.5325390625}
+
+
+def ws_overhead(payload: int) -> int:
+    """Server-to-client websocket frame header bytes (unmasked)."""
+    return 2 if payload < 126 else 4 if payload < 65536 else 10
+
+
+def json_packet(now: float, values: dict) -> str:
+    data = {
+        **values,
+        "timestamp": datetime.datetime.fromtimestamp(now).isoformat(),
+    }
+    return "2" + json.dumps(["sensor_data", data], separators=(",", ":"))
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.messages = 0
+        self.closed = asyncio.Event()
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.bytes += len(data) + ws_overhead(len(data))
+        self.messages += 1
+
+    async def send_text(self, data: str) -> None:
+        encoded = len(data.encode())
+        self.bytes += encoded + ws_overhead(encoded)
+        self.messages += 1
+
+    async def receive(self) -> dict:
+        await self.closed.wait()
+        return {"type": "websocket.disconnect"}
+
+
+def check_decoder() -> None:
+    encoder = BinaryEncoder()
+    frames = b""
+    expected = []
+    for i in range(10):
+        values = {"temperature": 20 + i / 7, "pressure": None if i == 3 else 1000.0}
+        frame, _ = encoder.encode("bmp280", 1_700_000_000 + i / 10, values)
+        frames += frame
+        expected.append(values)
+    frame, _ = encoder.encode("ds18b20", 1_700_000_001.0, {"28-01": 21.5})
+    frames += frame
+    schema = json.loads(json.dumps(encoder.schema()))
+    decoded = decode(schema, frames)
+    assert [d[0] for d in decoded] == ["bmp280"] * 10 + ["ds18b20"]
+    for (_, t, values), want in zip(decoded, expected):
+        for field, value in want.items():
+            got = values[field]
+            assert (got is None) == (value is None)
+            if value is not None:
+                assert math.isclose(got, value, rel_tol=1e-6), (got, value)
+    assert decoded[-1][2] == {"28-01": 21.5}
+    assert abs(decoded[1][1] - 1_700_000_000.1) < 1e-6
+    print("decoder: round trip ok (float32 values, ns timestamps, NaN as None)")
+
+
+async def settle(sockets: list[FakeWebSocket], expected: int) -> None:
+    while sum(socket.messages for socket in sockets) < expected:
+        await asyncio.sleep(0)
+
+
+async def engineio_writer(queue: asyncio.Queue, socket: FakeWebSocket) -> None:
+    while True:
+        packet = await queue.get()
+        await socket.send_text("4" + packet)  # Engine.IO message packet
+
+
+async def run_json(clients: int) -> tuple[float, float]:
+    sockets = [FakeWebSocket() for _ in range(clients)]
+    queues = [asyncio.Queue() for _ in sockets]
+    senders = [
+        asyncio.create_task(engineio_writer(queue, socket))
+        for queue, socket in zip(queues, sockets)
+    ]
+    cpu = time.process_time()
+    for _ in range(SAMPLES):
+        packet = json_packet(time.time(), VALUES)
+        for queue in queues:
+            queue.put_nowait(packet)
+        await asyncio.sleep(0)
+    await settle(sockets, SAMPLES * clients)
+    cpu = time.process_time() - cpu
+    for sender in senders:
+        sender.cancel()
+    return cpu / SAMPLES, sum(s.bytes for s in sockets) / SAMPLES / clients
+
+
+async def run_binary(clients: int) -> tuple[float, float]:
+    hub = BinaryHub()
+    hub.publish("bmp280", time.time(), VALUES)
+    sockets = [FakeWebSocket() for _ in range(clients)]
+    servers = [asyncio.create_task(hub.serve(socket)) for socket in sockets]
+    await settle(sockets, clients)  # schemas
+    for socket in sockets:
+        socket.bytes = socket.messages = 0
+    cpu = time.process_time()
+    for _ in range(SAMPLES):
+        hub.publish("bmp280", time.time(), VALUES)
+        await asyncio.sleep(0)
+    await settle(sockets, 1)
+    while any(subscriber.queue for subscriber in hub.subscribers):
+        await asyncio.sleep(0)
+    cpu = time.process_time() - cpu
+    for socket in sockets:
+        socket.closed.set()
+    await asyncio.gather(*servers)
+    return cpu / SAMPLES, sum(s.bytes for s in sockets) / SAMPLES / clients
+
+
+def main() -> None:
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    check_decoder()
+
+    packet = json_packet(time.time(), VALUES)
+    text = len(("4" + packet).encode())
+    frame, _ = BinaryEncoder().encode("bmp280", time.time(), VALUES)
+    print(
+        f"bytes/sample on the wire: JSON {text + ws_overhead(text)}, "
+        f"binary {len(frame) + ws_overhead(len(frame))} "
+        f"(payload {len(frame)}: 2 id + 8 timestamp + 4 per value)"
+    )
+    encoder = BinaryEncoder()
+    for name, encode in (
+        ("json", lambda: json_packet(time.time(), VALUES)),
+        ("binary", lambda: encoder.encode("bmp280", time.time(), VALUES)),
+    ):
+        start = time.perf_counter()
+        for _ in range(20_000):
+            encode()
+        micros = (time.perf_counter() - start) / 20_000 * 1e6
+        print(f"{name:>6} encode: {micros:5.2f} µs/sample (once per sample)")
+    for name, run in (("json", run_json), ("binary", run_binary)):
+        cpu, sent = asyncio.run(run(clients))
+        print(
+            f"{name:>6} x{clients}: {cpu * 1e3:7.2f} ms CPU/sample "
+            f"({cpu / clients * 1e6:5.2f} µs per client), {sent:6.1f} bytes/client/sample"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Count SMBus transactions per temperature+pressure sample against a fake bus.
+
+Run with: python -m benchmarks.bmp280_transactions
+"""
+
+import time
+
+from sensors.bmp280 import BMP280, Calibration
+from sensors.fake import FakeSMBus, bmp280_registers
+
+SAMPLES = 1000
+
+
+class UncachedBMP280(BMP280):
+    """Reproduces the old access pattern: byte-wise ADC reads and trimming
+    words re-read on every call."""
+
+    def read_raw_temperature(self) -> int:
+        return (self.rbd(0xFA) << 12) + (self.rbd(0xFB) << 4) + (self.rbd(0xFC) >> 4)
+
+    def read_raw_pressure(self) -> int:
+        return (self.rbd(0xF7) << 12) + (self.rbd(0xF8) << 4) + (self.rbd(0xF9) >> 4)
+
+    def _reread(self, first: int, last: int) -> None:
+        block = bytearray(self.calibration_bytes)
+        for register in range(first, last, 2):
+            offset = register - self.CALIBRATION_REGISTER
+            block[offset : offset + 2] = self.rwd(register).to_bytes(2, "little")
+        self.calibration_bytes = bytes(block)
+        self.calibration = Calibration.from_bytes(block)
+
+    def reload_calibration(self) -> Calibration:
+        self.calibration_bytes = bytes(self.CALIBRATION_LENGTH)
+        self._reread(0x88, 0xA0)
+        return self.calibration
+
+    def calculate_temperature(self, adc_T: int) -> tuple[float, int]:
+        self._reread(0x88, 0x8E)
+        return super().calculate_temperature(adc_T)
+
+    def calculate_pressure(self, adc_P: int, t_fine: int) -> float:
+        self._reread(0x8E, 0xA0)
+        return super().calculate_pressure(adc_P, t_fine)
+
+
+def separate_reads(sensor: BMP280) -> None:
+    sensor.read_temperature()
+    sensor.read_pressure()
+
+
+def combined_read(sensor: BMP280) -> None:
+    sensor.read_all()
+
+
+def reconfigured_read(sensor: BMP280) -> None:
+    # What mini.py and sensor.py used to do on every tick
+    sensor.set_config(t_sb="1000ms")
+    sensor.set_ctrl_meas(osrs_t="x16", osrs_p="x16", mode="normal")
+    sensor.read_all()
+
+
+def run(sensor_cls: type[BMP280], sample) -> tuple[float, float, float]:
+    bus = FakeSMBus({0x76: bmp280_registers()})
+    sensor = sensor_cls(bus=bus, i2c_addr=0x76)
+    sample(sensor)
+    bus.reset_counters()
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        sample(sensor)
+    elapsed = time.perf_counter() - start
+    return bus.transactions / SAMPLES, bus.writes / SAMPLES, elapsed / SAMPLES * 1e6
+
+
+def main() -> None:
+    scenarios = (
+        ("uncached", UncachedBMP280, separate_reads),
+        ("cached", BMP280, separate_reads),
+        ("read_all", BMP280, combined_read),
+        ("steady", BMP280, reconfigured_read),
+    )
+    for label, sensor_cls, sample in scenarios:
+        transactions, writes, micros = run(sensor_cls, sample)
+        print(
+            f"{label:>8}: {transactions:5.1f} transactions/sample, "
+            f"{writes:4.1f} writes/sample, {micros:6.1f} µs/sample"
+        )
+
+
+if __name__ == "__main__":
+    main()
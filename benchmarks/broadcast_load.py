@@ -0,0 +1,142 @@
+"""
+Load-test the broadcast layer with hundreds of real Socket.IO clients.
+
+Starts server.py on simulated sensors and connects the clients over
+websockets. A slice of them is made deliberately slow: they subscribe with
+acks and their ``sensor_frame`` handler sleeps before returning, which
+delays the ack the broadcaster waits for. The report covers the server CPU
+time per emitted frame, fan-out latency to the other clients, the frames
+the slow ones received and were spared, and the server's resident memory,
+which must stay flat while slow clients lag.
+
+Needs python-socketio[asyncio_client].
+
+Run with: python -m benchmarks.broadcast_load [clients]
+"""
+
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.suite import free_port, wait_ready
+
+DURATION = 10.0
+IDLE = 3.0  # s of server CPU sampled before any client connects
+SLOW_FRACTION = 0.05
+SLOW_ACK = 1.0  # s a slow client takes to handle one frame
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def cpu_seconds(pid: int) -> float:
+    """User plus system CPU time the process has used so far."""
+    with open(f"/proc/{pid}/stat") as f:
+        # Fields after the parenthesised command name; utime and stime are
+        # the 14th and 15th of the line
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def scrape(url: str, name: str) -> float:
+    with urllib.request.urlopen(url + "/metrics", timeout=5.0) as response:
+        for line in response.read().decode().splitlines():
+            if line.startswith(name + " "):
+                return float(line.split()[1])
+    return 0.0
+
+
+async def run(url: str, pid: int, clients: int) -> None:
+    import socketio
+
+    random.seed(1)
+    latencies: list[float] = []
+    slow_frames = 0
+    connected = []
+
+    async def client(slow: bool) -> None:
+        sio = socketio.AsyncClient()
+
+        @sio.on("sensor_frame")
+        async def on_frame(frame):
+            nonlocal slow_frames
+            if slow:
+                slow_frames += 1
+                await asyncio.sleep(SLOW_ACK)  # returning sends the ack
+                return
+            now = time.time()
+            latencies.extend(now - sample["t"] / 1000 for sample in frame["samples"])
+
+        await sio.connect(url, transports=["websocket"])
+        connected.append(sio)
+        await sio.call("subscribe", {"channel": "bmp280", "window": 0.05, "ack": slow})
+
+    # Acquisition and history cost CPU with no clients at all; measure that
+    # first so it can be taken out of the per-emit figure
+    cpu_start = cpu_seconds(pid)
+    await asyncio.sleep(IDLE)
+    idle_rate = (cpu_seconds(pid) - cpu_start) / IDLE
+
+    slow = [random.random() < SLOW_FRACTION for _ in range(clients)]
+    await asyncio.gather(*(client(s) for s in slow))
+    rss_start = rss_kib(pid)
+    cpu_start = cpu_seconds(pid)
+    sent_start = scrape(url, "broadcast_frames_total")
+    await asyncio.sleep(DURATION)
+    cpu = cpu_seconds(pid) - cpu_start - idle_rate * DURATION
+    sent = scrape(url, "broadcast_frames_total") - sent_start
+    rss_end = rss_kib(pid)
+    dropped = scrape(url, "broadcast_dropped_frames_total")
+    await asyncio.gather(*(sio.disconnect() for sio in connected))
+
+    latencies.sort()
+    print(
+        f"x{len(connected)} ({sum(slow)} slow): {sent:.0f} frames emitted, "
+        f"{cpu / max(sent, 1) * 1e6:6.1f} µs server CPU/emit, "
+        f"{len(latencies)} fast deliveries, "
+        f"fan-out p50 {latencies[len(latencies) // 2] * 1e3:7.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.1f} ms, "
+        f"{slow_frames} frames to slow clients, {dropped:.0f} dropped, "
+        f"server RSS {rss_start / 1024:.1f} -> {rss_end / 1024:.1f} MiB"
+    )
+
+
+def main() -> None:
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="broadcast-") as data_dir:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "server.py",
+                "--fake",
+                "--host=127.0.0.1",
+                f"--port={port}",
+                f"--data-dir={data_dir}",
+                "--no-gpio-monitor",
+                "--speedup=20",  # 20 Hz BMP280 with the default 1 s period
+            ],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(url + "/metrics")
+            asyncio.run(run(url, server.pid, clients))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
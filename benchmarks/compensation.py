@@ -0,0 +1,79 @@
+"""
+Check the NumPy batch compensation against the scalar path on random
+calibrations and raw readings, then compare throughput.
+
+Run with: python -m benchmarks.compensation [samples]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from sensors.bmp280 import Calibration, compensate_pressure, compensate_temperature
+from sensors.bmp280_batch import compensate_batch
+from sensors.fake import BMP280_CALIBRATION
+
+CASES = 200
+PER_CASE = 500
+
+
+def random_calibration(rng: random.Random) -> Calibration:
+    u16 = lambda: rng.randrange(1, 1 << 16)  # noqa: E731  (dig_P1 == 0 is degenerate)
+    s16 = lambda: rng.randrange(-(1 << 15), 1 << 15)  # noqa: E731
+    return Calibration(u16(), s16(), s16(), u16(), *(s16() for _ in range(8)))
+
+
+def verify(seed: int = 0) -> int:
+    """Random search for a mismatch, mixing realistic and extreme inputs."""
+    rng = random.Random(seed)
+    checked = 0
+    for case in range(CASES):
+        cal = (
+            Calibration(*BMP280_CALIBRATION)
+            if case % 4 == 0
+            else random_calibration(rng)
+        )
+        adc_T = [rng.randrange(1 << 20) for _ in range(PER_CASE)]
+        adc_P = [rng.randrange(1 << 20) for _ in range(PER_CASE)]
+        adc_T[:4] = [0, (1 << 20) - 1, 0, (1 << 20) - 1]
+        adc_P[:4] = [0, 0, (1 << 20) - 1, (1 << 20) - 1]
+        temperature, pressure = compensate_batch(np.array(adc_T), np.array(adc_P), cal)
+        for i, (t_raw, p_raw) in enumerate(zip(adc_T, adc_P)):
+            temp, t_fine = compensate_temperature(t_raw, cal)
+            press = compensate_pressure(p_raw, t_fine, cal)
+            if temp != temperature[i] or press != pressure[i]:
+                raise AssertionError(
+                    f"mismatch for {cal}, adc_T={t_raw}, adc_P={p_raw}: "
+                    f"scalar ({temp}, {press}) vs batch ({temperature[i]}, {pressure[i]})"
+                )
+            checked += 1
+    return checked
+
+
+def main() -> None:
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"verified {verify():,} random samples bit-exact")
+
+    cal = Calibration(*BMP280_CALIBRATION)
+    rng = np.random.default_rng(0)
+    adc_T = rng.integers(500000, 540000, samples)
+    adc_P = rng.integers(300000, 500000, samples)
+
+    scalar_n = min(samples, 100_000)
+    start = time.perf_counter()
+    for t_raw, p_raw in zip(adc_T[:scalar_n].tolist(), adc_P[:scalar_n].tolist()):
+        _, t_fine = compensate_temperature(t_raw, cal)
+        compensate_pressure(p_raw, t_fine, cal)
+    scalar_rate = scalar_n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    compensate_batch(adc_T, adc_P, cal)
+    batch_rate = samples / (time.perf_counter() - start)
+    print(f"scalar: {scalar_rate:14,.0f} samples/s")
+    print(f" batch: {batch_rate:14,.0f} samples/s ({batch_rate / scalar_rate:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Replay a day of BMP280 samples through the dead-band and delta encoder and
+report how many messages and bytes reach each client compared with a full
+sensor_data emit per sample. The decoded delta stream is checked against
+the samples that passed.
+
+By default the samples are synthesized (slow diurnal drift plus datasheet
+noise) into a temporary sample log; pass a log directory such as
+data/bmp280 to replay real recordings instead.
+
+Run with: python -m benchmarks.deadband [log directory]
+"""
+
+import datetime
+import json
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.deadband import (
+    BMP280_DEADBAND,
+    BMP280_RESOLUTION,
+    DeadBand,
+    DeltaEncoder,
+    decode,
+)
+from backend.storage import SampleLog, record_dtype
+
+DAY = 86400
+T0 = 1_700_000_000
+
+
+def synthesize(directory: str) -> SampleLog:
+    rng = np.random.default_rng(0)
+    t = np.arange(DAY, dtype=np.float64)
+    records = np.zeros(DAY, record_dtype(["temperature", "pressure"]))
+    records["t"] = ((T0 + t) * 1e9).astype(np.int64)
+    records["temperature"] = (
+        21 + 3 * np.sin(2 * np.pi * t / DAY) + rng.normal(0, 0.005, DAY)
+    )
+    records["pressure"] = (
+        1013 + 2 * np.sin(2 * np.pi * t / DAY / 2) + rng.normal(0, 0.013, DAY)
+    )
+    log = SampleLog(directory, ["temperature", "pressure"], fsync=False)
+    log.append_many(records)
+    log.flush()
+    return log
+
+
+def size(message: dict) -> int:
+    return len(json.dumps(message, separators=(",", ":")))
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        log = SampleLog(sys.argv[1])
+    else:
+        log = synthesize(tempfile.mkdtemp(prefix="deadband-"))
+    deadband = DeadBand(BMP280_DEADBAND)
+    encoder = DeltaEncoder(BMP280_RESOLUTION)
+    full_messages = full_bytes = 0
+    band_messages = band_bytes = delta_bytes = 0
+    state = None
+    worst = 0.0
+    for records in log.iter_range(0, 2**62 / 1e9):
+        for t_ns, temperature, pressure in records.tolist():
+            t = t_ns / 1e9
+            values = {"temperature": temperature, "pressure": pressure}
+            data = {
+                **values,
+                "timestamp": datetime.datetime.fromtimestamp(t).isoformat(),
+            }
+            full_messages += 1
+            full_bytes += size(data)
+            kind = deadband.check(t, values)
+            if kind is None:
+                continue
+            band_messages += 1
+            band_bytes += size(data)
+            frame = {"channel": "bmp280", **encoder.encode(t, values)}
+            delta_bytes += size(frame)
+            state, decoded = decode(state, frame)
+            for field, value in values.items():
+                error = abs(decoded[field] - value) / BMP280_RESOLUTION[field]
+                worst = max(worst, error)
+    log.close()
+    assert worst <= 0.5 + 1e-6, f"decoded values off by {worst} steps"
+
+    print(f"{full_messages} samples, dead-band {BMP280_DEADBAND}, heartbeat 30 s")
+    print(f"   every sample: {full_messages:7d} messages, {full_bytes / 1e3:8.1f} kB")
+    print(
+        f"      dead-band: {band_messages:7d} messages, {band_bytes / 1e3:8.1f} kB "
+        f"({1 - band_messages / full_messages:.1%} fewer messages, "
+        f"{1 - band_bytes / full_bytes:.1%} fewer bytes)"
+    )
+    print(
+        f"dead-band+delta: {band_messages:7d} messages, {delta_bytes / 1e3:8.1f} kB "
+        f"({1 - delta_bytes / full_bytes:.1%} fewer bytes)"
+    )
+    print("ok: delta stream decodes to the emitted samples within half a step")
+
+
+if __name__ == "__main__":
+    main()
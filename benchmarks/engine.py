@@ -0,0 +1,50 @@
+"""
+Run the acquisition engine over fake BMP280, DS18B20 and HC-SR04 drivers
+and report achieved sample rates per sensor.
+
+Run with: python -m benchmarks.engine
+"""
+
+import asyncio
+import time
+
+from sensors.engine import build_engine
+
+DURATION = 3.0
+SPECS = [
+    {"driver": "bmp280", "name": "bmp280-a", "period": 0.05},
+    {"driver": "bmp280", "name": "bmp280-b", "i2c_addr": 0x77, "period": 0.05},
+    {"driver": "ds18b20", "period": 0.5},
+    {"driver": "hcsr04", "name": "hcsr04-front", "period": 0.2},
+    {
+        "driver": "hcsr04",
+        "name": "hcsr04-rear",
+        "trigger_pin": 17,
+        "echo_pin": 27,
+        "period": 0.2,
+    },
+]
+
+
+async def main() -> None:
+    last: dict[str, dict] = {}
+    engine = build_engine(
+        SPECS, fake=True, on_reading=lambda r: last.__setitem__(r.sensor, r.values)
+    )
+    task = asyncio.create_task(engine.run())
+    start = time.perf_counter()
+    await asyncio.sleep(DURATION)
+    task.cancel()
+    elapsed = time.perf_counter() - start
+    for driver in engine.drivers:
+        rate = engine.counts[driver.name] / elapsed
+        print(
+            f"{driver.name:>13} on {driver.bus!s:>4}: {rate:6.2f} Hz "
+            f"(target {1 / driver.period:5.1f}), errors {engine.errors[driver.name]}, "
+            f"last {last.get(driver.name)}"
+        )
+    engine.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Per-sample cost of the distance filter stages over a noisy synthetic
+ranging trace with multi-path outliers and timeouts.
+
+Run with: python -m benchmarks.filters [samples]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from sensors.filters import (
+    EMA,
+    Gap,
+    Kalman1D,
+    OutlierGate,
+    Point,
+    RollingMedian,
+    pipeline,
+)
+
+
+def trace(samples: int, seed: int = 0) -> list[Point | Gap]:
+    rng = random.Random(seed)
+    items: list[Point | Gap] = []
+    for i in range(samples):
+        t = i * 0.05
+        truth = 100 + 30 * ((i // 200) % 2)  # a step every 10 s
+        roll = rng.random()
+        if roll < 0.02:
+            items.append(Gap(t))
+        elif roll < 0.07:
+            items.append(Point(t, truth * rng.uniform(1.5, 3.0)))  # multi-path echo
+        else:
+            items.append(Point(t, rng.gauss(truth, 1.0)))
+    return items
+
+
+def main() -> None:
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    items = trace(samples)
+    truth = [100 + 30 * ((i // 200) % 2) for i in range(samples)]
+    stages = {
+        "none": lambda: (),
+        "median(5)": lambda: (RollingMedian(5),),
+        "median(31)": lambda: (RollingMedian(31),),
+        "ema": lambda: (EMA(0.3),),
+        "kalman": lambda: (Kalman1D(),),
+        "gate+kalman": lambda: (OutlierGate(), Kalman1D()),
+    }
+    for label, make in stages.items():
+        start = time.perf_counter()
+        output = list(pipeline(items, *make()))
+        elapsed = time.perf_counter() - start
+        by_t = {round(p.t / 0.05): p.value for p in output if isinstance(p, Point)}
+        errors = [abs(value - truth[i]) for i, value in by_t.items()]
+        gaps = sum(isinstance(p, Gap) for p in output)
+        print(
+            f"{label:>12}: {elapsed / samples * 1e9:6.0f} ns/sample, "
+            f"median |error| {statistics.median(errors):5.2f} cm, "
+            f"p99 |error| {sorted(errors)[int(len(errors) * 0.99)]:6.2f} cm, "
+            f"{gaps} gaps passed through"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Run the forced-mode sampler against a simulated BMP280 and report jitter,
+status polls and bus traffic per sample.
+
+Run with: python -m benchmarks.forced_mode
+"""
+
+import asyncio
+
+from sensors.bmp280 import BMP280
+from sensors.fake import FakeSMBus, SimulatedBMP280
+from sensors.scheduler import ForcedModeSampler
+
+SAMPLES = 100
+PERIOD = 0.05
+
+
+async def run(profile: str, latency_scale: float) -> None:
+    device = SimulatedBMP280(latency_scale=latency_scale)
+    bus = FakeSMBus({0x76: device})
+    sampler = ForcedModeSampler(BMP280(bus=bus), profile=profile, period=PERIOD)
+    bus.reset_counters()
+    stale = 0
+    seen = 0
+    async for _ in sampler:
+        stale += device.conversions == seen
+        seen = device.conversions
+        if sampler.samples == SAMPLES:
+            break
+    jitter = sampler.jitter.as_dict()
+    print(
+        f"{profile:>10} latency x{latency_scale:<4}: "
+        f"jitter mean {jitter['mean'] * 1e3:6.3f} ms, "
+        f"stdev {jitter['stdev'] * 1e3:6.3f} ms, max {jitter['max'] * 1e3:6.3f} ms, "
+        f"{sampler.polls / SAMPLES:4.2f} polls/sample, "
+        f"{bus.transactions / SAMPLES:4.2f} transactions/sample, stale {stale}"
+    )
+
+
+async def main() -> None:
+    for profile in ("weather", "indoor-nav"):
+        for latency_scale in (1.0, 1.5):
+            await run(profile, latency_scale)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,245 @@
+"""
+Federation over loopback: edge node processes push to one gateway.
+
+Checks batch compression, exactly-once delivery through a gateway outage
+and restart, then for a growing number of edge processes measures
+end-to-end latency at a steady rate and ingest throughput when every edge
+drains a spooled backlog at once.
+
+Run with: python -m benchmarks.gateway [max nodes]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+from backend.gateway import Gateway, Spool, Uplink, encode_batch
+
+CHANNELS = {
+    "bmp280": ("temperature", "pressure"),
+    "ds18b20": ("28-000000000001", "28-000000000002"),
+    "hcsr04": ("distance",),
+}
+RATE = 100  # samples/s per channel in the paced runs
+SECONDS = 3.0
+BACKLOG = 200  # batches of 0.1 s per edge in the throughput runs
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def sample(rng: random.Random, channel: str) -> dict:
+    return {field: round(20 + rng.random(), 2) for field in CHANNELS[channel]}
+
+
+def add_tick(uplink: Uplink, rng: random.Random, t: float, count: int) -> int:
+    for i in range(count):
+        for channel in CHANNELS:
+            uplink.add(channel, t + i / RATE, sample(rng, channel))
+    return count * len(CHANNELS)
+
+
+def check_compression() -> None:
+    rng = random.Random(1)
+    samples = [
+        (channel, 1_700_000_000 + i / RATE, sample(rng, channel))
+        for i in range(RATE // 2)
+        for channel in CHANNELS
+    ]
+    raw = len(json.dumps(samples).encode())
+    packed = len(encode_batch(samples))
+    print(
+        f"compression: {len(samples)} samples, {raw} bytes as JSON, {packed} "
+        f"in a batch ({raw / packed:.1f}x, {packed / len(samples):.1f} bytes/sample)"
+    )
+
+
+class Central:
+    """Counts what a gateway hands over, per channel and in order."""
+
+    def __init__(self) -> None:
+        self.received: dict[str, list[float]] = {}
+        self.latencies: list[float] = []
+
+    def publish(self, channel: str, t: float, values: dict) -> None:
+        self.latencies.append(time.time() - t)
+        self.received.setdefault(channel, []).append(t)
+
+    @property
+    def samples(self) -> int:
+        return sum(map(len, self.received.values()))
+
+
+async def outage(directory: str) -> None:
+    port = free_port()
+    central = Central()
+    state = os.path.join(directory, "gateway.json")
+    spool = Spool(os.path.join(directory, "spool"), segment_bytes=4096)
+    uplink = Uplink("edge", "127.0.0.1", port, spool, interval=0.05)
+    rng = random.Random(2)
+
+    async def serve(seconds: float) -> Gateway:
+        gateway = Gateway(central.publish, state)
+        server = await asyncio.start_server(gateway.handle, "127.0.0.1", port)
+        await asyncio.sleep(seconds)
+        server.close()
+        # Drop live connections too, as a crash would
+        for writer in list(gateway.connections):
+            writer.transport.abort()
+        return gateway
+
+    async def produce(seconds: float) -> int:
+        sent = 0
+        for _ in range(int(seconds / 0.01)):
+            sent += add_tick(uplink, rng, time.time(), 1)
+            await asyncio.sleep(0.01)
+        return sent
+
+    runner = asyncio.create_task(uplink.run())
+    producer = asyncio.create_task(produce(6.0))
+    await serve(2.0)
+    await asyncio.sleep(2.0)  # gateway down: batches spool on disk
+    spooled = len(spool.pending)
+    gateway = Gateway(central.publish, state)
+    server = await asyncio.start_server(gateway.handle, "127.0.0.1", port)
+    sent = await producer
+    uplink.seal()
+    deadline = time.monotonic() + 20
+    while spool.pending and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    runner.cancel()
+    server.close()
+    for writer in list(gateway.connections):
+        writer.transport.abort()
+    await asyncio.sleep(0.1)
+    spool.close()
+
+    received = central.samples
+    for times in central.received.values():
+        assert times == sorted(times), "out of order"
+        assert len(times) == len(set(times)), "duplicated"
+    assert received == sent, (received, sent)
+    duplicates = sum(stats.duplicates for stats in gateway.nodes.values())
+    print(
+        f"outage: {sent} samples sent, {received} received once each in order; "
+        f"{spooled} batches spooled while down, {duplicates} resent batches dropped"
+    )
+
+
+def edge(node: str, port: int, directory: str, paced: bool, start: float) -> None:
+    asyncio.run(run_edge(node, port, directory, paced, start))
+
+
+async def run_edge(
+    node: str, port: int, directory: str, paced: bool, start: float
+) -> None:
+    spool = Spool(directory)
+    uplink = Uplink(node, "127.0.0.1", port, spool, interval=0.1, window=16)
+    rng = random.Random(node)
+    if not paced:
+        for i in range(BACKLOG):
+            add_tick(uplink, rng, 1_700_000_000 + i * 0.1, RATE // 10)
+            uplink.seal()
+        # Connect together so the gateway sees every backlog at once
+        await asyncio.sleep(max(start - time.time(), 0))
+    runner = asyncio.create_task(uplink.run())
+    if paced:
+        next_tick = time.monotonic()
+        for _ in range(int(SECONDS * 100)):
+            add_tick(uplink, rng, time.time(), RATE // 100)
+            next_tick += 0.01
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+        uplink.seal()
+    while spool.pending:
+        await asyncio.sleep(0.01)
+    runner.cancel()
+    spool.close()
+
+
+async def fleet(nodes: int, paced: bool, directory: str) -> dict:
+    port = free_port()
+    central = Central()
+    gateway = Gateway(central.publish)
+    server = await asyncio.start_server(gateway.handle, "127.0.0.1", port)
+    start = time.time() + 1.0 + 0.2 * nodes
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=edge,
+            args=(f"pi{i}", port, os.path.join(directory, f"pi{i}"), paced, start),
+        )
+        for i in range(nodes)
+    ]
+    for process in processes:
+        process.start()
+    if not paced:
+        await asyncio.sleep(max(start - time.time(), 0))
+    expected = (
+        nodes
+        * len(CHANNELS)
+        * (int(SECONDS * 100) * (RATE // 100) if paced else BACKLOG * (RATE // 10))
+    )
+    began = time.perf_counter()
+    cpu = time.process_time()
+    while central.samples < expected:
+        await asyncio.sleep(0.005)
+        if not any(process.is_alive() for process in processes):
+            await asyncio.sleep(0.5)
+            break
+    elapsed = time.perf_counter() - began
+    cpu = time.process_time() - cpu
+    server.close()
+    for process in processes:
+        process.join()
+    await asyncio.sleep(0.1)  # let the gateway see the edges hang up
+    latencies = sorted(central.latencies)
+    return {
+        "received": central.samples,
+        "expected": expected,
+        "rate": central.samples / elapsed,
+        "cpu": cpu / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "bytes": sum(stats.bytes for stats in gateway.nodes.values()),
+    }
+
+
+def main() -> None:
+    max_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    check_compression()
+    directory = tempfile.mkdtemp(prefix="gateway-")
+    try:
+        asyncio.run(outage(os.path.join(directory, "outage")))
+        nodes = 1
+        while nodes <= max_nodes:
+            paced = asyncio.run(
+                fleet(nodes, True, os.path.join(directory, f"paced-{nodes}"))
+            )
+            backlog = asyncio.run(
+                fleet(nodes, False, os.path.join(directory, f"backlog-{nodes}"))
+            )
+            for run in (paced, backlog):
+                assert run["received"] == run["expected"], run
+            print(
+                f"{nodes} nodes: paced {paced['rate']:7,.0f} samples/s, latency p50 "
+                f"{paced['p50'] * 1e3:5.1f} ms p99 {paced['p99'] * 1e3:5.1f} ms, "
+                f"gateway CPU {paced['cpu']:4.0%} | backlog ingest "
+                f"{backlog['rate']:9,.0f} samples/s, gateway CPU {backlog['cpu']:4.0%}"
+            )
+            nodes *= 2
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
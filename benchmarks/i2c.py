@@ -0,0 +1,86 @@
+"""
+Exercise the shared I2C bus manager on fake buses: a full address scan
+against the per-address SMBus() loop it replaces, two threads sharing one
+BMP280 bus, and the per-device statistics that result.
+
+Run with: python -m benchmarks.i2c
+"""
+
+import threading
+import time
+
+from sensors.bmp280 import BMP280
+from sensors.fake import FakeSMBus, RegisterFile, SimulatedBMP280
+from sensors.i2c import SCAN_RANGE, I2CBus, close_bus, open_bus
+
+DELAY = 100e-6  # per transaction, roughly one short transfer at 100 kHz
+OPEN_COST = 50e-6  # opening /dev/i2c-N, per the legacy loop
+READS = 500
+
+
+def legacy_scan(devices: dict) -> list[int]:
+    """find_sensor.py as it was: a new bus handle for every address."""
+    found = []
+    for addr in SCAN_RANGE:
+        time.sleep(OPEN_COST)
+        bus = FakeSMBus(devices, delay=DELAY)
+        try:
+            bus.read_byte(addr)
+            found.append(addr)
+        except OSError:
+            continue
+    return found
+
+
+def main() -> None:
+    devices = {0x76: SimulatedBMP280(), 0x50: RegisterFile(), 0x68: RegisterFile()}
+    started = time.perf_counter()
+    expected = legacy_scan(devices)
+    legacy = time.perf_counter() - started
+
+    bus = I2CBus(FakeSMBus(devices, delay=DELAY))
+    started = time.perf_counter()
+    found = bus.scan()
+    shared = time.perf_counter() - started
+    assert found == expected == [0x50, 0x68, 0x76], found
+    assert bus.scan([0x76, 0x77]) == [0x76]
+    print(
+        f"scan of {len(SCAN_RANGE)} addresses: {shared * 1e3:.1f} ms on the shared "
+        f"bus vs {legacy * 1e3:.1f} ms opening a bus per address"
+    )
+
+    # Two drivers on one bus number share the locked handle
+    handle = FakeSMBus({0x76: SimulatedBMP280(), 0x77: SimulatedBMP280()})
+    shared_bus = open_bus(1, handle)
+    sensors = [BMP280(bus_number=1, i2c_addr=addr) for addr in (0x76, 0x77)]
+    assert all(sensor.bus is shared_bus for sensor in sensors)
+    for sensor in sensors:
+        sensor.configure("weather")
+
+    def worker(sensor: BMP280) -> None:
+        for _ in range(READS):
+            sample = sensor.read_all()
+            assert round(sample.temperature, 2) == 25.08, sample.temperature
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in sensors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = shared_bus.stats()
+    assert sum(s["transactions"] for s in stats.values()) == handle.transactions
+    for addr, device in stats.items():
+        assert device["reads"] == READS + 1  # plus the calibration block
+        print(
+            f"0x{addr:02x}: {device['transactions']} transactions, "
+            f"{device['bytes_read']} B read, {device['bytes_written']} B written, "
+            f"mean {device['mean_latency'] * 1e6:.1f} µs, "
+            f"histogram {[n for n in device['histogram'].values()]}"
+        )
+    close_bus(1)
+    print("ok: shared handle, scan results and statistics are consistent")
+
+
+if __name__ == "__main__":
+    main()
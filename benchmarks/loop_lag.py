@@ -0,0 +1,54 @@
+"""
+Measure event-loop lag while a BMP280 is sampled over a slow fake bus,
+calling the blocking driver directly versus through the bus thread.
+
+Run with: python -m benchmarks.loop_lag
+"""
+
+import asyncio
+import time
+
+from sensors.aio import AsyncBMP280
+from sensors.bmp280 import BMP280
+from sensors.fake import FakeSMBus, bmp280_registers
+
+TICK = 0.001
+SAMPLES = 100
+BUS_DELAY = 0.005  # 5 ms per transaction, e.g. a clock-stretched 10 kHz bus
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(label: str, read) -> None:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(lags, stop))
+    for _ in range(SAMPLES):
+        await read()
+        await asyncio.sleep(0)
+    stop.set()
+    await task
+    lags.sort()
+    print(
+        f"{label:>8}: loop lag p50 {lags[len(lags) // 2] * 1e3:6.2f} ms, "
+        f"p99 {lags[int(len(lags) * 0.99)] * 1e3:6.2f} ms, max {lags[-1] * 1e3:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    sensor = BMP280(bus=FakeSMBus({0x76: bmp280_registers()}, delay=BUS_DELAY))
+
+    async def blocking():
+        return sensor.read_all()
+
+    await run("blocking", blocking)
+    await run("threaded", AsyncBMP280(sensor).read_all)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
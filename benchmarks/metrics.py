@@ -0,0 +1,117 @@
+"""
+Overhead of the metrics layer on the server's sample loop: a forced-mode
+BMP280 sampler over a fake bus (through the bus thread), history append
+and publish, with and without the shared I2CBus statistics and the
+sample/emit histograms.
+
+Whole-loop CPU time is noisy at the few-µs level, so the pass/fail check
+prices the instrumentation from tight loops (extra cost per I2C
+transaction times transactions per sample, plus the histogram updates)
+and divides by the measured CPU time of one uninstrumented sample.
+
+Run with: python -m benchmarks.metrics
+"""
+
+import asyncio
+import time
+
+from backend import metrics
+from backend.broadcast import Broadcaster
+from backend.timeseries import TimeSeriesStore
+from sensors.bmp280 import BMP280
+from sensors.fake import FakeSMBus, SimulatedBMP280
+from sensors.i2c import I2CBus
+from sensors.scheduler import ForcedModeSampler
+
+SAMPLES = 300
+REPEATS = 3
+N = 200_000
+
+
+async def _emit(event: str, data: dict, sid: str, ack: bool = False) -> None:
+    pass
+
+
+async def run(instrumented: bool) -> tuple[float, float]:
+    """CPU seconds and bus transactions per sample."""
+    registry = metrics.Registry()
+    sample_seconds = metrics.Histogram(
+        "sample_seconds", "", ("sensor",), registry=registry
+    ).labels(sensor="bmp280")
+    emit_seconds = metrics.Histogram(
+        "emit_seconds", "", ("event",), registry=registry
+    ).labels(event="sensor_data")
+    handle = FakeSMBus({0x76: SimulatedBMP280(latency_scale=0.0)})
+    sensor = BMP280(bus=I2CBus(handle) if instrumented else handle)
+    sampler = ForcedModeSampler(sensor, period=0.0, poll_interval=0.0)
+    history = TimeSeriesStore(raw_capacity=1024, tiers=((1.0, 1024),))
+    broadcaster = Broadcaster(_emit)
+    broadcaster.subscribe("client", "bmp280")
+
+    started = time.process_time()
+    async for sample in sampler:
+        if sampler.samples == 1:
+            handle.reset_counters()  # leave out configuration
+        if instrumented:
+            sample_seconds.observe(sampler.latency)
+        now = time.time()
+        values = {"temperature": sample.temperature, "pressure": sample.pressure}
+        history.append("bmp280", now, values)
+        broadcaster.publish("bmp280", now, values)
+        t0 = time.perf_counter() if instrumented else 0.0
+        await _emit("sensor_data", values, "client")
+        if instrumented:
+            emit_seconds.observe(time.perf_counter() - t0)
+        if sampler.samples == SAMPLES:
+            break
+    elapsed = time.process_time() - started
+    if instrumented:
+        registry.render()
+    return elapsed / SAMPLES, handle.transactions / (SAMPLES - 1)
+
+
+def per_call(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(N):
+        fn()
+    return (time.perf_counter() - started) / N
+
+
+def instrumentation_cost(transactions: float) -> float:
+    """CPU seconds the instrumentation adds to one sample."""
+    handle = FakeSMBus({0x76: SimulatedBMP280(latency_scale=0.0)})
+    bus = I2CBus(handle)
+    raw = min(per_call(lambda: handle.read_byte_data(0x76, 0xF3)) for _ in range(3))
+    wrapped = min(per_call(lambda: bus.read_byte_data(0x76, 0xF3)) for _ in range(3))
+
+    child = metrics.Histogram("x_seconds", "", registry=metrics.Registry())
+    clock = time.perf_counter
+    observe = min(per_call(lambda: child.observe(clock() - clock())) for _ in range(3))
+    print(
+        f"I2CBus: +{(wrapped - raw) * 1e9:.0f} ns/transaction, "
+        f"timed Histogram.observe: {observe * 1e9:.0f} ns"
+    )
+    return (wrapped - raw) * transactions + 2 * observe
+
+
+async def main() -> None:
+    plain, timed = [], []
+    for _ in range(REPEATS):  # interleaved so drift hits both alike
+        plain.append(await run(False))
+        timed.append(await run(True))
+    transactions = plain[0][1]
+    plain_cpu = min(cpu for cpu, _ in plain)
+    timed_cpu = min(cpu for cpu, _ in timed)
+    print(
+        f"sample loop: {plain_cpu * 1e6:6.1f} µs CPU/sample plain, "
+        f"{timed_cpu * 1e6:6.1f} µs instrumented (direct, noisy), "
+        f"{transactions:.1f} transactions/sample"
+    )
+    added = instrumentation_cost(transactions)
+    overhead = added / plain_cpu
+    print(f"instrumentation: +{added * 1e6:.2f} µs/sample = {overhead:.2%}")
+    assert overhead < 0.02, f"instrumentation overhead {overhead:.2%} is over 2%"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Accuracy and CPU cost of edge-timestamped HC-SR04 ranging against the
+old busy-wait loop, using the simulated pin backend.
+
+Simulated-time runs show the timing maths is exact. The real-time runs
+compare CPU use; their errors are dominated by the wake-up latency of the
+fake's edge-injection thread, which stands in for the kernel interrupt.
+
+Run with: python -m benchmarks.ranging
+"""
+
+import statistics
+import time
+
+from sensors.fake import FakeGPIO
+from sensors.ultrasonic import SPEED_OF_SOUND, HCSR04
+
+DISTANCES = (5.0, 42.0, 150.0, 300.0)
+PINGS = 100
+
+
+def busy_wait_measure(sensor: HCSR04) -> float | None:
+    """The loop distance.py used to run: spin on the echo pin with time.time()."""
+    gpio = sensor.gpio
+    gpio.output(sensor.trigger_pin, True)
+    time.sleep(sensor.TRIGGER_TIME)
+    gpio.output(sensor.trigger_pin, False)
+    start = time.time()
+    timeout = start + sensor.max_time
+    while gpio.input(sensor.echo_pin) == 0 and start <= timeout:
+        start = time.time()
+    if start > timeout:
+        return None
+    stop = time.time()
+    timeout = stop + sensor.max_time
+    while gpio.input(sensor.echo_pin) == 1 and stop <= timeout:
+        stop = time.time()
+    if stop > timeout:
+        return None
+    return ((stop - start) * SPEED_OF_SOUND) / 2.0
+
+
+def report(
+    label: str, errors: list[float], misses: int, cpu: float, wall: float
+) -> None:
+    print(
+        f"{label:>22}: mean |error| {statistics.fmean(map(abs, errors)):6.3f} cm, "
+        f"stdev {statistics.pstdev(errors):6.3f} cm, misses {misses:3}, "
+        f"CPU {cpu / wall * 100:5.1f}% of wall time"
+    )
+
+
+def run(label: str, realtime: bool, jitter_ns: float, measure) -> None:
+    errors: list[float] = []
+    misses = 0
+    cpu = wall = 0.0
+    for distance in DISTANCES:
+        gpio = FakeGPIO(realtime=realtime, jitter_ns=jitter_ns)
+        sensor = HCSR04(gpio=gpio, clock=gpio.clock_ns)
+        gpio.attach_hcsr04(sensor.trigger_pin, sensor.echo_pin, distance)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(PINGS):
+            measured = measure(sensor)
+            if measured is None:
+                misses += 1
+            else:
+                errors.append(measured - distance)
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+        sensor.close()
+    report(label, errors, misses, cpu, wall)
+
+
+def main() -> None:
+    run("simulated, exact", False, 0.0, HCSR04.measure)
+    run("simulated, 10 µs jitter", False, 10_000.0, HCSR04.measure)
+    run("real time, edges", True, 0.0, HCSR04.measure)
+    run("real time, busy-wait", True, 0.0, busy_wait_measure)
+
+
+if __name__ == "__main__":
+    main()
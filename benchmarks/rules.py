@@ -0,0 +1,239 @@
+"""
+Rule engine: incremental evaluation checked against a naive evaluator that
+rescans every rule and window on every sample, the cost of 1000 rules on a
+100 Hz stream, and the actions (webhooks to a local stub, gpiozero mock LEDs).
+
+Run with: python -m benchmarks.rules [rules]
+"""
+
+import http.server
+import json
+import operator
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from backend.rules import OPS, Event, LEDPattern, LEDs, Rule, RuleEngine, Webhook
+
+RATE = 100  # Hz
+COMPARE = dict(zip(OPS, (operator.gt, operator.ge, operator.lt, operator.le)))
+FIELDS = {
+    "bmp280": {"temperature": (25.0, 0.05), "pressure": (1010.0, 0.02)},
+    "hcsr04": {"distance": (60.0, 3.0)},
+}
+
+
+def random_rules(count: int, seed: int = 0) -> list[Rule]:
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        channel = rng.choice(list(FIELDS))
+        field = rng.choice(list(FIELDS[channel]))
+        centre, step = FIELDS[channel][field]
+        kind = rng.choice(("value", "value", "drop", "rise"))
+        if kind == "value":
+            threshold = round(centre + rng.gauss(0, step * 30), 2)
+            within = 0.0
+        else:
+            threshold = round(abs(rng.gauss(0, step * 10)), 2)
+            within = rng.choice((10.0, 60.0, 1800.0))
+        rules.append(
+            Rule(
+                channel,
+                field,
+                rng.choice(OPS),
+                threshold,
+                kind=kind,
+                within=within,
+                duration=rng.choice((0.0, 0.0, 1.0, 60.0)),
+                name=f"rule-{i}",
+            )
+        )
+    return rules
+
+
+def stream(seconds: float, seed: int = 1):
+    """Random walks: bmp280 at RATE, hcsr04 at a quarter of it."""
+    rng = random.Random(seed)
+    values = {
+        channel: {field: centre for field, (centre, _) in fields.items()}
+        for channel, fields in FIELDS.items()
+    }
+    for i in range(int(seconds * RATE)):
+        t = 1_700_000_000 + i / RATE
+        for channel, fields in FIELDS.items():
+            if channel == "hcsr04" and i % 4:
+                continue
+            for field, (centre, step) in fields.items():
+                value = values[channel][field]
+                value += rng.gauss(0, step) + (centre - value) * 0.001
+                values[channel][field] = value
+            sample = dict(values[channel])
+            if channel == "hcsr04" and rng.random() < 0.02:
+                sample["distance"] = None
+            yield channel, t, sample
+
+
+def naive(rules: list[Rule], samples) -> list[tuple[str, str]]:
+    """Every rule, every sample, windows rescanned from a full buffer."""
+    times: dict[tuple[str, str], list[float]] = {}
+    history: dict[tuple[str, str], list[float]] = {}
+    holds = {rule.name: False for rule in rules}
+    since = {rule.name: 0.0 for rule in rules}
+    active = {rule.name: False for rule in rules}
+    events = []
+    for channel, t, values in samples:
+        for rule in rules:
+            if holds[rule.name] and not active[rule.name] and rule.duration:
+                if t >= since[rule.name] + rule.duration:
+                    active[rule.name] = True
+                    events.append((rule.name, "firing"))
+        for field, value in values.items():
+            if value is not None:
+                times.setdefault((channel, field), []).append(t)
+                history.setdefault((channel, field), []).append(value)
+        for rule in rules:
+            value = values.get(rule.field)
+            if rule.channel != channel or value is None:
+                continue
+            key = (channel, rule.field)
+            window = history[key][bisect_left(times[key], t - rule.within) :]
+            if rule.kind == "value":
+                q = value
+            elif rule.kind == "drop":
+                q = max(window) - value
+            else:
+                q = value - min(window)
+            now = COMPARE[rule.op](q, rule.threshold)
+            if now and not holds[rule.name]:
+                since[rule.name] = t
+                if not rule.duration:
+                    active[rule.name] = True
+                    events.append((rule.name, "firing"))
+            elif not now and active[rule.name]:
+                active[rule.name] = False
+                events.append((rule.name, "cleared"))
+            holds[rule.name] = now
+    return events
+
+
+def check_against_naive() -> None:
+    rules = random_rules(200, seed=3)
+    samples = list(stream(60, seed=4))
+    engine = RuleEngine(random_rules(200, seed=3))
+    events = [
+        (event.rule.name, event.state)
+        for channel, t, values in samples
+        for event in engine.update(channel, t, values)
+    ]
+    expected = naive(rules, samples)
+    assert sorted(events) == sorted(expected), (len(events), len(expected))
+    print(
+        f"naive check: {len(rules)} rules over {len(samples)} samples, "
+        f"same {len(events)} events"
+    )
+
+
+def throughput(count: int) -> None:
+    samples = list(stream(600))
+    engine = RuleEngine(random_rules(count))
+    start = time.perf_counter()
+    events = 0
+    for channel, t, values in samples:
+        events += len(engine.update(channel, t, values))
+    elapsed = time.perf_counter() - start
+    per_sample = elapsed / len(samples)
+    bmp280 = sum(1 for channel, _, _ in samples if channel == "bmp280")
+    cpu = elapsed / (bmp280 / RATE)
+    print(
+        f"{count} rules: {per_sample * 1e6:6.2f} µs/sample, "
+        f"{engine.changes / len(samples):.2f} condition changes/sample, "
+        f"{events} events; {RATE} Hz input costs {cpu:.2%} of a core"
+    )
+    if count <= 1000:
+        rules = random_rules(count)
+        sample = samples[: RATE * 10]
+        start = time.perf_counter()
+        naive(rules, sample)
+        naive_per_sample = (time.perf_counter() - start) / len(sample)
+        print(
+            f"{count} rules naive (10 s of input, windows rescanned): "
+            f"{naive_per_sample * 1e6:8.0f} µs/sample"
+        )
+
+
+class Stub(http.server.BaseHTTPRequestHandler):
+    received: list[dict] = []
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        Stub.received.append(json.loads(body))
+        time.sleep(0.05)  # a slow receiver
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def check_actions() -> None:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    webhook = Webhook(f"http://127.0.0.1:{server.server_address[1]}/alerts")
+    rule = Rule("hcsr04", "distance", "<", 20, actions=[webhook], name="close")
+    engine = RuleEngine([rule])
+    calls = []
+    for i, distance in enumerate((50, 15, 12, 40, 10, 60)):
+        for event in engine.update("hcsr04", 1_700_000_000 + i, {"distance": distance}):
+            start = time.perf_counter()
+            for action in event.rule.actions:
+                action(event)
+            calls.append(time.perf_counter() - start)
+    deadline = time.monotonic() + 5
+    while webhook.sent < len(calls) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    webhook.close()
+    server.shutdown()
+    states = [(body["rule"], body["state"], body["value"]) for body in Stub.received]
+    assert states == [
+        ("close", "firing", 15),
+        ("close", "cleared", 40),
+        ("close", "firing", 10),
+        ("close", "cleared", 60),
+    ], states
+    print(
+        f"webhook: {len(states)} events delivered to a 50 ms stub, "
+        f"action call at most {max(calls) * 1e6:.0f} µs (posted off the loop)"
+    )
+
+    try:
+        from gpiozero import Device
+        from gpiozero.pins.mock import MockFactory
+    except ImportError as e:
+        print(f"led: skipped, {e}")
+        return
+    Device.pin_factory = MockFactory()
+    leds = LEDs()
+    hot = Rule("bmp280", "temperature", ">", 30, name="hot")
+    close = Rule("hcsr04", "distance", "<", 20, name="close")
+    for rule, pattern in ((hot, "blink"), (close, "on")):
+        rule.actions.append(LEDPattern(leds, 17, pattern))
+    for rule, state in ((hot, "firing"), (close, "firing"), (close, "cleared")):
+        rule.actions[0](Event(rule, state, 0.0, 0.0))
+    assert leds.leds[17].is_lit is not None and list(leds.firing[17]) == ["hot"]
+    leds.close()
+    print("led: patterns stack per pin and the pin follows the latest firing rule")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    check_against_naive()
+    for n in sorted({100, count, count * 10}):
+        throughput(n)
+    check_actions()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold start time and idle memory of the unified server.
+
+Each run is a fresh interpreter that imports the app, builds it with
+simulated sensors, drives the ASGI lifespan startup and idles, so the
+numbers include everything a worker pays before serving its first client.
+
+Run with: python -m benchmarks.startup [runs] [--importtime]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from backend.app import create_app
+from backend.config import Config
+imported = time.perf_counter()
+app = create_app(Config(fake=True, data_dir=sys.argv[1], gpio_monitor=True))
+created = time.perf_counter()
+
+def rss_kib():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+async def main():
+    messages = asyncio.Queue()
+    await messages.put({"type": "lifespan.startup"})
+    sent = asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+    task = asyncio.create_task(app(scope, messages.get, sent.put))
+    reply = await sent.get()
+    assert reply["type"] == "lifespan.startup.complete", reply
+    ready = time.perf_counter()
+    await asyncio.sleep(5)
+    idle = rss_kib()
+    await messages.put({"type": "lifespan.shutdown"})
+    await sent.get()
+    await task
+    return ready, idle
+
+ready, idle = asyncio.run(main())
+print(json.dumps({
+    "import": imported - started,
+    "create": created - imported,
+    "startup": ready - created,
+    "idle_rss_kib": idle,
+}))
+"""
+
+
+def run_once() -> dict:
+    with tempfile.TemporaryDirectory(prefix="startup-") as data_dir:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, data_dir],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_offenders(top: int = 10) -> list[tuple[int, str]]:
+    """Modules with the largest cumulative import time, in µs."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.app"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    runs = int(args[0]) if args else 5
+    results = [run_once() for _ in range(runs)]
+    for key, unit, scale in (
+        ("import", "ms", 1e3),
+        ("create", "ms", 1e3),
+        ("startup", "ms", 1e3),
+        ("idle_rss_kib", "MiB", 1 / 1024),
+    ):
+        values = [result[key] * scale for result in results]
+        print(
+            f"{key:13} median {statistics.median(values):8.1f} {unit}"
+            f"   max {max(values):8.1f} {unit}"
+        )
+    if "--importtime" in sys.argv:
+        print("\nslowest imports (cumulative):")
+        for micros, module in import_offenders():
+            print(f"{micros / 1e3:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
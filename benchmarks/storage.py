@@ -0,0 +1,76 @@
+"""
+Write throughput and range-query latency of the on-disk sample log.
+
+Run with: python -m benchmarks.storage [records]
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backend.storage import SampleLog
+
+FIELDS = ["temperature", "pressure"]
+SINGLE_APPENDS = 200_000
+QUERIES = 1000
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    directory = tempfile.mkdtemp(prefix="samplelog-")
+    try:
+        log = SampleLog(directory, FIELDS)
+        t0 = 1_700_000_000.0
+
+        start = time.perf_counter()
+        for i in range(SINGLE_APPENDS):
+            log.append(t0 + i * 0.01, {"temperature": 21.5, "pressure": 1006.5})
+        log.flush()
+        elapsed = time.perf_counter() - start
+        print(f"append():       {SINGLE_APPENDS / elapsed:12,.0f} records/s")
+
+        batch = 100_000
+        records = np.zeros(batch, log.dtype)
+        records["temperature"] = 21.5
+        records["pressure"] = 1006.5
+        written = SINGLE_APPENDS
+        start = time.perf_counter()
+        while written < total:
+            n = min(batch, total - written)
+            records["t"][:n] = ((t0 + (written + np.arange(n)) * 0.01) * 1e9).astype(
+                np.int64
+            )
+            log.append_many(records[:n])
+            written += n
+        log.flush()
+        elapsed = time.perf_counter() - start
+        mb = (total - SINGLE_APPENDS) * log.dtype.itemsize / 1e6
+        print(
+            f"append_many():  {(total - SINGLE_APPENDS) / elapsed:12,.0f} records/s "
+            f"({mb / elapsed:,.0f} MB/s, {len(log.segments)} segments)"
+        )
+
+        span = total * 0.01
+        for width in (1.0, 60.0, 3600.0):
+            random.seed(1)
+            start = time.perf_counter()
+            rows = 0
+            for _ in range(QUERIES):
+                begin = t0 + random.uniform(0, span - width)
+                rows += len(log.range(begin, begin + width))
+            elapsed = time.perf_counter() - start
+            print(
+                f"range({width:6.0f} s): {elapsed / QUERIES * 1e6:8.1f} µs/query, "
+                f"{rows / QUERIES:8.0f} records/query"
+            )
+        log.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
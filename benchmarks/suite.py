@@ -0,0 +1,373 @@
+"""
+Benchmark suite with machine-readable results, for comparing commits.
+
+Three tiers:
+  micro   BMP280 compensation, bus transactions per sample against a
+          counting fake bus, JSON encoding of the emitted payloads
+  loop    readings per second the acquisition engine sustains on the
+          simulation backend
+  system  N Socket.IO clients against server.py with simulated sensors,
+          reporting sensor-to-client latency percentiles
+
+Results go to benchmarks/results/<commit>.json unless --out says otherwise.
+With --compare BASELINE.json each metric is checked against the baseline
+and the exit status is 1 if any got worse by more than --threshold.
+
+Run with: python -m benchmarks.suite [--tier micro,loop,system] [--quick]
+          [--clients N] [--out FILE] [--compare FILE] [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from sensors import backend
+from sensors.bmp280 import (
+    BMP280,
+    BMP280Driver,
+    Calibration,
+    compensate_pressure,
+    compensate_temperature,
+)
+from sensors.engine import build_engine
+from sensors.fake import (
+    BMP280_ADC_P,
+    BMP280_ADC_T,
+    BMP280_CALIBRATION,
+    FakeSMBus,
+    SimulatedBMP280,
+    bmp280_registers,
+)
+
+TIERS = ("micro", "loop", "system")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def result(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def best_of(fn, number: int, repeats: int = 5) -> float:
+    """Fastest mean seconds per call over ``repeats`` runs of ``number`` calls."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# Micro
+
+
+def micro(quick: bool) -> dict:
+    number = 2_000 if quick else 20_000
+    cal = Calibration(*BMP280_CALIBRATION)
+
+    def compensate() -> None:
+        temperature, t_fine = compensate_temperature(BMP280_ADC_T, cal)
+        compensate_pressure(BMP280_ADC_P, t_fine, cal)
+
+    results = {
+        "bmp280_compensation": result(best_of(compensate, number) * 1e6, "µs/sample")
+    }
+
+    # Continuous (normal mode) reads and forced-mode driver reads
+    bus = FakeSMBus({0x76: bmp280_registers()})
+    sensor = BMP280(bus=bus)
+    sensor.configure("indoor-nav")
+    sensor.read_all()
+    bus.reset_counters()
+    for _ in range(100):
+        sensor.read_all()
+    results["bmp280_transactions_normal"] = result(
+        bus.transactions / 100, "transactions/sample"
+    )
+    bus = FakeSMBus({0x76: SimulatedBMP280(latency_scale=0.0)})
+    driver = BMP280Driver(bus=bus, profile="weather")
+    driver.time_scale = 0.0
+    driver.read()
+    bus.reset_counters()
+    for _ in range(100):
+        driver.read()
+    results["bmp280_transactions_forced"] = result(
+        bus.transactions / 100, "transactions/sample"
+    )
+    results["bmp280_driver_read"] = result(
+        best_of(driver.read, number // 10) * 1e6, "µs/sample"
+    )
+
+    now = time.time()
+    payloads = {
+        "sensor_data": {
+            "temperature": 21.53,
+            "pressure": 1006.5325390625,
+            "timestamp": datetime.datetime.fromtimestamp(now).isoformat(),
+        },
+        "sensor_frame": {
+            "channel": "bmp280",
+            "samples": [
+                {
+                    "t": round((now + i * 0.05) * 1000),
+                    "temperature": 21.5 + i * 0.01,
+                    "pressure": 1006.53,
+                }
+                for i in range(20)
+            ],
+        },
+    }
+    for event, payload in payloads.items():
+        results[f"json_{event}"] = result(
+            best_of(lambda: json.dumps(payload), number) * 1e6, "µs/payload"
+        )
+        results[f"json_{event}_bytes"] = result(
+            len(json.dumps(payload)), "bytes/payload"
+        )
+    return results
+
+
+# Loop
+
+
+async def _saturate(seconds: float) -> tuple[int, int]:
+    readings = 0
+
+    def on_reading(reading) -> None:
+        nonlocal readings
+        readings += 1
+
+    # Periods so short every driver is always due; the loop is the limit
+    engine = build_engine(
+        [
+            {"driver": "bmp280", "period": 1.0},
+            {"driver": "bmp280", "name": "bmp280-b", "i2c_addr": 0x77, "period": 1.0},
+            {"driver": "ds18b20", "period": 1.0},
+            {"driver": "hcsr04", "period": 1.0},
+        ],
+        on_reading=on_reading,
+        speedup=1e6,
+    )
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    errors = sum(engine.errors.values())
+    engine.close()
+    return readings, errors
+
+
+def loop(quick: bool) -> dict:
+    seconds = 1.0 if quick else 3.0
+    backend.select("sim", seed=0, speedup=1e6)
+    try:
+        cpu = time.process_time()
+        readings, errors = asyncio.run(_saturate(seconds))
+        cpu = time.process_time() - cpu
+    finally:
+        backend.current().close()
+        backend.select("hardware")
+    return {
+        "engine_readings": result(readings / seconds, "readings/s", "higher"),
+        "engine_cpu": result(cpu / max(readings, 1) * 1e6, "µs CPU/reading"),
+        "engine_errors": result(errors, "errors"),
+    }
+
+
+# System
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1.0):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _clients(url: str, count: int, seconds: float) -> tuple[list[float], int]:
+    import socketio
+
+    latencies: list[float] = []
+    connected = []
+
+    async def client() -> None:
+        sio = socketio.AsyncClient()
+
+        @sio.on("sensor_frame")
+        async def on_frame(frame):
+            now = time.time()
+            latencies.extend(now - sample["t"] / 1000 for sample in frame["samples"])
+
+        await sio.connect(url, transports=["websocket"])
+        connected.append(sio)
+        await sio.call("subscribe", {"channel": "bmp280", "rate": None, "window": 0.05})
+
+    await asyncio.gather(*(client() for _ in range(count)))
+    await asyncio.sleep(seconds)
+    await asyncio.gather(*(sio.disconnect() for sio in connected))
+    return latencies, len(connected)
+
+
+def system(quick: bool, clients: int) -> dict:
+    try:
+        import socketio  # noqa: F401
+    except ImportError as e:
+        return {"skipped": f"needs python-socketio[asyncio_client]: {e}"}
+    seconds = 5.0 if quick else 20.0
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="suite-") as data_dir:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "server.py",
+                "--fake",
+                "--host=127.0.0.1",
+                f"--port={port}",
+                f"--data-dir={data_dir}",
+                "--no-gpio-monitor",
+                "--speedup=20",  # 20 Hz BMP280 with the default 1 s period
+            ],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(url + "/metrics")
+            cpu = cpu_seconds(server.pid)
+            latencies, connected = asyncio.run(_clients(url, clients, seconds))
+            cpu = cpu_seconds(server.pid) - cpu
+        finally:
+            server.terminate()
+            server.wait()
+    if not latencies:
+        return {"skipped": "no frames arrived"}
+    latencies.sort()
+    return {
+        "clients": result(connected, "clients", "higher"),
+        "latency_p50": result(latencies[len(latencies) // 2] * 1e3, "ms"),
+        "latency_p99": result(latencies[int(len(latencies) * 0.99)] * 1e3, "ms"),
+        "deliveries": result(len(latencies) / seconds, "samples/s", "higher"),
+        "server_cpu": result(cpu / seconds * 100, "% of one core"),
+    }
+
+
+# Reporting
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Metrics that got worse than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for tier, metrics in report["results"].items():
+        for name, current in metrics.items():
+            old = baseline["results"].get(tier, {}).get(name)
+            if not isinstance(current, dict) or not isinstance(old, dict):
+                continue
+            if not old["value"]:
+                continue
+            change = (current["value"] - old["value"]) / abs(old["value"])
+            worse = (
+                change > threshold
+                if current["better"] == "lower"
+                else (change < -threshold)
+            )
+            mark = "  REGRESSION" if worse else ""
+            print(
+                f"{tier}.{name:28} {old['value']:12.3f} -> {current['value']:12.3f} "
+                f"{current['unit']:20} {change:+7.1%}{mark}"
+            )
+            if worse:
+                regressions.append(f"{tier}.{name}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tier", default=",".join(TIERS), help="comma separated")
+    parser.add_argument("--quick", action="store_true", help="shorter runs")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--out")
+    parser.add_argument("--compare", metavar="BASELINE")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    tiers = args.tier.split(",")
+    unknown = set(tiers) - set(TIERS)
+    if unknown:
+        parser.error(f"unknown tiers {sorted(unknown)}")
+    runners = {
+        "micro": lambda: micro(args.quick),
+        "loop": lambda: loop(args.quick),
+        "system": lambda: system(args.quick, args.clients),
+    }
+    report = {
+        "commit": commit(),
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "results": {},
+    }
+    for tier in tiers:
+        report["results"][tier] = metrics = runners[tier]()
+        for name, metric in metrics.items():
+            if name == "skipped":
+                print(f"{tier}: skipped, {metric}")
+            else:
+                print(f"{tier}.{name:28} {metric['value']:12.3f} {metric['unit']}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
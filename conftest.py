@@ -0,0 +1,2 @@
+# ds_test.py is a hardware demo script for the Pi, not a pytest module
+collect_ignore = ["ds_test.py"]
@@ -1,70 +1,42 @@
-import RPi.GPIO as GPIO
-import os
 import time
 
+from sensors.filters import Gap, Kalman1D, OutlierGate, pipeline
+from sensors.ultrasonic import HCSR04
+
 # Define GPIO to use on Pi
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
 GPIO_TRIGGER = 23
 GPIO_ECHO = 24
 
-TRIGGER_TIME = 0.00001
-MAX_TIME = 0.004  # max time waiting for response in case something is missed
-GPIO.setup(GPIO_TRIGGER, GPIO.OUT)  # Trigger
-GPIO.setup(GPIO_ECHO, GPIO.IN, pull_up_down=GPIO.PUD_UP)  # Echo
-
-GPIO.output(GPIO_TRIGGER, False)
-
-# This function measures a distance
-
-
-def measure():
-    print("Starting measurement...")
-
-    GPIO.output(GPIO_TRIGGER, True)
-    time.sleep(TRIGGER_TIME)
-    GPIO.output(GPIO_TRIGGER, False)
-
-    start = time.time()
-    timeout = start + MAX_TIME
 
-    # Wait for Echo to go HIGH (signal start)
-    while GPIO.input(GPIO_ECHO) == 0 and start <= timeout:
-        start = time.time()
-
-    if start > timeout:
-        print("⚠️ Echo never went HIGH (Timeout waiting for echo start)")
-        return -1
-
-    print("✔ Echo detected, measuring...")
-
-    stop = time.time()
-    timeout = stop + MAX_TIME
+def bmp280_temperature():
+    """Air temperature source for the speed of sound, if a BMP280 is present."""
+    try:
+        from sensors.bmp280 import BMP280
 
-    # Wait for Echo to go LOW (signal end)
-    while GPIO.input(GPIO_ECHO) == 1 and stop <= timeout:
-        stop = time.time()
+        bmp280 = BMP280(bus_number=1, i2c_addr=0x76)
+        bmp280.configure("weather")
+    except (ImportError, OSError):
+        return None
 
-    if stop > timeout:
-        print("⚠️ Echo never went LOW (Stuck HIGH)")
-        return -1
+    def read() -> float:
+        bmp280.trigger()
+        time.sleep(bmp280.profile.measurement_time)
+        bmp280.wait_ready()
+        return bmp280.read_all().temperature
 
-    elapsed = stop - start
-    distance = (elapsed * 34300) / 2.0
-    print(f"📏 Measured distance: {distance:.1f} cm")
-    return distance
+    return read
 
 
 if __name__ == "__main__":
+    sensor = HCSR04(trigger_pin=GPIO_TRIGGER, echo_pin=GPIO_ECHO)
+    readings = sensor.stream(period=0.5, temperature=bmp280_temperature())
     try:
-        while True:
-            distance = measure()
-            if distance > -1:
-                print("Measured Distance = %.1f cm" % distance)
-            else:
+        for item in pipeline(readings, OutlierGate(), Kalman1D()):
+            if isinstance(item, Gap):
                 print("#")
-            time.sleep(0.5)
+            else:
+                print("Measured Distance = %.1f cm" % item.value)
         # Reset by pressing CTRL + C
     except KeyboardInterrupt:
         print("Measurement stopped by User")
-        GPIO.cleanup()
+        sensor.close()
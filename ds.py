@@ -1,41 +1,37 @@
-import os
-import glob
+import subprocess
 import time
 
-# Load one-wire communication modules
-os.system("modprobe w1-gpio")
-os.system("modprobe w1-therm")
+from sensors.adaptive import AdaptiveRate
+from sensors.backend import current
+from sensors.ds18b20 import DS18B20Bus, DS18B20Driver
 
-# Define the base directory for the one-wire sensor
-base_dir = "/sys/bus/w1/devices/"
-device_folder = glob.glob(base_dir + "28*")[0]
-device_file = device_folder + "/w1_slave"
 
+def main() -> None:
+    if not current().simulated:
+        # Load one-wire communication modules
+        subprocess.run(["modprobe", "w1-gpio"], check=False)
+        subprocess.run(["modprobe", "w1-therm"], check=False)
 
-def read_temp_raw():
-    with open(device_file, "r") as f:
-        lines = f.readlines()
-    return lines
+    bus = DS18B20Bus()
+    if not bus.probes:
+        print("No DS18B20 probes found")
+        return
 
+    # Every 1 to 60 s, faster while the temperatures move
+    rate = AdaptiveRate(1.0, 60.0, DS18B20Driver.tolerance, period=1.0)
 
-def read_temp():
-    lines = read_temp_raw()
-    while lines[0].strip()[-3:] != "YES":
-        time.sleep(0.2)
-        lines = read_temp_raw()
+    # Continuous temperature reading loop; all probes convert together
+    while True:
+        sample = bus.sample()
+        for device_id, probe in sample.probes.items():
+            if not probe.crc_ok:
+                print(f"{device_id}: CRC check failed")
+            else:
+                fahrenheit = probe.temperature * 9.0 / 5.0 + 32.0
+                print(f"{device_id}: {probe.temperature:.2f} °C ({fahrenheit:.2f} °F)")
+        period = rate.update(sample.timestamp, sample.temperatures())
+        time.sleep(max(period - (time.monotonic() - sample.timestamp), 0))
 
-    equals_pos = lines[1].find("t=")
-    if equals_pos != -1:
-        temp_string = lines[1][equals_pos + 2 :]
-        temp_c = float(temp_string) / 1000.0
-        temp_f = temp_c * 9.0 / 5.0 + 32.0
-        return temp_c, temp_f
-
-
-# Continuous temperature reading loop
-while True:
-    temperature_celsius, temperature_fahrenheit = read_temp()
-    print(f"Temperature: {temperature_celsius:.2f} °C")
-    print(f"Temperature: {temperature_fahrenheit:.2f} °F")
-    time.sleep(1)
 
+if __name__ == "__main__":
+    main()
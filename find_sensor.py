@@ -1,26 +1,31 @@
-from smbus2 import SMBus
 import time
 
+from sensors.i2c import open_bus
 
-def find_sensor_address():
-    for addr in [0x76, 0x77]:
-        try:
-            bus = SMBus(1)
-            bus.read_byte(addr)
+BMP280_ADDRESSES = (0x76, 0x77)
+
+
+def find_sensor_address(addresses=BMP280_ADDRESSES, bus_number=1, bus=None):
+    """First of ``addresses`` that answers on the bus, or None."""
+    bus = bus or open_bus(bus_number)
+    found = bus.scan(addresses)
+    for addr in addresses:
+        if addr in found:
             print(f"Found sensor at address 0x{addr:02x}")
-            return addr
-        except Exception as e:
-            print(f"Nothing at address 0x{addr:02x}: {str(e)}")
-            continue
-    print("No sensor found")
-    return None
+        else:
+            print(f"Nothing at address 0x{addr:02x}")
+    if not found:
+        print("No sensor found")
+        return None
+    return found[0]
 
 
-# Add initial delay to let sensor boot up
-print("Waiting for sensor to initialize...")
-time.sleep(2)
+if __name__ == "__main__":
+    # Add initial delay to let sensor boot up
+    print("Waiting for sensor to initialize...")
+    time.sleep(2)
 
-# Try to find the sensor
-address = find_sensor_address()
-if address:
-    print(f"Use this address in your main script: 0x{address:02x}")
+    # Try to find the sensor
+    address = find_sensor_address()
+    if address:
+        print(f"Use this address in your main script: 0x{address:02x}")
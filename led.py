@@ -1,5 +1,6 @@
-from gpiozero import LED
-from time import sleep
+from signal import pause
+
+from sensors.backend import current
 
 """
 Wiring setup:
@@ -7,22 +8,25 @@ Wiring setup:
 - Black wire: LED shorter leg (-) -> GND (Pin 6, 9, 14, 20, 25, 30, 34, or 39)
 """
 
-# Initialize LED on GPIO17
-led = LED(17)
 
-try:
-    while True:
-        # Test pattern: on for 1 second, off for 1 second
-        print("LED turning ON")
-        led.on()
-        sleep(1)
+def main() -> None:
+    from gpiozero import LED
+
+    # Initialize LED on GPIO17; SENSOR_BACKEND=sim uses gpiozero's mock pins
+    led = LED(17, pin_factory=current().pin_factory())
+
+    try:
+        # Test pattern: on for 1 second, off for 1 second, timed on gpiozero's
+        # background thread; backend.rules drives LEDs the same way
+        led.blink(on_time=1, off_time=1)
+        print("LED blinking, CTRL+C to stop")
+        pause()
 
-        print("LED turning OFF")
-        led.off()
-        sleep(1)
+    except KeyboardInterrupt:
+        # Clean up when user presses CTRL+C
+        print("\nCleaning up...")
+        led.close()
 
-except KeyboardInterrupt:
-    # Clean up when user presses CTRL+C
-    print("\nCleaning up...")
-    led.close()
 
+if __name__ == "__main__":
+    main()
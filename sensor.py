@@ -1,21 +1,30 @@
-from time import sleep
-from sensors.bmp280 import BMP280
+import time
+
+from sensors.adaptive import AdaptiveRate
+from sensors.bmp280 import BMP280, BMP280Driver, rate_profile
 
 
 def main() -> None:
     bmp280 = BMP280(bus_number=1, i2c_addr=0x76)
+    # Every 0.1 to 30 s, faster while temperature or pressure move
+    rate = AdaptiveRate(0.1, 30.0, BMP280Driver.tolerance, period=1.0)
 
     try:
         while True:
-            bmp280.set_config(t_sb="1000ms")
-            bmp280.set_ctrl_meas(osrs_t="x16", osrs_p="x16", mode="normal")
-            sleep(0.1)
-            temperature = bmp280.read_temperature()
-            pressure = bmp280.read_pressure()
-            print(f"Temperature: {temperature:0.1f}°C")
-            print(f"Pressure: {pressure:0.1f} hPa")
+            started = time.monotonic()
+            # A forced-mode conversion with the oversampling for this rate
+            profile = bmp280.configure(rate_profile(rate.period))
+            time.sleep(profile.measurement_time)
+            bmp280.wait_ready()
+            sample = bmp280.read_all()
+            print(f"Temperature: {sample.temperature:0.1f}°C")
+            print(f"Pressure: {sample.pressure:0.1f} hPa")
             print("-" * 30)
-            sleep(1)
+            period = rate.update(
+                sample.timestamp,
+                {"temperature": sample.temperature, "pressure": sample.pressure},
+            )
+            time.sleep(max(period - (time.monotonic() - started), 0))
     except KeyboardInterrupt:
         print("\nExiting gracefully")
 
@@ -0,0 +1 @@
+from sensors import bmp280, ds18b20, ultrasonic  # noqa: F401  (register drivers)
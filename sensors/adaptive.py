@@ -0,0 +1,109 @@
+import math
+from typing import Mapping
+
+
+class AdaptiveRate:
+    """
+    Description:
+    Chooses the time between samples of one channel from how its signal
+    moves, between ``min_period`` and ``max_period`` seconds.
+
+    Every sample is compared with the straight line through the two before
+    it. The miss grows with the signal's curvature and noise, so a channel
+    that starts changing or gets noisy misses by more and is sampled faster
+    at once; a stable one is let back towards ``max_period`` a step at a
+    time. A steady ramp is predicted perfectly, so the rate of change is
+    watched as well: the period is also kept short enough that no field
+    moves more than STEP tolerances between samples. ``tolerance`` is the
+    miss allowed per field, in the field's units (a number for every field,
+    or a mapping with an optional "*" default).
+    """
+
+    TARGET = 0.5  # fraction of the tolerance the controller steers the miss to
+    FASTER = 0.5  # smallest factor applied to the period after one sample
+    SLOWER = 1.25  # largest factor, so backing off takes several stable samples
+    STEP = 10.0  # most tolerances a field may move from one sample to the next
+
+    def __init__(
+        self,
+        min_period: float,
+        max_period: float,
+        tolerance: float | Mapping[str, float],
+        period: float | None = None,
+    ) -> None:
+        if not 0 < min_period <= max_period:
+            raise ValueError("need 0 < min_period <= max_period")
+        self.min_period = min_period
+        self.max_period = max_period
+        if isinstance(tolerance, Mapping):
+            self.tolerance = dict(tolerance)
+        else:
+            self.tolerance = {"*": float(tolerance)}
+        self.period = min(max(period or min_period, min_period), max_period)
+        self.history: dict[str, list[tuple[float, float]]] = {}
+        self.misses = 0  # samples that missed by more than the tolerance
+        self.speed = 0.0  # fastest field change at the last sample, tolerances/s
+
+    def tolerance_for(self, field: str) -> float | None:
+        return self.tolerance.get(field, self.tolerance.get("*"))
+
+    def miss(self, t: float, values: Mapping[str, float | None]) -> float | None:
+        """
+        Worst miss of a straight-line prediction, as a fraction of tolerance;
+        None until a field has two earlier samples to predict from. Also
+        sets ``speed`` from the change since the previous sample.
+        """
+        worst = None
+        self.speed = 0.0
+        for field, value in values.items():
+            tolerance = self.tolerance_for(field)
+            if value is None or not tolerance:
+                continue
+            points = self.history.setdefault(field, [])
+            if points and t > points[-1][0]:
+                t1, v1 = points[-1]
+                self.speed = max(self.speed, abs(value - v1) / (t - t1) / tolerance)
+            if len(points) == 2 and points[1][0] > points[0][0] and t > points[1][0]:
+                (t0, v0), (t1, v1) = points
+                predicted = v1 + (v1 - v0) * (t - t1) / (t1 - t0)
+                miss = abs(value - predicted) / tolerance
+                worst = miss if worst is None else max(worst, miss)
+            points.append((t, value))
+            del points[:-2]
+        return worst
+
+    def update(self, t: float, values: Mapping[str, float | None]) -> float:
+        """Take a sample at time ``t`` (s) and return the period to use next."""
+        ratio = self.miss(t, values)
+        if ratio is None:
+            return self.period
+        if ratio > 1:
+            self.misses += 1
+        # The miss of a smooth signal scales with the square of the step
+        factor = math.sqrt(self.TARGET / ratio) if ratio else self.SLOWER
+        if self.speed:
+            factor = min(factor, self.STEP / self.speed / self.period)
+        factor = min(max(factor, self.FASTER), self.SLOWER)
+        self.period = min(max(self.period * factor, self.min_period), self.max_period)
+        return self.period
+
+    @classmethod
+    def from_spec(
+        cls, spec: Mapping, default_tolerance: Mapping[str, float], period: float
+    ) -> "AdaptiveRate":
+        """
+        Build from a sensor spec's ``adaptive`` table, e.g.
+        ``{"min_period": 0.1, "max_period": 30, "tolerance": {"pressure": 0.05}}``.
+        Fields without a tolerance fall back to the driver's, unless a
+        number or a "*" entry is given, which applies to every field not
+        named in the table.
+        """
+        spec = dict(spec)
+        tolerance = spec.pop("tolerance", {})
+        if not isinstance(tolerance, Mapping):
+            tolerance = {"*": tolerance}
+        if "*" not in tolerance:
+            tolerance = {**default_tolerance, **tolerance}
+        spec.setdefault("min_period", period)
+        spec.setdefault("max_period", max(period, spec["min_period"]) * 10)
+        return cls(tolerance=tolerance, period=period, **spec)
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, TypeVar
+
+from sensors.bmp280 import BMP280, Profile, Sample
+from sensors.ds18b20 import MAX_WAIT, DS18B20Bus, W1Sample
+
+T = TypeVar("T")
+
+_executors: dict[Hashable, ThreadPoolExecutor] = {}
+
+
+def bus_executor(bus_number: Hashable) -> ThreadPoolExecutor:
+    """
+    Return the single worker thread that owns a bus (an I2C bus number, or
+    a name such as "w1" or "gpio").
+
+    All transactions for one bus run on the same thread, one at a time, so
+    drivers sharing a bus never interleave and the event loop never blocks.
+    """
+    executor = _executors.get(bus_number)
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"i2c-{bus_number}"
+        )
+        _executors[bus_number] = executor
+    return executor
+
+
+async def run_on_bus(bus_number: Hashable, fn: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        bus_executor(bus_number), functools.partial(fn, *args, **kwargs)
+    )
+
+
+class AsyncBMP280:
+    """Awaitable facade over BMP280 that runs bus I/O on the bus thread."""
+
+    def __init__(self, sensor: BMP280) -> None:
+        self.sensor = sensor
+
+    @property
+    def profile(self) -> Profile | None:
+        return self.sensor.profile
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        return await run_on_bus(self.sensor.bus_number, fn, *args)
+
+    async def configure(self, profile: str | Profile) -> Profile:
+        return await self._run(self.sensor.configure, profile)
+
+    async def reload_calibration(self):
+        return await self._run(self.sensor.reload_calibration)
+
+    async def trigger(self) -> None:
+        await self._run(self.sensor.trigger)
+
+    async def is_measuring(self) -> bool:
+        return await self._run(self.sensor.is_measuring)
+
+    async def read_all(self) -> Sample:
+        return await self._run(self.sensor.read_all)
+
+
+class AsyncDS18B20Bus:
+    """
+    Awaitable facade over DS18B20Bus. File I/O runs on the "w1" bus thread
+    and the conversion wait is an asyncio sleep, so the event loop stays free
+    for the ~750 ms a conversion takes.
+    """
+
+    BUS = "w1"
+
+    def __init__(self, bus: DS18B20Bus, poll_interval: float = 0.01) -> None:
+        self.bus = bus
+        self.poll_interval = poll_interval
+
+    async def sample(self) -> W1Sample:
+        if not self.bus.bulk:
+            # Each w1_slave read converts; the parallel reads overlap them
+            return await run_on_bus(self.BUS, self.bus.read)
+        started = await run_on_bus(self.BUS, self.bus.trigger)
+        await asyncio.sleep(self.bus.conversion_time)
+        deadline = started + max(
+            MAX_WAIT * self.bus.conversion_time, self.poll_interval
+        )
+        while await run_on_bus(self.BUS, self.bus.is_converting):
+            if time.monotonic() >= deadline:
+                self.bus.timeouts += 1  # read the probes anyway
+                break
+            await asyncio.sleep(self.poll_interval)
+        return await run_on_bus(self.BUS, self.bus.read, started)
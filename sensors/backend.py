@@ -0,0 +1,195 @@
+import os
+from typing import Callable
+
+from sensors.ds18b20 import W1_DEVICES
+
+# SENSOR_BACKEND=sim runs any script here without hardware
+BACKEND_ENV = "SENSOR_BACKEND"
+SEED_ENV = "SENSOR_SEED"
+SPEEDUP_ENV = "SENSOR_SPEEDUP"
+
+# Pins the repo's HC-SR04 wiring uses: the driver default and us.py
+RANGERS = ((23, 24), (17, 27))
+# Probe id -> °C offset from the air (a probe in a sunny spot, one in shade)
+PROBES = {"28-000000000001": 0.0, "28-000000000002": -1.5}
+BMP280_OFFSETS = {0x76: 0.0, 0x77: 0.8}
+
+_current = None
+
+
+class Hardware:
+    """
+    Description:
+    The Raspberry Pi itself: ``RPi.GPIO``, ``smbus`` and the kernel's
+    1-Wire sysfs. Nothing is imported until a driver asks for it.
+    """
+
+    name = "hardware"
+    simulated = False
+    speedup = 1.0
+
+    def gpio(self):
+        import RPi.GPIO as GPIO
+
+        return GPIO
+
+    def i2c(self, bus_number: int = 1):
+        from sensors.i2c import open_bus
+
+        return open_bus(bus_number)
+
+    def w1_root(self) -> str:
+        return W1_DEVICES
+
+    def pin_factory(self):
+        """gpiozero pin factory; None lets gpiozero pick its default."""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class Simulation:
+    """
+    Description:
+    Simulated GPIO, I2C and 1-Wire, all measuring one seeded Weather.
+
+    BMP280s answer on the I2C bus, DS18B20 probes appear in a sysfs tree
+    and HC-SR04s echo on the GPIO pins in RANGERS. With ``speedup``
+    simulated time and device latencies run that many times faster than
+    real time, so drivers whose waits are scaled to match
+    (Driver.speed_up()) sample as fast.
+
+    Simulated time starts at ``start`` (epoch seconds, by default now), or
+    comes from ``clock``. The weather and the ranging targets depend only
+    on the seed, the start and the simulated time, so two simulations with
+    the same seed and a fixed start read the same signals at the same
+    times. The measurement noise of each device is drawn once per reading,
+    and the DS18B20 probes lag the air on a background thread, so readings
+    repeat exactly only when the devices are read in the same order at the
+    same simulated times; probe readings, only approximately.
+    """
+
+    name = "sim"
+    simulated = True
+
+    def __init__(
+        self,
+        seed: int = 0,
+        speedup: float = 1.0,
+        rangers: tuple[tuple[int, int], ...] = RANGERS,
+        probes: dict[str, float] = PROBES,
+        bmp280_offsets: dict[int, float] = BMP280_OFFSETS,
+        start: float | None = None,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        from sensors.sim import SimClock, Weather
+
+        self.seed = seed
+        self.speedup = speedup
+        self.rangers = rangers
+        self.probes = probes
+        self.bmp280_offsets = bmp280_offsets
+        if clock is None:
+            clock = SimClock(speedup, start)
+        self.weather = Weather(seed, clock=clock, origin=start)
+        self._gpio = None
+        self._pin_factory = None
+        self._w1 = None
+        self._handles: dict[int, object] = {}
+
+    def gpio(self):
+        if self._gpio is None:
+            from sensors.fake import FakeGPIO
+            from sensors.sim import Target
+
+            # Simulated time: echo edges fire as the trigger falls, so pings
+            # cost no wall-clock time however fast the engine runs
+            self._gpio = FakeGPIO(realtime=False, seed=self.seed)
+            for index, (trigger_pin, echo_pin) in enumerate(self.rangers):
+                target = Target(self.weather, seed=self.seed + index)
+                self._gpio.attach_hcsr04(trigger_pin, echo_pin, target)
+        return self._gpio
+
+    def i2c(self, bus_number: int = 1):
+        from sensors.i2c import open_bus
+
+        handle = self._handles.get(bus_number)
+        if handle is None:
+            from sensors.fake import FakeSMBus
+            from sensors.sim import WeatherBMP280
+
+            handle = self._handles[bus_number] = FakeSMBus(
+                {
+                    addr: WeatherBMP280(
+                        self.weather,
+                        seed=self.seed + addr,
+                        offset=offset,
+                        latency_scale=1 / self.speedup,
+                    )
+                    for addr, offset in self.bmp280_offsets.items()
+                }
+            )
+        return open_bus(bus_number, handle)
+
+    def w1_root(self) -> str:
+        if self._w1 is None:
+            from sensors.sim import SimulatedW1
+
+            # Rewriting the files faster than every 5 ms only burns CPU
+            self._w1 = SimulatedW1(
+                self.weather,
+                self.probes,
+                seed=self.seed,
+                interval=max(0.75 / self.speedup, 0.005),
+            ).start()
+        return self._w1.root
+
+    def pin_factory(self):
+        # One factory, so LEDs, the GPIO monitor and drivers share its pins
+        if self._pin_factory is None:
+            from gpiozero.pins.mock import MockFactory
+
+            self._pin_factory = MockFactory()
+        return self._pin_factory
+
+    def close(self) -> None:
+        from sensors.i2c import close_bus
+
+        for bus_number in self._handles:
+            close_bus(bus_number)
+        self._handles.clear()
+        if self._w1 is not None:
+            self._w1.close()
+            self._w1 = None
+        if self._pin_factory is not None:
+            self._pin_factory.close()
+            self._pin_factory = None
+        self._gpio = None
+
+
+BACKENDS = {"hardware": Hardware, "sim": Simulation}
+
+
+def select(name: str | None = None, **options) -> Hardware | Simulation:
+    """
+    Make ``name`` ("hardware" or "sim") the backend drivers open their
+    devices on; by default from $SENSOR_BACKEND, with the simulation's seed
+    and speed-up from $SENSOR_SEED and $SENSOR_SPEEDUP.
+    """
+    global _current
+    name = name or os.environ.get(BACKEND_ENV, "hardware")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {list(BACKENDS)}")
+    if name == "sim":
+        options.setdefault("seed", int(os.environ.get(SEED_ENV, 0)))
+        options.setdefault("speedup", float(os.environ.get(SPEEDUP_ENV, 1.0)))
+    if _current is not None:
+        _current.close()
+    _current = BACKENDS[name](**options)
+    return _current
+
+
+def current() -> Hardware | Simulation:
+    """The selected backend, chosen from the environment on first use."""
+    return _current if _current is not None else select()
@@ -1,10 +1,156 @@
-import smbus
-from toolz import pipe
-from ctypes import c_int16
+import struct
+import time
+from typing import NamedTuple
 
+from sensors.registry import Driver, register
 
-def sign(value: int) -> int:
-    return c_int16(value).value
+
+class Calibration(NamedTuple):
+    """Factory trimming parameters stored in registers 0x88-0x9F."""
+
+    dig_T1: int
+    dig_T2: int
+    dig_T3: int
+    dig_P1: int
+    dig_P2: int
+    dig_P3: int
+    dig_P4: int
+    dig_P5: int
+    dig_P6: int
+    dig_P7: int
+    dig_P8: int
+    dig_P9: int
+
+    @classmethod
+    def from_bytes(cls, block: bytes) -> "Calibration":
+        # T1 and P1 are unsigned, everything else is a signed little-endian short
+        return cls._make(struct.unpack("<HhhHhhhhhhhh", bytes(block)))
+
+
+def unpack_adc(msb: int, lsb: int, xlsb: int) -> int:
+    return (msb << 12) | (lsb << 4) | (xlsb >> 4)
+
+
+class Sample:
+    """One temperature+pressure conversion read in a single burst."""
+
+    __slots__ = ("temperature", "pressure", "adc_T", "adc_P", "timestamp")
+
+    def __init__(
+        self,
+        temperature: float,
+        pressure: float,
+        adc_T: int,
+        adc_P: int,
+        timestamp: float,
+    ) -> None:
+        self.temperature = temperature
+        self.pressure = pressure
+        self.adc_T = adc_T
+        self.adc_P = adc_P
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return (
+            f"Sample(temperature={self.temperature}, pressure={self.pressure}, "
+            f"adc_T={self.adc_T}, adc_P={self.adc_P}, timestamp={self.timestamp})"
+        )
+
+
+# Oversampling factor behind each osrs_t/osrs_p setting
+OVERSAMPLING = {"skip": 0, "x1": 1, "x2": 2, "x4": 4, "x8": 8, "x16": 16}
+# Status polls after the datasheet conversion time, before giving up
+POLL_INTERVAL = 0.0005  # s
+MAX_POLLS = 100
+
+
+def measurement_time(osrs_t: str = "x16", osrs_p: str = "x16") -> float:
+    """Maximum conversion time in seconds (datasheet section 3.8.1)."""
+    t_os = OVERSAMPLING[osrs_t]
+    p_os = OVERSAMPLING[osrs_p]
+    milliseconds = 1.25 + 2.3 * t_os + (2.3 * p_os + 0.575 if p_os else 0)
+    return milliseconds / 1000
+
+
+class Profile(NamedTuple):
+    """A complete sensor configuration, applied with BMP280.configure()."""
+
+    osrs_t: str = "x16"
+    osrs_p: str = "x16"
+    mode: str = "normal"
+    filter: str = "off"
+    t_sb: str = "1000ms"
+
+    @property
+    def measurement_time(self) -> float:
+        return measurement_time(self.osrs_t, self.osrs_p)
+
+    @property
+    def sample_period(self) -> float:
+        """Time between fresh results in normal mode (conversion plus standby)."""
+        return self.measurement_time + float(self.t_sb.removesuffix("ms")) / 1000
+
+
+# Recommended settings from the datasheet use cases (table 7)
+PROFILES = {
+    "weather": Profile(osrs_t="x1", osrs_p="x1", mode="forced", filter="off"),
+    "low-power": Profile(
+        osrs_t="x2", osrs_p="x16", mode="normal", filter="4", t_sb="62.5ms"
+    ),
+    "dynamic": Profile(
+        osrs_t="x1", osrs_p="x4", mode="normal", filter="16", t_sb="0.5ms"
+    ),
+    "elevator": Profile(
+        osrs_t="x1", osrs_p="x4", mode="normal", filter="4", t_sb="125ms"
+    ),
+    "drop-detection": Profile(
+        osrs_t="x1", osrs_p="x2", mode="normal", filter="off", t_sb="0.5ms"
+    ),
+    "indoor-nav": Profile(
+        osrs_t="x2", osrs_p="x16", mode="normal", filter="16", t_sb="0.5ms"
+    ),
+}
+
+
+def compensate_temperature(adc_T: int, cal: Calibration) -> tuple[float, int]:
+    var1 = (((adc_T >> 3) - (cal.dig_T1 << 1)) * cal.dig_T2) >> 11
+    var2 = (
+        ((((adc_T >> 4) - cal.dig_T1) * ((adc_T >> 4) - cal.dig_T1)) >> 12) * cal.dig_T3
+    ) >> 14
+    t_fine = var1 + var2
+    temp = (t_fine * 5 + 128) >> 8
+    temp /= 100
+
+    return temp, t_fine
+
+
+def s64(value: int) -> int:
+    """Wrap a Python int to a signed 64-bit value (the datasheet's BMP280_S64_t)."""
+    return ((value + (1 << 63)) & ((1 << 64) - 1)) - (1 << 63)
+
+
+def compensate_pressure(adc_P: int, t_fine: int, cal: Calibration) -> float:
+    # Datasheet 64-bit integer formula. Products are wrapped to 64 bits before
+    # every shift or division, which reproduces the C overflow behaviour; the
+    # division truncates toward zero like C.
+    var1 = t_fine - 128000
+    var2 = var1 * var1 * cal.dig_P6
+    var2 = var2 + ((var1 * cal.dig_P5) << 17)
+    var2 = var2 + (cal.dig_P4 << 35)
+    var1 = (s64(var1 * var1 * cal.dig_P3) >> 8) + ((var1 * cal.dig_P2) << 12)
+    var1 = s64(((1 << 47) + var1) * cal.dig_P1) >> 33
+    if var1 == 0:
+        return 0.0
+    p = 1048576 - adc_P
+    numerator = s64(((p << 31) - var2) * 3125)
+    p = abs(numerator) // abs(var1)
+    p = s64(-p if (numerator < 0) != (var1 < 0) else p)
+    var1 = s64(cal.dig_P9 * (p >> 13) * (p >> 13)) >> 25
+    var2 = s64(cal.dig_P8 * p) >> 19
+    p = (s64(p + var1 + var2) >> 8) + (cal.dig_P7 << 4)
+    p = (p & 0xFFFFFFFF) / 25600  # the datasheet returns BMP280_U32_t
+
+    return p
 
 
 class BMP280:
@@ -36,9 +182,43 @@ class BMP280:
     OSRS_P = {"skip": 0, "x1": 1, "x2": 2, "x4": 3, "x8": 4, "x16": 5}
     MODE = {"sleep": 0, "forced": 1, "normal": 2}
 
-    def __init__(self, bus_number: int = 1, i2c_addr: int = 0x76) -> None:
-        self.bus = smbus.SMBus(bus_number)
+    CALIBRATION_REGISTER = 0x88
+    CALIBRATION_LENGTH = 24
+
+    def __init__(self, bus_number: int = 1, i2c_addr: int = 0x76, bus=None) -> None:
+        if bus is None:
+            from sensors.backend import current
+
+            # Shared with every other driver on this bus number
+            bus = current().i2c(bus_number)
+        self.bus = bus
+        self.bus_number = bus_number
         self.i2c_addr = i2c_addr
+        # Last value written to each control register, so rewrites can be skipped
+        self.registers: dict[int, int] = {}
+        self.profile: Profile | None = None
+        self.calibration = self.reload_calibration()
+
+    def reload_calibration(self) -> Calibration:
+        """Read the trimming block in one transfer and cache it on the instance."""
+        block = self.rbl(self.CALIBRATION_REGISTER, self.CALIBRATION_LENGTH)
+        self.calibration = Calibration.from_bytes(block)
+        return self.calibration
+
+    def configure(self, profile: str | Profile) -> Profile:
+        """Apply a named preset or a Profile; unchanged registers are not rewritten."""
+        if isinstance(profile, str):
+            profile = PROFILES[profile]
+        self.set_config(t_sb=profile.t_sb, filter=profile.filter)
+        self.set_ctrl_meas(
+            osrs_t=profile.osrs_t, osrs_p=profile.osrs_p, mode=profile.mode
+        )
+        self.profile = profile
+        return profile
+
+    def invalidate_registers(self) -> None:
+        """Forget the register shadow, e.g. after a reset or power cycle."""
+        self.registers.clear()
 
     def set_config(
         self, t_sb: str = "1000ms", filter: str = "off", spi3w: str = "disable"
@@ -54,69 +234,65 @@ class BMP280:
         )
         self.wbd(0xF4, value)
 
+    def trigger(self) -> None:
+        """Start one forced-mode conversion with the current profile's oversampling."""
+        profile = self.profile or Profile()
+        self.set_ctrl_meas(osrs_t=profile.osrs_t, osrs_p=profile.osrs_p, mode="forced")
+
+    def is_measuring(self) -> bool:
+        return bool(self.rbd(0xF3) & 0x08)
+
+    def wait_ready(
+        self, poll_interval: float = POLL_INTERVAL, max_polls: int = MAX_POLLS
+    ) -> int:
+        """
+        Poll the ``measuring`` bit until the conversion finishes; returns the
+        polls that found it busy. A status bit that never clears (a stuck
+        chip, a bus reading 0xFF) raises TimeoutError instead of blocking the
+        bus thread.
+        """
+        for polls in range(max_polls):
+            if not self.is_measuring():
+                return polls
+            time.sleep(poll_interval)
+        raise TimeoutError("BMP280 conversion did not finish")
+
     def rbd(self, register: int) -> int:
         return self.bus.read_byte_data(self.i2c_addr, register)
 
     def wbd(self, register: int, value: int) -> None:
+        if self.registers.get(register) == value:
+            return
         self.bus.write_byte_data(self.i2c_addr, register, value)
+        if register == 0xF4 and value & 0x03 == self.MODE["forced"]:
+            # The chip drops back to sleep after a forced conversion, so the
+            # next trigger has to reach the bus again
+            self.registers.pop(register, None)
+        else:
+            self.registers[register] = value
 
     def rwd(self, register: int) -> int:
         return self.bus.read_word_data(self.i2c_addr, register)
 
+    def rbl(self, register: int, length: int) -> list[int]:
+        return self.bus.read_i2c_block_data(self.i2c_addr, register, length)
+
     def read_raw_temperature(self) -> int:
-        temp_msb = self.rbd(0xFA) << 12
-        temp_lsb = self.rbd(0xFB) << 4
-        temp_xlsb = self.rbd(0xFC) >> 4
-        return temp_msb + temp_lsb + temp_xlsb
+        return unpack_adc(*self.rbl(0xFA, 3))
 
     def read_raw_pressure(self) -> int:
-        press_msb = self.rbd(0xF7) << 12
-        press_lsb = self.rbd(0xF8) << 4
-        press_xlsb = self.rbd(0xF9) >> 4
-        return press_msb + press_lsb + press_xlsb
+        return unpack_adc(*self.rbl(0xF7, 3))
 
-    def calculate_temperature(self, adc_T: int) -> tuple[float, int]:
-        dig_T1 = pipe(0x88, self.rwd)
-        dig_T2 = pipe(0x8A, self.rwd, sign)
-        dig_T3 = pipe(0x8C, self.rwd, sign)
+    def read_raw(self) -> tuple[int, int]:
+        """Burst-read 0xF7-0xFC so both values come from the same conversion."""
+        data = self.rbl(0xF7, 6)
+        return unpack_adc(*data[3:6]), unpack_adc(*data[0:3])
 
-        var1 = (((adc_T >> 3) - (dig_T1 << 1)) * dig_T2) >> 11
-        var2 = (
-            ((((adc_T >> 4) - dig_T1) * ((adc_T >> 4) - dig_T1)) >> 12) * dig_T3
-        ) >> 14
-        t_fine = var1 + var2
-        temp = (t_fine * 5 + 128) >> 8
-        temp /= 100
-
-        return temp, t_fine
+    def calculate_temperature(self, adc_T: int) -> tuple[float, int]:
+        return compensate_temperature(adc_T, self.calibration)
 
     def calculate_pressure(self, adc_P: int, t_fine: int) -> float:
-        dig_P1 = pipe(0x8E, self.rwd)
-        dig_P2 = pipe(0x90, self.rwd, sign)
-        dig_P3 = pipe(0x92, self.rwd, sign)
-        dig_P4 = pipe(0x94, self.rwd, sign)
-        dig_P5 = pipe(0x96, self.rwd, sign)
-        dig_P6 = pipe(0x98, self.rwd, sign)
-        dig_P7 = pipe(0x9A, self.rwd, sign)
-        dig_P8 = pipe(0x9C, self.rwd, sign)
-        dig_P9 = pipe(0x9E, self.rwd, sign)
-
-        var1 = t_fine - 128000
-        var2 = var1 * var1 * dig_P6
-        var2 = var2 + ((var1 * dig_P5) << 17)
-        var2 = var2 + (dig_P4 << 35)
-        var1 = ((var1 * var1 * dig_P3) >> 8) + ((var1 * dig_P2) << 12)
-        var1 = ((1 << 47) + var1) * dig_P1 >> 33
-        if var1 == 0:
-            return 0.0
-        p = 1048576 - adc_P
-        p = (((p << 31) - var2) * 3125) // var1
-        var1 = (dig_P9 * (p >> 13) * (p >> 13)) >> 25
-        var2 = (dig_P8 * p) >> 19
-        p = ((p + var1 + var2) >> 8) + (dig_P7 << 4)
-        p /= 25600
-
-        return p
+        return compensate_pressure(adc_P, t_fine, self.calibration)
 
     def read_temperature(self) -> float:
         adc_T = self.read_raw_temperature()
@@ -128,3 +304,82 @@ class BMP280:
         _, t_fine = self.calculate_temperature(adc_T)
         adc_P = self.read_raw_pressure()
         return self.calculate_pressure(adc_P, t_fine)
+
+    def read_all(self) -> Sample:
+        adc_T, adc_P = self.read_raw()
+        timestamp = time.monotonic()
+        temperature, t_fine = self.calculate_temperature(adc_T)
+        pressure = self.calculate_pressure(adc_P, t_fine)
+        return Sample(temperature, pressure, adc_T, adc_P, timestamp)
+
+
+# Oversampling (temperature, pressure) from fastest to least noisy, in the
+# pairings the datasheet use cases recommend
+RATE_STEPS = (("x1", "x1"), ("x1", "x2"), ("x1", "x4"), ("x2", "x8"), ("x2", "x16"))
+CONVERSION_SHARE = 0.1  # of the period a conversion may take
+
+
+def rate_profile(period: float, base: Profile = PROFILES["weather"]) -> Profile:
+    """
+    The profile for one sample every ``period`` seconds: the most oversampling
+    whose conversion takes at most a tenth of the period, and the longest
+    standby that still gives a fresh normal-mode result every period. The
+    base profile's mode and filter are kept.
+    """
+    osrs_t, osrs_p = RATE_STEPS[0]
+    for step in RATE_STEPS:
+        if measurement_time(*step) <= period * CONVERSION_SHARE:
+            osrs_t, osrs_p = step
+    standby = period - measurement_time(osrs_t, osrs_p)
+    t_sb = "0.5ms"
+    for name in BMP280.T_SB:
+        if float(name.removesuffix("ms")) / 1000 <= standby:
+            t_sb = name
+    return base._replace(osrs_t=osrs_t, osrs_p=osrs_p, t_sb=t_sb)
+
+
+@register("bmp280")
+class BMP280Driver(Driver):
+    """Engine driver: one forced-mode conversion per read."""
+
+    tolerance = {"temperature": 0.05, "pressure": 0.05}  # °C, hPa
+
+    def __init__(
+        self,
+        name: str = "bmp280",
+        bus_number: int = 1,
+        i2c_addr: int = 0x76,
+        period: float = 1.0,
+        profile: str | dict | Profile = "weather",
+        bus=None,
+    ) -> None:
+        self.sensor = BMP280(bus_number=bus_number, i2c_addr=i2c_addr, bus=bus)
+        if isinstance(profile, str):
+            profile = PROFILES[profile]
+        elif isinstance(profile, dict):
+            profile = Profile(**profile)  # e.g. a table from the config file
+        self.profile = profile._replace(mode="forced")
+        self.sensor.profile = self.profile
+        super().__init__(name, bus_number, period, self.profile.measurement_time)
+
+    def read(self) -> dict[str, float | None]:
+        self.sensor.configure(self.profile)
+        time.sleep(self.profile.measurement_time * self.time_scale)
+        self.sensor.wait_ready()
+        sample = self.sensor.read_all()
+        return {"temperature": sample.temperature, "pressure": sample.pressure}
+
+    def set_period(self, period: float) -> None:
+        """Change the period and the oversampling with it, see rate_profile()."""
+        super().set_period(period)
+        # Profiles are chosen for real seconds, not simulated ones
+        self.profile = rate_profile(period / self.time_scale, self.profile)
+        self.sensor.profile = self.profile
+        self.cost = self.profile.measurement_time * self.time_scale
+
+    @classmethod
+    def fake(cls, i2c_addr: int = 0x76, **options) -> "BMP280Driver":
+        from sensors.fake import FakeSMBus, SimulatedBMP280
+
+        bus = FakeSMBus({i2c_addr: SimulatedBMP280()})
+        return cls(i2c_addr=i2c_addr, bus=bus, **options)
@@ -0,0 +1,223 @@
+import glob
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from sensors.registry import Driver, register
+
+W1_DEVICES = "/sys/bus/w1/devices/"
+CONVERSION_TIME = 0.75  # s, 12-bit conversion
+MAX_WAIT = 3  # conversion times to wait for a bulk conversion before reading
+
+
+def find_devices(base_dir: str = W1_DEVICES) -> list[str]:
+    """Folders of all DS18B20 probes (family code 28) on the 1-Wire bus."""
+    return sorted(glob.glob(os.path.join(base_dir, "28*")))
+
+
+def find_bulk_triggers(base_dir: str = W1_DEVICES) -> list[str]:
+    """``therm_bulk_read`` files of the bus masters that support them."""
+    pattern = os.path.join(base_dir, "w1_bus_master*", "therm_bulk_read")
+    return sorted(glob.glob(pattern))
+
+
+def parse_w1_slave(lines: list[str]) -> float | None:
+    """Temperature in °C from a w1_slave dump, or None if the CRC check failed."""
+    if len(lines) < 2 or lines[0].strip()[-3:] != "YES":
+        return None
+    equals_pos = lines[1].find("t=")
+    if equals_pos == -1:
+        return None
+    return float(lines[1][equals_pos + 2 :]) / 1000.0
+
+
+class ProbeReading(NamedTuple):
+    temperature: float | None  # °C, None if unreadable or the CRC failed
+    crc_ok: bool
+
+
+class W1Sample(NamedTuple):
+    """One reading of every probe, converted together."""
+
+    timestamp: float  # time.monotonic() when the conversion started
+    probes: dict[str, ProbeReading]
+
+    def temperatures(self) -> dict[str, float | None]:
+        return {
+            device_id: probe.temperature for device_id, probe in self.probes.items()
+        }
+
+
+class DS18B20:
+    """
+    Description:
+    The DS18B20 is a 1-Wire digital thermometer with 9 to 12-bit
+    resolution, read through the kernel's w1-therm sysfs interface.
+    """
+
+    def __init__(self, device_folder: str) -> None:
+        self.device_id = os.path.basename(device_folder)
+        self.device_file = os.path.join(device_folder, "w1_slave")
+
+    def read_temp_raw(self) -> list[str]:
+        with open(self.device_file, "r") as f:
+            lines = f.readlines()
+        return lines
+
+    def read_temp(self, retries: int = 5, retry_delay: float = 0.2) -> float | None:
+        for attempt in range(retries):
+            temperature = parse_w1_slave(self.read_temp_raw())
+            if temperature is not None:
+                return temperature
+            time.sleep(retry_delay)
+        return None
+
+    def read(self) -> ProbeReading:
+        """One attempt, no retries; a vanished probe reads as a CRC failure."""
+        try:
+            temperature = parse_w1_slave(self.read_temp_raw())
+        except OSError:
+            return ProbeReading(None, False)
+        return ProbeReading(temperature, temperature is not None)
+
+    def conversion_time(self) -> float:
+        """Conversion time in seconds as reported by w1-therm, if it says."""
+        try:
+            with open(
+                os.path.join(os.path.dirname(self.device_file), "conv_time")
+            ) as f:
+                return int(f.read()) / 1000
+        except (OSError, ValueError):
+            return CONVERSION_TIME
+
+
+class DS18B20Bus:
+    """
+    Description:
+    Every DS18B20 on the 1-Wire bus, converted at the same time.
+
+    Where the bus master offers ``therm_bulk_read`` one write starts the
+    conversion on all probes; after the conversion time each ``w1_slave``
+    returns the latched result without converting again. Without it the
+    probes are read from parallel threads so their conversions overlap.
+    """
+
+    def __init__(self, base_dir: str | None = None) -> None:
+        if base_dir is None:
+            from sensors.backend import current
+
+            base_dir = current().w1_root()
+        self.base_dir = base_dir
+        self.probes = [DS18B20(folder) for folder in find_devices(base_dir)]
+        self.triggers = find_bulk_triggers(base_dir)
+        self.conversion_time = max(
+            (probe.conversion_time() for probe in self.probes), default=CONVERSION_TIME
+        )
+        self.timeouts = 0  # bulk conversions that never reported done
+        self._pool: ThreadPoolExecutor | None = None
+
+    @property
+    def bulk(self) -> bool:
+        return bool(self.triggers)
+
+    def trigger(self) -> float:
+        """Start a conversion on every probe; returns the start time."""
+        started = time.monotonic()
+        for path in self.triggers:
+            with open(path, "w") as f:
+                f.write("trigger")
+        return started
+
+    def is_converting(self) -> bool:
+        """True while any bus master still reports a conversion in progress."""
+        for path in self.triggers:
+            with open(path) as f:
+                if f.read().strip() == "-1":
+                    return True
+        return False
+
+    def read(self, started: float | None = None) -> W1Sample:
+        """Collect every probe; after trigger() this does not convert again."""
+        started = time.monotonic() if started is None else started
+        if self.bulk or len(self.probes) < 2:
+            readings = [probe.read() for probe in self.probes]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=len(self.probes), thread_name_prefix="w1-probe"
+                )
+            readings = list(self._pool.map(DS18B20.read, self.probes))
+        return W1Sample(
+            started,
+            {probe.device_id: reading for probe, reading in zip(self.probes, readings)},
+        )
+
+    def sample(self, poll_interval: float = 0.01) -> W1Sample:
+        """
+        Blocking trigger, wait and read. A bus master still reporting a
+        conversion after MAX_WAIT conversion times is given up on and the
+        probes are read anyway, so a stuck master cannot hold the bus thread.
+        """
+        started = self.trigger()
+        if self.bulk:
+            time.sleep(self.conversion_time)
+            deadline = started + max(MAX_WAIT * self.conversion_time, poll_interval)
+            while self.is_converting():
+                if time.monotonic() >= deadline:
+                    self.timeouts += 1
+                    break
+                time.sleep(poll_interval)
+        return self.read(started)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+@register("ds18b20")
+class DS18B20Driver(Driver):
+    """Engine driver: every probe on the 1-Wire bus, one value per probe id."""
+
+    CONVERSION_TIME = CONVERSION_TIME
+    tolerance = {"*": 0.125}  # two steps of the 12-bit reading
+
+    def __init__(
+        self, name: str = "ds18b20", base_dir: str | None = None, period: float = 1.0
+    ) -> None:
+        self.sensor = DS18B20Bus(base_dir)
+        self.probes = self.sensor.probes
+        # Conversions overlap, so one cycle costs one conversion time
+        super().__init__(name, "w1", period, self.sensor.conversion_time)
+        self.owned_dir: str | None = None  # removed on close(), see fake()
+
+    def read(self) -> dict[str, float | None]:
+        return self.sensor.sample().temperatures()
+
+    def speed_up(self, factor: float) -> None:
+        super().speed_up(factor)
+        self.sensor.conversion_time /= factor
+
+    def close(self) -> None:
+        self.sensor.close()
+        if self.owned_dir is not None:
+            shutil.rmtree(self.owned_dir, ignore_errors=True)
+            self.owned_dir = None
+
+    @classmethod
+    def fake(
+        cls, temperatures: dict[str, float] | None = None, **options
+    ) -> "DS18B20Driver":
+        import tempfile
+
+        from sensors.fake import make_w1_tree
+
+        base_dir = make_w1_tree(
+            tempfile.mkdtemp(prefix="w1-"), temperatures or {"28-000000000001": 21.5}
+        )
+        driver = cls(base_dir=base_dir, **options)
+        driver.owned_dir = base_dir
+        driver.sensor.conversion_time = driver.cost = 0.0  # nothing to wait for
+        return driver
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Iterable, NamedTuple
+
+from sensors.adaptive import AdaptiveRate
+from sensors.aio import run_on_bus
+from sensors.registry import Driver, create
+
+
+class Reading(NamedTuple):
+    sensor: str
+    timestamp: float  # time.monotonic() when the read finished
+    values: dict[str, float | None]
+    latency: float = 0.0  # s from dispatch to result, bus queueing included
+    t_ns: int = 0  # time.monotonic_ns() when the device sampled, see _handle()
+
+
+class AcquisitionEngine:
+    """
+    Sample many drivers from one event loop.
+
+    Drivers are kept in a deadline heap. Each due read is dispatched to its
+    bus thread, so reads on different buses overlap while reads on the same
+    bus queue behind each other. Drivers that share a bus start staggered by
+    their cost so their schedules do not collide. Readings that carry an air
+    temperature are passed on to drivers with a ``temperature`` attribute.
+    Drivers with an entry in ``adaptive`` get their period from it after
+    every reading; a shorter period takes effect from that reading on.
+    """
+
+    def __init__(
+        self,
+        drivers: Iterable[Driver],
+        on_reading: Callable[[Reading], Awaitable[None] | None] | None = None,
+        adaptive: dict[str, AdaptiveRate] | None = None,
+    ) -> None:
+        self.drivers = list(drivers)
+        self.on_reading = on_reading
+        self.adaptive = adaptive or {}
+        self.errors: dict[str, int] = {driver.name: 0 for driver in self.drivers}
+        self.counts: dict[str, int] = {driver.name: 0 for driver in self.drivers}
+        self._busy: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._schedule: list[tuple[float, int]] = []
+        self._rescheduled = asyncio.Event()
+
+    def _initial_schedule(self, now: float) -> list[tuple[float, int]]:
+        offsets: dict[object, float] = {}
+        schedule = []
+        for index, driver in enumerate(self.drivers):
+            offset = offsets.get(driver.bus, 0.0)
+            offsets[driver.bus] = offset + driver.cost
+            schedule.append((now + offset, index))
+        heapq.heapify(schedule)
+        return schedule
+
+    async def _read(self, driver: Driver) -> None:
+        started = time.monotonic()
+        try:
+            values = await run_on_bus(driver.bus, driver.read)
+        except Exception as e:
+            self.errors[driver.name] += 1
+            print(f"Error reading {driver.name}: {e}")
+            return
+        finally:
+            self._busy.discard(driver.name)
+        self.counts[driver.name] += 1
+        try:
+            await self._handle(driver, values, started)
+        except Exception as e:
+            # A failing consumer counts against the driver, and must not
+            # escape this fire-and-forget task unseen
+            self.errors[driver.name] += 1
+            print(f"Error handling {driver.name} reading: {e}")
+
+    async def _handle(
+        self, driver: Driver, values: dict[str, float | None], started: float
+    ) -> None:
+        controller = self.adaptive.get(driver.name)
+        if controller is not None:
+            period = controller.update(time.monotonic(), values)
+            if period != driver.period:
+                driver.set_period(period)
+                self._reschedule(driver)
+        if values.get("temperature") is not None:
+            # Air temperature feeds drivers that compensate for it (ultrasonic
+            # speed of sound)
+            for other in self.drivers:
+                if hasattr(other, "temperature"):
+                    other.temperature = values["temperature"]
+        if self.on_reading is not None:
+            now = time.monotonic()
+            latency = now - started
+            # The device sampled during the last ``cost`` of the read, after
+            # any queueing on the bus; stamp the middle of that
+            sampled = time.monotonic_ns() - round(min(driver.cost, latency) * 5e8)
+            reading = Reading(driver.name, now, values, latency, sampled)
+            result = self.on_reading(reading)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def _reschedule(self, driver: Driver) -> None:
+        """Bring the driver's next read forward to one period from now."""
+        deadline = time.monotonic() + driver.period
+        for position, (scheduled, index) in enumerate(self._schedule):
+            if self.drivers[index] is driver and deadline < scheduled:
+                self._schedule[position] = (deadline, index)
+                heapq.heapify(self._schedule)
+                self._rescheduled.set()
+                return
+
+    async def _sleep(self, delay: float) -> None:
+        if not self.adaptive:
+            await asyncio.sleep(delay)
+            return
+        # Wake early if a reading moved a deadline forward
+        self._rescheduled.clear()
+        try:
+            async with asyncio.timeout(delay):
+                await self._rescheduled.wait()
+        except TimeoutError:
+            pass
+
+    async def run(self) -> None:
+        schedule = self._schedule = self._initial_schedule(time.monotonic())
+        try:
+            while True:
+                deadline, index = schedule[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    await self._sleep(delay)
+                    continue
+                driver = self.drivers[index]
+                # Skip a slot rather than pile up reads behind a slow driver
+                if driver.name not in self._busy:
+                    self._busy.add(driver.name)
+                    task = asyncio.create_task(self._read(driver))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                next_deadline = deadline + driver.period
+                if next_deadline < time.monotonic():
+                    next_deadline = time.monotonic() + driver.period
+                heapq.heapreplace(schedule, (next_deadline, index))
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    def close(self) -> None:
+        for driver in self.drivers:
+            driver.close()
+
+
+def build_engine(
+    specs: Iterable[dict],
+    fake: bool = False,
+    on_reading: Callable[[Reading], Awaitable[None] | None] | None = None,
+    speedup: float = 1.0,
+) -> AcquisitionEngine:
+    """
+    Create an engine from specs such as ``{"driver": "bmp280", "period": 1.0}``.
+    An ``adaptive`` table in a spec lets that sensor's period follow its
+    signal, see AdaptiveRate.from_spec(). ``speedup`` runs every driver that
+    many times faster, for simulated devices.
+    """
+    drivers = []
+    adaptive = {}
+    for spec in specs:
+        options = dict(spec)
+        rate = options.pop("adaptive", None)
+        driver = create(options.pop("driver"), fake=fake, **options)
+        if rate is not None:
+            controller = AdaptiveRate.from_spec(rate, driver.tolerance, driver.period)
+            driver.set_period(controller.period)
+            adaptive[driver.name] = controller
+        if speedup != 1.0:
+            driver.speed_up(speedup)
+            if rate is not None:
+                controller.min_period /= speedup
+                controller.max_period /= speedup
+                controller.period = driver.period
+        drivers.append(driver)
+    return AcquisitionEngine(drivers, on_reading, adaptive)
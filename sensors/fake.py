@@ -0,0 +1,399 @@
+import heapq
+import os
+import random
+import struct
+import threading
+import time
+from typing import Callable, Iterable
+
+from sensors.bmp280 import OVERSAMPLING
+
+Distance = float | None | Callable[[], float | None]
+
+# Example trimming values and raw readings from the BMP280 datasheet (section 8.1)
+BMP280_CALIBRATION = (
+    27504,
+    26435,
+    -1000,
+    36477,
+    -10685,
+    3024,
+    2855,
+    140,
+    -7,
+    15500,
+    -14600,
+    6000,
+)
+BMP280_ADC_T = 519888
+BMP280_ADC_P = 415148
+
+
+def pack_adc(value: int) -> bytes:
+    """Split a 20-bit ADC value into its msb/lsb/xlsb register bytes."""
+    return bytes([(value >> 12) & 0xFF, (value >> 4) & 0xFF, (value & 0x0F) << 4])
+
+
+def bmp280_registers(adc_T: int = BMP280_ADC_T, adc_P: int = BMP280_ADC_P) -> bytearray:
+    registers = bytearray(256)
+    registers[0x88:0xA0] = struct.pack("<HhhHhhhhhhhh", *BMP280_CALIBRATION)
+    registers[0xD0] = 0x58  # chip id
+    registers[0xF7:0xFA] = pack_adc(adc_P)
+    registers[0xFA:0xFD] = pack_adc(adc_T)
+    return registers
+
+
+class RegisterFile:
+    """A plain 256-byte register map behind one I2C address."""
+
+    def __init__(self, registers: bytearray | None = None) -> None:
+        self.registers = registers if registers is not None else bytearray(256)
+
+    def read(self, register: int, length: int) -> bytes:
+        return bytes(self.registers[register : register + length])
+
+    def write(self, register: int, data: bytes) -> None:
+        self.registers[register : register + len(data)] = data
+
+
+class SimulatedBMP280(RegisterFile):
+    """
+    BMP280 register model with conversion latency.
+
+    Writing forced mode to ctrl_meas starts a conversion that finishes after
+    the datasheet typical measurement time (times ``latency_scale``). Until
+    then the status register reports ``measuring`` and the data registers
+    still hold the previous result.
+    """
+
+    def __init__(
+        self,
+        adc_T: int = BMP280_ADC_T,
+        adc_P: int = BMP280_ADC_P,
+        latency_scale: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(bmp280_registers(adc_T, adc_P))
+        self.adc_T = adc_T
+        self.adc_P = adc_P
+        self.latency_scale = latency_scale
+        self.clock = clock
+        self.ready_at: float | None = None
+        self.conversions = 0
+
+    def conversion_time(self, ctrl_meas: int) -> float:
+        osrs = list(OVERSAMPLING.values())
+        t_os = osrs[min(ctrl_meas >> 5, 5)]
+        p_os = osrs[min((ctrl_meas >> 2) & 0x07, 5)]
+        milliseconds = 1 + 2 * t_os + (2 * p_os + 0.5 if p_os else 0)
+        return milliseconds / 1000 * self.latency_scale
+
+    def next_reading(self) -> tuple[int, int]:
+        return self.adc_T, self.adc_P
+
+    def _finish_conversion(self) -> None:
+        if self.ready_at is None or self.clock() < self.ready_at:
+            return
+        self.ready_at = None
+        self.conversions += 1
+        adc_T, adc_P = self.next_reading()
+        self.registers[0xF7:0xFA] = pack_adc(adc_P)
+        self.registers[0xFA:0xFD] = pack_adc(adc_T)
+        self.registers[0xF3] &= ~0x08
+        self.registers[0xF4] &= ~0x03  # back to sleep
+
+    def read(self, register: int, length: int) -> bytes:
+        self._finish_conversion()
+        return super().read(register, length)
+
+    def write(self, register: int, data: bytes) -> None:
+        self._finish_conversion()
+        super().write(register, data)
+        if register <= 0xF4 < register + len(data):
+            ctrl_meas = self.registers[0xF4]
+            if ctrl_meas & 0x03 in (1, 2) and self.ready_at is None:
+                self.ready_at = self.clock() + self.conversion_time(ctrl_meas)
+                self.registers[0xF3] |= 0x08
+
+
+class FakeSMBus:
+    """
+    In-memory stand-in for smbus.SMBus.
+
+    Each device address maps to a register file (a bare bytearray is wrapped
+    in a RegisterFile). Every call counts as one bus transaction, so drivers
+    can be checked for bus efficiency. ``delay`` makes each transaction block
+    like a slow physical bus.
+    """
+
+    def __init__(
+        self,
+        devices: dict[int, bytearray | RegisterFile] | None = None,
+        delay: float = 0.0,
+    ) -> None:
+        self.devices = {
+            addr: device if isinstance(device, RegisterFile) else RegisterFile(device)
+            for addr, device in (devices or {}).items()
+        }
+        self.delay = delay
+        self.transactions = 0
+        self.reads = 0
+        self.writes = 0
+
+    def reset_counters(self) -> None:
+        self.transactions = self.reads = self.writes = 0
+
+    def _device(self, addr: int) -> RegisterFile:
+        try:
+            return self.devices[addr]
+        except KeyError:
+            raise OSError(121, "Remote I/O error") from None
+
+    def _read(self, addr: int, register: int, length: int) -> bytes:
+        if self.delay:
+            time.sleep(self.delay)
+        self.transactions += 1
+        self.reads += 1
+        return self._device(addr).read(register, length)
+
+    def _write(self, addr: int, register: int, data: bytes) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        self.transactions += 1
+        self.writes += 1
+        self._device(addr).write(register, data)
+
+    def write_quick(self, addr: int) -> None:
+        self._write(addr, 0, b"")
+
+    def read_byte(self, addr: int) -> int:
+        return self._read(addr, 0, 1)[0]
+
+    def read_byte_data(self, addr: int, register: int) -> int:
+        return self._read(addr, register, 1)[0]
+
+    def read_word_data(self, addr: int, register: int) -> int:
+        return int.from_bytes(self._read(addr, register, 2), "little")
+
+    def read_i2c_block_data(self, addr: int, register: int, length: int) -> list[int]:
+        return list(self._read(addr, register, length))
+
+    def write_byte_data(self, addr: int, register: int, value: int) -> None:
+        self._write(addr, register, bytes([value]))
+
+    def write_i2c_block_data(self, addr: int, register: int, data: list[int]) -> None:
+        self._write(addr, register, bytes(data))
+
+    def close(self) -> None:
+        pass
+
+
+def w1_slave_text(temperature: float, crc_ok: bool = True) -> str:
+    """Contents of a w1-therm ``w1_slave`` file for the given reading."""
+    raw = round(temperature * 16) & 0xFFFF
+    data = f"{raw & 0xFF:02x} {raw >> 8:02x} 4b 46 7f ff 0c 10 1c"
+    status = "YES" if crc_ok else "NO"
+    return f"{data} : crc=1c {status}\n{data} t={round(temperature * 1000)}\n"
+
+
+def make_w1_tree(
+    root: str,
+    temperatures: dict[str, float],
+    bad_crc: Iterable[str] = (),
+    bulk: bool = False,
+    conv_time: int | None = None,
+) -> str:
+    """
+    Lay out a fake /sys/bus/w1/devices directory under ``root``. Probes in
+    ``bad_crc`` fail their CRC check; ``bulk`` adds a bus master with a
+    ``therm_bulk_read`` trigger and ``conv_time`` (ms) a per-probe
+    ``conv_time`` attribute.
+    """
+    bad_crc = set(bad_crc)
+    for device_id, temperature in temperatures.items():
+        folder = os.path.join(root, device_id)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "w1_slave"), "w") as f:
+            f.write(w1_slave_text(temperature, crc_ok=device_id not in bad_crc))
+        if conv_time is not None:
+            with open(os.path.join(folder, "conv_time"), "w") as f:
+                f.write(f"{conv_time}\n")
+    if bulk:
+        master = os.path.join(root, "w1_bus_master1")
+        os.makedirs(master, exist_ok=True)
+        with open(os.path.join(master, "therm_bulk_read"), "w") as f:
+            f.write("0\n")
+    return root
+
+
+class FakeGPIO:
+    """
+    Stand-in for the ``RPi.GPIO`` module.
+
+    Output levels are remembered and edge-detection callbacks are supported.
+    Like RPi.GPIO, input(), output() and add_event_detect() raise
+    RuntimeError on channels that were not set up (as an output / input).
+    An HC-SR04 attached with attach_hcsr04() answers a trigger pulse with an
+    echo pulse whose width matches the configured distance (plus optional
+    seeded Gaussian jitter); a distance of None never echoes. The distance
+    may also be a callable asked once per ping, e.g. a sensors.sim.Target.
+
+    In real-time mode echo edges fire from timer threads at wall-clock
+    times. With ``realtime=False`` time is simulated: the edges fire
+    synchronously and clock_ns() jumps to each edge, so timing is exact.
+    """
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+    UNKNOWN = -1
+    SERIAL = 40
+    SPI = 41
+    I2C = 42
+    HARD_PWM = 43
+
+    TRANSMIT_NS = 200_000  # burst time before the echo line goes high
+
+    def __init__(
+        self, realtime: bool = True, jitter_ns: float = 0.0, seed: int = 0
+    ) -> None:
+        self.realtime = realtime
+        self.jitter_ns = jitter_ns
+        self.rng = random.Random(seed)
+        self.now_ns = 0
+        self.mode: int | None = None
+        self.directions: dict[int, int] = {}
+        self.levels: dict[int, int] = {}
+        self.callbacks: dict[int, tuple[int, Callable[[int], None]]] = {}
+        # trigger pin -> (echo pin, distance in cm, None or a callable)
+        self.rangers: dict[int, tuple[int, Distance]] = {}
+        # echo pin -> (rise, fall) in clock_ns() time
+        self.pulses: dict[int, tuple[int, int]] = {}
+        # Pending real-time edges as (time, pin, level), fired by one thread
+        self._edges: list[tuple[int, int, int]] = []
+        self._edges_ready = threading.Condition()
+        self._edge_thread: threading.Thread | None = None
+
+    def clock_ns(self) -> int:
+        return time.perf_counter_ns() if self.realtime else self.now_ns
+
+    def setmode(self, mode: int) -> None:
+        self.mode = mode
+
+    def setwarnings(self, flag: bool) -> None:
+        pass
+
+    def setup(
+        self, pin: int, direction: int, pull_up_down: int = PUD_OFF, initial: int = 0
+    ) -> None:
+        self.directions[pin] = direction
+        self.levels.setdefault(pin, initial)
+
+    def gpio_function(self, pin: int) -> int:
+        # Pins power up as inputs
+        return self.directions.get(pin, self.IN)
+
+    def _require(self, pin: int, direction: int | None = None) -> None:
+        """RPi.GPIO refuses channels this process has not set up."""
+        if pin not in self.directions:
+            raise RuntimeError("You must setup() the GPIO channel first")
+        if direction is not None and self.directions[pin] != direction:
+            kind = "an input" if direction == self.IN else "an output"
+            raise RuntimeError(f"The GPIO channel has not been set up as {kind}")
+
+    def add_event_detect(
+        self, pin: int, edge: int, callback=None, bouncetime=None
+    ) -> None:
+        self._require(pin, self.IN)
+        if pin in self.callbacks:
+            raise RuntimeError(
+                "Conflicting edge detection already enabled for this GPIO channel"
+            )
+        self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin: int) -> None:
+        self.callbacks.pop(pin, None)
+
+    def set_input(self, pin: int, value: int) -> None:
+        """Drive an input pin, firing edge callbacks as real hardware would."""
+        previous = self.levels.get(pin, 0)
+        self.levels[pin] = value = int(bool(value))
+        if pin in self.callbacks and previous != value:
+            edge, callback = self.callbacks[pin]
+            if edge == self.BOTH or edge == (self.RISING if value else self.FALLING):
+                if callback is not None:
+                    callback(pin)
+
+    def output(self, pin: int, value) -> None:
+        self._require(pin, self.OUT)
+        previous = self.levels.get(pin, 0)
+        self.levels[pin] = int(bool(value))
+        if previous and not value and pin in self.rangers:
+            self._echo(*self.rangers[pin])
+
+    def _echo(self, echo_pin: int, distance: Distance) -> None:
+        if callable(distance):
+            distance = distance()
+        if distance is None:
+            return
+        width = 2 * distance / 34300 * 1e9
+        if self.jitter_ns:
+            width += self.rng.gauss(0, self.jitter_ns)
+        rise = self.clock_ns() + self.TRANSMIT_NS
+        fall = rise + max(int(width), 1)
+        self.pulses[echo_pin] = (rise, fall)
+        if self.realtime:
+            with self._edges_ready:
+                heapq.heappush(self._edges, (rise, echo_pin, 1))
+                heapq.heappush(self._edges, (fall, echo_pin, 0))
+                self._edges_ready.notify()
+            if self._edge_thread is None:
+                self._edge_thread = threading.Thread(
+                    target=self._inject_edges, name="fake-gpio-edges", daemon=True
+                )
+                self._edge_thread.start()
+        else:
+            self.now_ns = rise
+            self.set_input(echo_pin, 1)
+            self.now_ns = fall
+            self.set_input(echo_pin, 0)
+
+    def _inject_edges(self) -> None:
+        while True:
+            with self._edges_ready:
+                while not self._edges:
+                    self._edges_ready.wait()
+                at, pin, level = self._edges[0]
+                delay = (at - time.perf_counter_ns()) / 1e9
+                if delay > 0:
+                    self._edges_ready.wait(delay)
+                    continue
+                heapq.heappop(self._edges)
+            self.set_input(pin, level)
+
+    def input(self, pin: int) -> int:
+        self._require(pin)
+        if pin in self.pulses:
+            rise, fall = self.pulses[pin]
+            return int(rise <= self.clock_ns() < fall)
+        return self.levels.get(pin, 0)
+
+    def cleanup(self, pins=None) -> None:
+        for pin in [pins] if isinstance(pins, int) else pins or list(self.directions):
+            self.directions.pop(pin, None)
+            self.levels.pop(pin, None)
+            self.callbacks.pop(pin, None)
+
+    def attach_hcsr04(
+        self, trigger_pin: int, echo_pin: int, distance: Distance
+    ) -> None:
+        self.rangers[trigger_pin] = (echo_pin, distance)
@@ -0,0 +1,169 @@
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, NamedTuple
+
+
+class Point(NamedTuple):
+    t: float  # seconds, monotonic
+    value: float
+
+
+class Gap(NamedTuple):
+    """A missing sample, e.g. an ultrasonic ping that never echoed."""
+
+    t: float
+    reason: str = "timeout"
+
+
+Item = Point | Gap
+
+
+class Filter:
+    """
+    One streaming stage. update() takes a point and returns the filtered
+    value, or None to drop it; gap() is told about missing samples.
+    """
+
+    def update(self, t: float, value: float) -> float | None:
+        raise NotImplementedError
+
+    def gap(self, gap: Gap) -> None:
+        pass
+
+
+class RollingMedian(Filter):
+    """
+    Median of the last ``window`` points.
+
+    Keeps a FIFO and a sorted copy of the window; each update is one insert
+    and one removal by bisection, so the cost depends only on the (small,
+    fixed) window and not on the stream length.
+    """
+
+    def __init__(self, window: int = 5) -> None:
+        self.window = window
+        self.fifo: deque[float] = deque()
+        self.ordered: list[float] = []
+
+    def update(self, t: float, value: float) -> float:
+        self.fifo.append(value)
+        insort(self.ordered, value)
+        if len(self.fifo) > self.window:
+            del self.ordered[bisect_left(self.ordered, self.fifo.popleft())]
+        n = len(self.ordered)
+        middle = n // 2
+        if n % 2:
+            return self.ordered[middle]
+        return (self.ordered[middle - 1] + self.ordered[middle]) / 2
+
+
+class EMA(Filter):
+    """Exponential moving average with smoothing factor ``alpha``."""
+
+    def __init__(self, alpha: float = 0.3) -> None:
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def update(self, t: float, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class Kalman1D(Filter):
+    """
+    Scalar Kalman filter with a random-walk model.
+
+    ``process_noise`` is the variance added per second, ``measurement_noise``
+    the sensor variance. Uncertainty grows with elapsed time, so after a gap
+    the filter trusts the next measurement more.
+    """
+
+    def __init__(
+        self, process_noise: float = 1.0, measurement_noise: float = 4.0
+    ) -> None:
+        self.q = process_noise
+        self.r = measurement_noise
+        self.x: float | None = None
+        self.p = 0.0
+        self.t = 0.0
+
+    def update(self, t: float, value: float) -> float:
+        if self.x is None:
+            self.x, self.p, self.t = value, self.r, t
+            return value
+        self.p += self.q * max(t - self.t, 0.0)
+        self.t = t
+        gain = self.p / (self.p + self.r)
+        self.x += gain * (value - self.x)
+        self.p *= 1 - gain
+        return self.x
+
+
+class OutlierGate(Filter):
+    """
+    Drop points further than ``threshold`` robust deviations from a rolling
+    median; multi-path echoes show up as such isolated jumps. The deviation
+    scale is an exponential average of absolute residuals, so the gate is
+    O(1) on top of the median.
+    """
+
+    def __init__(
+        self, window: int = 5, threshold: float = 3.0, floor: float = 1.0
+    ) -> None:
+        self.median = RollingMedian(window)
+        self.threshold = threshold
+        self.floor = floor
+        self.scale = EMA(0.1)
+        self.rejected = 0
+
+    def update(self, t: float, value: float) -> float | None:
+        centre = self.median.update(t, value)
+        residual = abs(value - centre)
+        scale = self.scale.value if self.scale.value is not None else residual
+        if len(self.median.fifo) >= 3 and residual > self.threshold * max(
+            scale, self.floor
+        ):
+            self.rejected += 1
+            return None
+        self.scale.update(t, residual)
+        return value
+
+
+def _apply(stages: tuple[Filter, ...], item: Item) -> Item | None:
+    if isinstance(item, Gap):
+        for stage in stages:
+            stage.gap(item)
+        return item
+    value: float | None = item.value
+    for stage in stages:
+        value = stage.update(item.t, value)
+        if value is None:
+            return None
+    return Point(item.t, value)
+
+
+def pipeline(source: Iterable[Item], *stages: Filter) -> Iterator[Item]:
+    """Run points through the stages in order; gaps pass through untouched."""
+    for item in source:
+        result = _apply(stages, item)
+        if result is not None:
+            yield result
+
+
+async def apipeline(
+    source: AsyncIterable[Item], *stages: Filter
+) -> AsyncIterator[Item]:
+    """pipeline() for async sources."""
+    async for item in source:
+        result = _apply(stages, item)
+        if result is not None:
+            yield result
+
+
+def speed_of_sound(temperature: float) -> float:
+    """Speed of sound in dry air in cm/s at ``temperature`` °C."""
+    return 33130 * math.sqrt(1 + temperature / 273.15)
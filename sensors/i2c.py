@@ -0,0 +1,215 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds of the latency histogram buckets in µs; the last is open-ended
+LATENCY_BUCKETS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+LATENCY_BUCKETS_S = tuple(bound / 1e6 for bound in LATENCY_BUCKETS)
+SCAN_RANGE = range(0x03, 0x78)  # 7-bit addresses that are not reserved
+
+_buses: dict[int, "I2CBus"] = {}
+_buses_lock = threading.Lock()
+
+
+class DeviceStats:
+    """
+    Transaction counts, payload bytes and a latency histogram for one address.
+
+    ``present`` is False once a scan found nothing answering the address,
+    and True again after any transaction succeeds.
+    """
+
+    __slots__ = (
+        "reads",
+        "writes",
+        "errors",
+        "bytes_read",
+        "bytes_written",
+        "latency",
+        "histogram",
+        "present",
+    )
+
+    def __init__(self) -> None:
+        self.reads = self.writes = self.errors = 0
+        self.bytes_read = self.bytes_written = 0
+        self.latency = 0.0  # total seconds
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+        self.present = True
+
+    @property
+    def transactions(self) -> int:
+        return self.reads + self.writes
+
+    def record(self, write: bool, nbytes: int, seconds: float, ok: bool) -> None:
+        if write:
+            self.writes += 1
+            self.bytes_written += nbytes
+        else:
+            self.reads += 1
+            self.bytes_read += nbytes
+        if ok:
+            self.present = True
+        else:
+            self.errors += 1
+        self.latency += seconds
+        self.histogram[bisect_left(LATENCY_BUCKETS_S, seconds)] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "reads": self.reads,
+            "writes": self.writes,
+            "errors": self.errors,
+            "present": self.present,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "latency": self.latency,
+            "mean_latency": (
+                self.latency / self.transactions if self.transactions else 0.0
+            ),
+            "histogram": dict(zip(LATENCY_BUCKETS, self.histogram)),
+        }
+
+
+class I2CBus:
+    """
+    Description:
+    One shared, locked handle to an I2C bus with per-device statistics.
+
+    Offers the smbus methods the drivers use, so it can stand in wherever a
+    driver takes a ``bus``. Each call is one transaction under the bus lock;
+    hold transaction() to keep other threads off the bus for a sequence.
+    """
+
+    def __init__(self, handle, bus_number: int | None = None) -> None:
+        self.handle = handle
+        self.bus_number = bus_number
+        self.lock = threading.RLock()
+        self.devices: dict[int, DeviceStats] = {}
+
+    @contextmanager
+    def transaction(self) -> Iterator["I2CBus"]:
+        with self.lock:
+            yield self
+
+    def _call(
+        self, addr: int, write: bool, nbytes: int, fn: Callable[..., T], *args
+    ) -> T:
+        with self.lock:
+            started = perf_counter()
+            try:
+                result = fn(addr, *args)
+            except OSError:
+                self._stats(addr).record(write, 0, perf_counter() - started, False)
+                raise
+            elapsed = perf_counter() - started
+            self._stats(addr).record(write, nbytes, elapsed, True)
+        return result
+
+    def _stats(self, addr: int) -> DeviceStats:
+        stats = self.devices.get(addr)
+        if stats is None:
+            stats = self.devices[addr] = DeviceStats()
+        return stats
+
+    def read_byte(self, addr: int) -> int:
+        return self._call(addr, False, 1, self.handle.read_byte)
+
+    def read_byte_data(self, addr: int, register: int) -> int:
+        return self._call(addr, False, 1, self.handle.read_byte_data, register)
+
+    def read_word_data(self, addr: int, register: int) -> int:
+        return self._call(addr, False, 2, self.handle.read_word_data, register)
+
+    def read_i2c_block_data(self, addr: int, register: int, length: int) -> list[int]:
+        return self._call(
+            addr, False, length, self.handle.read_i2c_block_data, register, length
+        )
+
+    def write_quick(self, addr: int) -> None:
+        self._call(addr, True, 0, self.handle.write_quick)
+
+    def write_byte_data(self, addr: int, register: int, value: int) -> None:
+        self._call(addr, True, 1, self.handle.write_byte_data, register, value)
+
+    def write_i2c_block_data(self, addr: int, register: int, data: list[int]) -> None:
+        self._call(
+            addr, True, len(data), self.handle.write_i2c_block_data, register, data
+        )
+
+    def probe(self, addr: int) -> bool:
+        """True if a device acknowledges ``addr``."""
+        try:
+            # Like i2cdetect: a quick write, except where that could corrupt
+            # an EEPROM or lock up a write-only chip
+            if 0x30 <= addr <= 0x37 or 0x50 <= addr <= 0x5F:
+                self.read_byte(addr)
+            else:
+                self.write_quick(addr)
+        except OSError:
+            return False
+        return True
+
+    def scan(self, addresses: Iterable[int] = SCAN_RANGE) -> list[int]:
+        """
+        Addresses that answer, probed back to back under one bus lock.
+        Devices already in use that stop answering keep their statistics and
+        are marked absent; addresses first seen by this scan are only kept
+        if something answers.
+        """
+        addresses = list(addresses)
+        with self.lock:
+            known = set(self.devices)
+            found = [addr for addr in addresses if self.probe(addr)]
+            for addr in set(addresses).difference(found):
+                if addr in known:
+                    self.devices[addr].present = False
+                else:
+                    self.devices.pop(addr, None)
+        return found
+
+    def stats(self) -> dict[int, dict]:
+        return {addr: stats.as_dict() for addr, stats in sorted(self.devices.items())}
+
+    def close(self) -> None:
+        with self.lock:
+            self.handle.close()
+
+
+def _open_handle(bus_number: int):
+    try:
+        import smbus
+    except ImportError:
+        import smbus2 as smbus
+    return smbus.SMBus(bus_number)
+
+
+def open_bus(bus_number: int = 1, handle=None) -> I2CBus:
+    """
+    The process-wide I2CBus for ``bus_number``, opened on first use. Passing
+    ``handle`` (e.g. a sensors.fake.FakeSMBus) installs it for that number.
+    """
+    with _buses_lock:
+        bus = _buses.get(bus_number)
+        if bus is None or (handle is not None and bus.handle is not handle):
+            if handle is None:
+                handle = _open_handle(bus_number)
+            bus = _buses[bus_number] = I2CBus(handle, bus_number)
+        return bus
+
+
+def close_bus(bus_number: int) -> None:
+    with _buses_lock:
+        bus = _buses.pop(bus_number, None)
+    if bus is not None:
+        bus.close()
+
+
+def bus_stats() -> dict[int, dict[int, dict]]:
+    """Per-device statistics of every open bus, keyed by bus number."""
+    return {number: bus.stats() for number, bus in _buses.items()}
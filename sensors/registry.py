@@ -0,0 +1,69 @@
+from typing import Callable, Hashable
+
+DRIVERS: dict[str, type["Driver"]] = {}
+
+
+class Driver:
+    """
+    Base class for everything the acquisition engine can sample.
+
+    ``bus`` names the shared resource the read occupies (an I2C bus number,
+    "w1", "gpio"); reads on one bus are serialized. ``period`` is the
+    desired time between samples and ``cost`` the expected seconds of bus
+    time a single read takes. Fixed waits inside read() are multiplied by
+    ``time_scale``, which speed_up() lowers for simulated devices.
+    ``tolerance`` is the change per field an adaptive sample rate may miss
+    (sensors.adaptive), with "*" for every field.
+    """
+
+    kind = ""
+    time_scale = 1.0
+    tolerance: dict[str, float] = {}
+
+    def __init__(self, name: str, bus: Hashable, period: float, cost: float) -> None:
+        self.name = name
+        self.bus = bus
+        self.period = period
+        self.cost = cost
+
+    def read(self) -> dict[str, float | None]:
+        """Take one blocking sample; called on the bus thread."""
+        raise NotImplementedError
+
+    def set_period(self, period: float) -> None:
+        """Change the time between samples, e.g. from an adaptive controller."""
+        self.period = period
+
+    def speed_up(self, factor: float) -> None:
+        """Run ``factor`` times faster than real time, on simulated devices."""
+        self.period /= factor
+        self.cost /= factor
+        self.time_scale /= factor
+
+    def close(self) -> None:
+        pass
+
+    @classmethod
+    def fake(cls, **options) -> "Driver":
+        """Build the driver on top of a simulated backend."""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, bus={self.bus!r})"
+
+
+def register(kind: str) -> Callable[[type[Driver]], type[Driver]]:
+    def decorator(cls: type[Driver]) -> type[Driver]:
+        cls.kind = kind
+        DRIVERS[kind] = cls
+        return cls
+
+    return decorator
+
+
+def create(kind: str, fake: bool = False, **options) -> Driver:
+    # Importing the package registers all bundled drivers
+    import sensors  # noqa: F401
+
+    cls = DRIVERS[kind]
+    return cls.fake(**options) if fake else cls(**options)
@@ -0,0 +1,123 @@
+import asyncio
+import math
+import time
+from typing import AsyncIterator, Callable
+
+from sensors.aio import AsyncBMP280
+from sensors.bmp280 import (
+    BMP280,
+    MAX_POLLS,
+    POLL_INTERVAL,
+    PROFILES,
+    Profile,
+    Sample,
+)
+
+
+class JitterStats:
+    """Running mean/stdev/min/max of sample lateness (Welford), in seconds."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class ForcedModeSampler:
+    """
+    Drive a BMP280 in forced mode on a fixed period.
+
+    Each sample triggers one conversion, sleeps the datasheet maximum
+    conversion time, then polls the ``measuring`` status bit so a result is
+    only read once it is fresh. Between samples the chip sleeps. When an
+    ``enabled`` event is given, sampling pauses while it is cleared. All bus
+    I/O goes through the sensor's bus thread.
+    """
+
+    def __init__(
+        self,
+        sensor: BMP280 | AsyncBMP280,
+        profile: str | Profile = "weather",
+        period: float = 1.0,
+        poll_interval: float = POLL_INTERVAL,
+        max_polls: int = MAX_POLLS,
+        enabled: asyncio.Event | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if isinstance(sensor, BMP280):
+            sensor = AsyncBMP280(sensor)
+        if isinstance(profile, str):
+            profile = PROFILES[profile]
+        self.sensor = sensor
+        self.profile = profile._replace(mode="forced")
+        self.configured = False
+        self.period = period
+        self.poll_interval = poll_interval
+        self.max_polls = max_polls
+        self.enabled = enabled
+        self.clock = clock
+        self.jitter = JitterStats()
+        self.polls = 0
+        self.samples = 0
+        self.latency = 0.0  # s, trigger to result of the last sample
+
+    async def sample(self) -> Sample:
+        started = self.clock()
+        if not self.configured:
+            await self.sensor.configure(self.profile)
+            self.configured = True
+        else:
+            await self.sensor.trigger()
+        await asyncio.sleep(self.profile.measurement_time)
+        for _ in range(self.max_polls):
+            if not await self.sensor.is_measuring():
+                break
+            self.polls += 1
+            await asyncio.sleep(self.poll_interval)
+        else:
+            raise TimeoutError("BMP280 conversion did not finish")
+        sample = await self.sensor.read_all()
+        self.samples += 1
+        self.latency = self.clock() - started
+        return sample
+
+    async def __aiter__(self) -> AsyncIterator[Sample]:
+        deadline = self.clock()
+        while True:
+            if self.enabled is not None and not self.enabled.is_set():
+                await self.enabled.wait()
+                deadline = self.clock()
+            delay = deadline - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.jitter.add(self.clock() - deadline)
+            yield await self.sample()
+            deadline += self.period
+            if deadline < self.clock():
+                # Overran a whole period; restart the grid instead of bursting
+                deadline = self.clock()
@@ -0,0 +1,349 @@
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from sensors.bmp280 import (
+    Calibration,
+    OVERSAMPLING,
+    compensate_pressure,
+    compensate_temperature,
+)
+from sensors.fake import (
+    BMP280_CALIBRATION,
+    SimulatedBMP280,
+    make_w1_tree,
+    w1_slave_text,
+)
+from sensors.filters import speed_of_sound
+from sensors.ultrasonic import SPEED_OF_SOUND
+
+DAY = 86400.0
+ADC_RANGE = 1 << 20
+
+
+class SimClock:
+    """
+    Simulated epoch time running ``speedup`` times faster than the wall
+    clock, so a simulated day can pass in minutes.
+    """
+
+    def __init__(self, speedup: float = 1.0, start: float | None = None) -> None:
+        self.speedup = speedup
+        self.start = time.time() if start is None else start
+        self._origin = time.monotonic()
+
+    def __call__(self) -> float:
+        return self.start + (time.monotonic() - self._origin) * self.speedup
+
+
+class Drift:
+    """
+    Ornstein-Uhlenbeck process: a random walk pulled back towards zero with
+    time constant ``tau``, standard deviation ``sigma`` in the long run.
+
+    It is drawn exactly on a grid of ``tau / GRID`` seconds (at most one
+    second) counted from ``origin``, and interpolated in between, so its
+    value at a time depends on the rng and ``origin`` only, not on how often
+    it is read. Reads are expected in time order; an earlier time than the
+    latest read gets the value at the start of the latest grid step.
+    """
+
+    GRID = 100  # grid steps per time constant
+
+    def __init__(
+        self, sigma: float, tau: float, rng: random.Random, origin: float
+    ) -> None:
+        self.step = min(tau / self.GRID, 1.0)
+        self.decay = math.exp(-self.step / tau)
+        self.noise = sigma * math.sqrt(1 - self.decay * self.decay)
+        self.rng = rng
+        self.origin = origin
+        # Grid index of ``left``; ``right`` is the value one step later
+        self.index = 0
+        self.left = rng.gauss(0, sigma)
+        self.right = self._next(self.left)
+
+    def _next(self, value: float) -> float:
+        return value * self.decay + self.noise * self.rng.gauss(0, 1)
+
+    def at(self, t: float) -> float:
+        position = max(t - self.origin, 0.0) / self.step
+        index = int(position)
+        while self.index < index:
+            self.index += 1
+            self.left, self.right = self.right, self._next(self.right)
+        fraction = max(position - self.index, 0.0)
+        return self.left + (self.right - self.left) * fraction
+
+
+class Weather:
+    """
+    Seeded air temperature (°C) and pressure (hPa).
+
+    Temperature follows a daily cycle peaking mid-afternoon in local time
+    plus a slow drift. Pressure wanders over days like passing weather
+    systems and carries the twice-daily atmospheric tide. All devices of
+    one simulation read the same Weather, so their values agree. The drifts
+    start at ``origin``, by default the clock's ``start`` if it has one, so
+    the same seed and origin give the same weather at every time.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        clock: Callable[[], float] = time.time,
+        temperature: float = 20.0,
+        daily_swing: float = 4.0,
+        pressure: float = 1013.25,
+        origin: float | None = None,
+    ) -> None:
+        self.clock = clock
+        self.temperature = temperature
+        self.daily_swing = daily_swing
+        self.pressure = pressure
+        if origin is None:
+            origin = getattr(clock, "start", None)
+        self.origin = clock() if origin is None else origin
+        # One rng per drift, so neither depends on how far the other has run
+        self._temperature_drift = Drift(
+            1.0, 3 * 3600, random.Random(f"{seed}:temperature"), self.origin
+        )
+        self._pressure_drift = Drift(
+            6.0, 2 * DAY, random.Random(f"{seed}:pressure"), self.origin
+        )
+        self._lock = threading.Lock()
+
+    def at(self, t: float | None = None) -> tuple[float, float]:
+        t = self.clock() if t is None else t
+        local = time.localtime(t)
+        hour = local.tm_hour + local.tm_min / 60 + local.tm_sec / 3600
+        with self._lock:
+            temperature_drift = self._temperature_drift.at(t)
+            pressure_drift = self._pressure_drift.at(t)
+        temperature = (
+            self.temperature
+            + self.daily_swing * math.cos(2 * math.pi * (hour - 15) / 24)
+            + temperature_drift
+        )
+        # Semidiurnal tide, about ±1 hPa with maxima near 10:00 and 22:00
+        pressure = (
+            self.pressure + pressure_drift + math.cos(4 * math.pi * (hour - 10) / 24)
+        )
+        return temperature, pressure
+
+
+def inverse_temperature(temperature: float, cal: Calibration) -> int:
+    """Smallest adc_T that compensates to at least ``temperature``."""
+    lo, hi = 0, ADC_RANGE - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if compensate_temperature(mid, cal)[0] < temperature:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def inverse_pressure(pressure: float, t_fine: int, cal: Calibration) -> int:
+    """Smallest adc_P that compensates to at most ``pressure`` (hPa)."""
+    lo, hi = 0, ADC_RANGE - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if compensate_pressure(mid, t_fine, cal) > pressure:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class WeatherBMP280(SimulatedBMP280):
+    """
+    SimulatedBMP280 whose conversions measure a Weather.
+
+    Each conversion adds Gaussian noise shrinking with the oversampling
+    configured in ctrl_meas (datasheet table 4 at x1 is about 2.6 Pa and
+    0.005 °C) and the ADC values are found by inverting the compensation
+    formulas, so the driver's own arithmetic recovers the reading.
+    """
+
+    T_NOISE = 0.005  # °C RMS at x1
+    P_NOISE = 0.026  # hPa RMS at x1
+
+    def __init__(
+        self,
+        weather: Weather,
+        seed: int = 0,
+        offset: float = 0.0,
+        latency_scale: float = 1.0,
+    ) -> None:
+        super().__init__(latency_scale=latency_scale)
+        self.weather = weather
+        self.offset = offset  # °C of self-heating or placement
+        self.rng = random.Random(seed)
+        self.calibration = Calibration(*BMP280_CALIBRATION)
+
+    def next_reading(self) -> tuple[int, int]:
+        ctrl_meas = self.registers[0xF4]
+        osrs = list(OVERSAMPLING.values())
+        t_os = osrs[min(ctrl_meas >> 5, 5)] or 1
+        p_os = osrs[min((ctrl_meas >> 2) & 0x07, 5)] or 1
+        temperature, pressure = self.weather.at()
+        temperature += self.offset + self.rng.gauss(0, self.T_NOISE / math.sqrt(t_os))
+        pressure += self.rng.gauss(0, self.P_NOISE / math.sqrt(p_os))
+        adc_T = inverse_temperature(temperature, self.calibration)
+        _, t_fine = compensate_temperature(adc_T, self.calibration)
+        return adc_T, inverse_pressure(pressure, t_fine, self.calibration)
+
+
+class SimulatedW1:
+    """
+    A w1-therm sysfs tree whose probes follow a Weather.
+
+    Each probe reads the air temperature plus a fixed offset through a
+    first-order lag (a steel-sheathed probe responds in tens of seconds),
+    quantized to the 12-bit 1/16 °C step, and now and then fails its CRC.
+    A thread rewrites the ``w1_slave`` files every ``interval`` seconds.
+    """
+
+    LAG = 30.0  # s of simulated time
+    CRC_ERRORS = 0.002  # fraction of reads with a bad CRC
+
+    def __init__(
+        self,
+        weather: Weather,
+        probes: dict[str, float],
+        seed: int = 0,
+        interval: float = 0.75,
+        conv_time: int = 750,
+        root: str | None = None,
+    ) -> None:
+        self.weather = weather
+        self.offsets = probes
+        self.rng = random.Random(seed)
+        self.interval = interval
+        temperature, _ = weather.at()
+        self.temperatures = {
+            device_id: temperature + offset for device_id, offset in probes.items()
+        }
+        self.t = weather.clock()
+        if root is None:
+            # Prefer tmpfs; the files are rewritten many times a second
+            shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            root = tempfile.mkdtemp(prefix="w1-sim-", dir=shm)
+            self._owned = True
+        else:
+            self._owned = False
+        self.root = make_w1_tree(
+            root, self.temperatures, bulk=True, conv_time=conv_time
+        )
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def update(self) -> None:
+        t = self.weather.clock()
+        air, _ = self.weather.at(t)
+        keep = math.exp(-max(t - self.t, 0.0) / self.LAG)
+        self.t = t
+        for device_id, offset in self.offsets.items():
+            target = air + offset
+            current = target + (self.temperatures[device_id] - target) * keep
+            self.temperatures[device_id] = current
+            text = w1_slave_text(
+                round(current * 16) / 16, crc_ok=self.rng.random() >= self.CRC_ERRORS
+            )
+            path = os.path.join(self.root, device_id, "w1_slave")
+            # Replace atomically so a reader never sees half a file
+            with open(path + ".tmp", "w") as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.update()
+
+    def start(self) -> "SimulatedW1":
+        if self._thread is None:
+            self.update()
+            self._thread = threading.Thread(
+                target=self._run, name="w1-sim", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._owned:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+class Target:
+    """
+    What an HC-SR04 sees: a wall at ``distance`` cm that sways slowly, and
+    now and then someone walking through the beam.
+
+    distance() is what the echo timing implies: the true distance scaled
+    by the actual speed of sound over the 20 °C figure the driver assumes,
+    plus a little jitter, a missed echo (None) or a late multipath echo at
+    twice the distance. Beyond the 400 cm range nothing comes back. The
+    sway and the people walking past depend only on the seed and the time;
+    the per-ping jitter and lost echoes are drawn once per ping.
+    """
+
+    JITTER = 0.3  # cm RMS
+    DROPOUTS = 0.01
+    MULTIPATH = 0.005
+    PASSERS_BY = 1 / 120  # per simulated second
+    MAX_RANGE = 400.0
+
+    def __init__(
+        self,
+        weather: Weather,
+        seed: int = 0,
+        distance: float = 120.0,
+    ) -> None:
+        self.weather = weather
+        self.rng = random.Random(seed)
+        self.distance = distance
+        self._sway = Drift(3.0, 20.0, random.Random(f"{seed}:sway"), weather.origin)
+        # Poisson arrivals, drawn one after another in simulated time
+        self._passers = random.Random(f"{seed}:passers")
+        self._next_passer = weather.origin
+        self._passing_until = -math.inf
+        self._passer_distance = 0.0
+        self._arrive()
+
+    def _arrive(self) -> None:
+        self._next_passer += self._passers.expovariate(self.PASSERS_BY)
+
+    def true_distance(self, t: float) -> float:
+        while self._next_passer <= t:
+            arrived = self._next_passer
+            self._passing_until = arrived + self._passers.uniform(1.0, 4.0)
+            self._passer_distance = self._passers.uniform(30.0, self.distance * 0.8)
+            self._arrive()
+        if t < self._passing_until:
+            return self._passer_distance
+        return self.distance + self._sway.at(t)
+
+    def __call__(self) -> float | None:
+        t = self.weather.clock()
+        distance = self.true_distance(t)
+        roll = self.rng.random()
+        if roll < self.DROPOUTS:
+            return None
+        if roll < self.DROPOUTS + self.MULTIPATH:
+            distance *= 2
+        temperature, _ = self.weather.at(t)
+        distance *= speed_of_sound(temperature) / SPEED_OF_SOUND
+        distance += self.rng.gauss(0, self.JITTER)
+        if distance > self.MAX_RANGE:
+            return None
+        return distance
@@ -0,0 +1,200 @@
+import threading
+import time
+from typing import Callable, Iterator
+
+from sensors.filters import Gap, Item, Point, speed_of_sound
+from sensors.registry import Driver, register
+
+SPEED_OF_SOUND = 34300  # cm/s at about 20 °C, used when no temperature is known
+
+
+class HCSR04:
+    """
+    Description:
+    The HC-SR04 ultrasonic ranging module. A 10 µs pulse on the trigger pin
+    starts a burst; the echo pin stays high for the round-trip time.
+
+    Echo edges are timestamped with ``time.perf_counter_ns()`` (or the
+    stand-in GPIO's own clock_ns()) from edge-detection callbacks, and
+    measure() blocks on an event with a timeout instead of spinning on the
+    pin. Callbacks that are handed the new level use it; RPi.GPIO's only
+    get the channel, so its edges are taken as rise and fall in turn.
+    """
+
+    TRIGGER_TIME = 0.00001
+    # Longest echo accepted: 4 m and back at the speed of sound in cold air
+    MAX_TIME = 0.025
+    ECHO_DELAY = 0.002  # s from trigger to the echo going high, burst included
+
+    def __init__(
+        self,
+        trigger_pin: int = 23,
+        echo_pin: int = 24,
+        gpio=None,
+        max_time: float = MAX_TIME,
+        pull_up: bool = True,
+        clock: Callable[[], int] | None = None,
+    ) -> None:
+        if gpio is None:
+            from sensors.backend import current
+
+            gpio = current().gpio()
+        self.gpio = gpio
+        self.trigger_pin = trigger_pin
+        self.echo_pin = echo_pin
+        self.max_time = max_time
+        self.clock = clock or getattr(gpio, "clock_ns", time.perf_counter_ns)
+        self._rise: int | None = None
+        self._fall: int | None = None
+        self._done = threading.Event()
+        gpio.setmode(gpio.BCM)
+        gpio.setwarnings(False)
+        gpio.setup(trigger_pin, gpio.OUT)
+        pull = gpio.PUD_UP if pull_up else gpio.PUD_OFF
+        gpio.setup(echo_pin, gpio.IN, pull_up_down=pull)
+        gpio.output(trigger_pin, False)
+        gpio.add_event_detect(echo_pin, gpio.BOTH, callback=self._edge)
+
+    def _edge(self, channel: int, level: int | None = None) -> None:
+        now = self.clock()
+        if self._done.is_set():
+            # Stragglers of a finished or abandoned ping
+            return
+        if level is None:
+            # RPi.GPIO does not say which edge fired, and reading the pin
+            # back races a short echo that may already be over; after a
+            # trigger the edges come in turn, rise then fall
+            level = self._rise is None
+        if level:
+            self._rise = now
+        elif self._rise is not None:
+            self._fall = now
+            self._done.set()
+
+    def echo_time(self) -> float | None:
+        """Round-trip time in seconds, or None if no complete echo arrived."""
+        self._rise = self._fall = None
+        self._done.clear()
+        gpio = self.gpio
+        gpio.output(self.trigger_pin, True)
+        time.sleep(self.TRIGGER_TIME)
+        gpio.output(self.trigger_pin, False)
+        # Echo start plus the longest echo we accept
+        if not self._done.wait(self.ECHO_DELAY + self.max_time):
+            self._done.set()  # ignore stragglers from this ping
+            return None
+        return (self._fall - self._rise) / 1e9
+
+    def measure(self, speed_of_sound: float = SPEED_OF_SOUND) -> float | None:
+        """Distance in cm, or None if the echo never started or never ended."""
+        elapsed = self.echo_time()
+        if elapsed is None:
+            return None
+        return (elapsed * speed_of_sound) / 2.0
+
+    def stream(
+        self,
+        period: float = 0.1,
+        temperature: Callable[[], float | None] | None = None,
+    ) -> Iterator[Item]:
+        """
+        Ping every ``period`` seconds, yielding Points in cm and a Gap for
+        each missed echo. ``temperature`` returns the latest air temperature
+        in °C (e.g. from a BMP280) to correct the speed of sound.
+        """
+        next_ping = time.monotonic()
+        while True:
+            celsius = temperature() if temperature is not None else None
+            speed = SPEED_OF_SOUND if celsius is None else speed_of_sound(celsius)
+            distance = self.measure(speed)
+            now = time.monotonic()
+            yield Gap(now) if distance is None else Point(now, distance)
+            next_ping += period
+            time.sleep(max(next_ping - time.monotonic(), 0))
+
+    def close(self) -> None:
+        self.gpio.remove_event_detect(self.echo_pin)
+        self.gpio.cleanup((self.trigger_pin, self.echo_pin))
+
+
+class RangingEngine:
+    """
+    Ping several HC-SR04s one after another so no sensor hears another's
+    burst. After each ping the engine waits ``settle`` seconds for stray
+    echoes to die down before triggering the next sensor.
+    """
+
+    SETTLE = 0.06  # datasheet recommends a 60 ms measurement cycle
+
+    def __init__(self, sensors: dict[str, HCSR04], settle: float = SETTLE) -> None:
+        self.sensors = sensors
+        self.settle = settle
+
+    def sweep(self) -> dict[str, float | None]:
+        distances = {}
+        for name, sensor in self.sensors.items():
+            started = time.monotonic()
+            distances[name] = sensor.measure()
+            remaining = self.settle - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+        return distances
+
+    def __iter__(self) -> Iterator[dict[str, float | None]]:
+        while True:
+            yield self.sweep()
+
+    def close(self) -> None:
+        for sensor in self.sensors.values():
+            sensor.close()
+
+
+@register("hcsr04")
+class UltrasonicDriver(Driver):
+    """Engine driver for one HC-SR04; all ultrasonic sensors share the "gpio" bus
+    so their bursts never overlap."""
+
+    tolerance = {"distance": 2.0}  # cm
+
+    def __init__(
+        self,
+        name: str = "hcsr04",
+        trigger_pin: int = 23,
+        echo_pin: int = 24,
+        period: float = 0.5,
+        gpio=None,
+        clock: Callable[[], int] | None = None,
+    ) -> None:
+        self.sensor = HCSR04(
+            trigger_pin=trigger_pin, echo_pin=echo_pin, gpio=gpio, clock=clock
+        )
+        # Air temperature in °C for the speed of sound; set from a BMP280
+        self.temperature: float | None = None
+        # Holding the bus for the settle time keeps neighbours from crosstalk
+        cost = HCSR04.TRIGGER_TIME + RangingEngine.SETTLE
+        super().__init__(name, "gpio", period, cost)
+
+    def read(self) -> dict[str, float | None]:
+        started = time.monotonic()
+        speed = SPEED_OF_SOUND
+        if self.temperature is not None:
+            speed = speed_of_sound(self.temperature)
+        distance = self.sensor.measure(speed)
+        remaining = RangingEngine.SETTLE * self.time_scale - (
+            time.monotonic() - started
+        )
+        if remaining > 0:
+            time.sleep(remaining)
+        return {"distance": distance}
+
+    def close(self) -> None:
+        self.sensor.close()
+
+    @classmethod
+    def fake(cls, distance: float = 42.0, **options) -> "UltrasonicDriver":
+        from sensors.fake import FakeGPIO
+
+        gpio = FakeGPIO()
+        driver = cls(gpio=gpio, **options)
+        gpio.attach_hcsr04(driver.sensor.trigger_pin, driver.sensor.echo_pin, distance)
+        return driver
@@ -3,6 +3,7 @@
 pkgs.mkShell {
   packages = [
     (pkgs.python3.withPackages (p: with p; [
+      numpy
       python-socketio
       rpi-gpio
     ]))
@@ -1,227 +1,299 @@
-from gpiozero import Device
-from gpiozero.pins.rpigpio import RPiGPIOFactory
+import threading
 import time
 from datetime import datetime
+from typing import Callable
 
-# Set up GPIO factory
-Device.pin_factory = RPiGPIOFactory()
+# Physical header pin -> static description
+PIN_INFO = {
+    1: {"type": "POWER", "voltage": "3.3V"},
+    2: {"type": "POWER", "voltage": "5V"},
+    3: {"type": "GPIO", "gpio": 2, "alt_function": "I2C", "function_name": "SDA"},
+    4: {"type": "POWER", "voltage": "5V"},
+    5: {"type": "GPIO", "gpio": 3, "alt_function": "I2C", "function_name": "SCL"},
+    6: {"type": "GROUND"},
+    7: {"type": "GPIO", "gpio": 4},
+    8: {"type": "GPIO", "gpio": 14, "alt_function": "UART", "function_name": "TXD"},
+    9: {"type": "GROUND"},
+    10: {"type": "GPIO", "gpio": 15, "alt_function": "UART", "function_name": "RXD"},
+    11: {"type": "GPIO", "gpio": 17},
+    12: {"type": "GPIO", "gpio": 18, "alt_function": "PCM", "function_name": "CLK"},
+    13: {"type": "GPIO", "gpio": 27},
+    14: {"type": "GROUND"},
+    15: {"type": "GPIO", "gpio": 22},
+    16: {"type": "GPIO", "gpio": 23},
+    17: {"type": "POWER", "voltage": "3.3V"},
+    18: {"type": "GPIO", "gpio": 24},
+    19: {"type": "GPIO", "gpio": 10, "alt_function": "SPI", "function_name": "MOSI"},
+    20: {"type": "GROUND"},
+    21: {"type": "GPIO", "gpio": 9, "alt_function": "SPI", "function_name": "MISO"},
+    22: {"type": "GPIO", "gpio": 25},
+    23: {"type": "GPIO", "gpio": 11, "alt_function": "SPI", "function_name": "SCLK"},
+    24: {"type": "GPIO", "gpio": 8, "alt_function": "SPI", "function_name": "CE0"},
+    25: {"type": "GROUND"},
+    26: {"type": "GPIO", "gpio": 7, "alt_function": "SPI", "function_name": "CE1"},
+    27: {"type": "ID", "function_name": "SD"},
+    28: {"type": "ID", "function_name": "SC"},
+    29: {"type": "GPIO", "gpio": 5},
+    30: {"type": "GROUND"},
+    31: {"type": "GPIO", "gpio": 6},
+    32: {"type": "GPIO", "gpio": 12},
+    33: {"type": "GPIO", "gpio": 13},
+    34: {"type": "GROUND"},
+    35: {"type": "GPIO", "gpio": 19, "alt_function": "PCM", "function_name": "FS"},
+    36: {"type": "GPIO", "gpio": 16},
+    37: {"type": "GPIO", "gpio": 26},
+    38: {"type": "GPIO", "gpio": 20, "alt_function": "PCM", "function_name": "DIN"},
+    39: {"type": "GROUND"},
+    40: {"type": "GPIO", "gpio": 21, "alt_function": "PCM", "function_name": "DOUT"},
+}
 
+# Per-pin direction codes in the state table
+UNAVAILABLE, INPUT, OUTPUT, ALT = range(4)
+MODES = ("UNAVAILABLE", "INPUT", "OUTPUT", "ALT")
+# gpiozero pin functions; anything else is an alternate function
+FUNCTIONS = {"input": INPUT, "output": OUTPUT, "unknown": UNAVAILABLE}
 
-class GPIOMonitor:
-    def __init__(self):
-        self.pin_info = {
-            1: {"type": "POWER", "voltage": "3.3V"},
-            2: {"type": "POWER", "voltage": "5V"},
-            3: {
-                "type": "GPIO",
-                "gpio": 2,
-                "alt_function": "I2C",
-                "function_name": "SDA",
-            },
-            4: {"type": "POWER", "voltage": "5V"},
-            5: {
-                "type": "GPIO",
-                "gpio": 3,
-                "alt_function": "I2C",
-                "function_name": "SCL",
-            },
-            6: {"type": "GROUND"},
-            7: {"type": "GPIO", "gpio": 4},
-            8: {
-                "type": "GPIO",
-                "gpio": 14,
-                "alt_function": "UART",
-                "function_name": "TXD",
-            },
-            9: {"type": "GROUND"},
-            10: {
-                "type": "GPIO",
-                "gpio": 15,
-                "alt_function": "UART",
-                "function_name": "RXD",
-            },
-            11: {"type": "GPIO", "gpio": 17},
-            12: {
-                "type": "GPIO",
-                "gpio": 18,
-                "alt_function": "PCM",
-                "function_name": "CLK",
-            },
-            13: {"type": "GPIO", "gpio": 27},
-            14: {"type": "GROUND"},
-            15: {"type": "GPIO", "gpio": 22},
-            16: {"type": "GPIO", "gpio": 23},
-            17: {"type": "POWER", "voltage": "3.3V"},
-            18: {"type": "GPIO", "gpio": 24},
-            19: {
-                "type": "GPIO",
-                "gpio": 10,
-                "alt_function": "SPI",
-                "function_name": "MOSI",
-            },
-            20: {"type": "GROUND"},
-            21: {
-                "type": "GPIO",
-                "gpio": 9,
-                "alt_function": "SPI",
-                "function_name": "MISO",
-            },
-            22: {"type": "GPIO", "gpio": 25},
-            23: {
-                "type": "GPIO",
-                "gpio": 11,
-                "alt_function": "SPI",
-                "function_name": "SCLK",
-            },
-            24: {
-                "type": "GPIO",
-                "gpio": 8,
-                "alt_function": "SPI",
-                "function_name": "CE0",
-            },
-            25: {"type": "GROUND"},
-            26: {
-                "type": "GPIO",
-                "gpio": 7,
-                "alt_function": "SPI",
-                "function_name": "CE1",
-            },
-            27: {"type": "ID", "function_name": "SD"},
-            28: {"type": "ID", "function_name": "SC"},
-            29: {"type": "GPIO", "gpio": 5},
-            30: {"type": "GROUND"},
-            31: {"type": "GPIO", "gpio": 6},
-            32: {"type": "GPIO", "gpio": 12},
-            33: {"type": "GPIO", "gpio": 13},
-            34: {"type": "GROUND"},
-            35: {
-                "type": "GPIO",
-                "gpio": 19,
-                "alt_function": "PCM",
-                "function_name": "FS",
-            },
-            36: {"type": "GPIO", "gpio": 16},
-            37: {"type": "GPIO", "gpio": 26},
-            38: {
-                "type": "GPIO",
-                "gpio": 20,
-                "alt_function": "PCM",
-                "function_name": "DIN",
-            },
-            39: {"type": "GROUND"},
-            40: {
-                "type": "GPIO",
-                "gpio": 21,
-                "alt_function": "PCM",
-                "function_name": "DOUT",
-            },
-        }
 
-    def get_pin_display_info(self, pin_num, pin_info, state):
-        """Format pin information for display"""
-        if pin_info["type"] == "GPIO":
-            gpio_num = str(pin_info["gpio"])
-            if "alt_function" in pin_info:
-                pin_function = f"{pin_info['alt_function']} {pin_info['function_name']}"
-            else:
-                pin_function = ""
-        elif pin_info["type"] == "POWER":
-            gpio_num = "N/A"
-            pin_function = pin_info["voltage"]
-        elif pin_info["type"] == "ID":
-            gpio_num = "N/A"
-            pin_function = f"ID_{pin_info['function_name']}"
-        else:  # GROUND
-            gpio_num = "N/A"
+def get_pin_display_info(pin_num: int, pin_info: dict) -> dict:
+    """Static display columns for one header pin"""
+    if pin_info["type"] == "GPIO":
+        gpio_num = str(pin_info["gpio"])
+        if "alt_function" in pin_info:
+            pin_function = f"{pin_info['alt_function']} {pin_info['function_name']}"
+        else:
             pin_function = ""
+    elif pin_info["type"] == "POWER":
+        gpio_num = "N/A"
+        pin_function = pin_info["voltage"]
+    elif pin_info["type"] == "ID":
+        gpio_num = "N/A"
+        pin_function = f"ID_{pin_info['function_name']}"
+    else:  # GROUND
+        gpio_num = "N/A"
+        pin_function = ""
+    return {
+        "pin": pin_num,
+        "type": pin_info["type"],
+        "gpio": gpio_num,
+        "function": pin_function,
+    }
+
+
+# Computed once: the header never changes at run time
+HEADER = [get_pin_display_info(pin, info) for pin, info in sorted(PIN_INFO.items())]
+GPIO_PINS = {info["gpio"]: pin for pin, info in PIN_INFO.items() if "gpio" in info}
+
+
+class GPIOMonitor:
+    """
+    Description:
+    Mirrors the GPIO header in a compact state table: one bitmask of levels
+    indexed by BCM number plus a direction code per pin.
+
+    Pins are read through a gpiozero pin factory, which (unlike RPi.GPIO's
+    input()) can read a pin this process never set up. start() subscribes
+    once to edges on every input pin and reports only the pins that changed.
+    Output pins, and inputs whose edge detection could not be claimed, carry
+    no edge watch, so poll() re-reads those pins only; call it at a slow
+    interval. By default the factory is the selected sensors.backend's, or
+    gpiozero's default one on hardware.
+    gpiozero claims the pins it reads, so leave out pins another driver in
+    this process drives directly (``pins``).
+    """
+
+    def __init__(self, factory=None, pins: list[int] | None = None) -> None:
+        if factory is None:
+            from sensors.backend import current
+
+            factory = current().pin_factory()
+        if factory is None:
+            from gpiozero import Device
+
+            # Share gpiozero's default factory, and so its pins, with LEDs
+            if Device.pin_factory is None:
+                Device.pin_factory = Device._default_pin_factory()
+            factory = Device.pin_factory
+        self.factory = factory
+        self.pin_info = PIN_INFO
+        self.pins = sorted(GPIO_PINS if pins is None else pins)
+        self.levels = 0  # bit n is the level of BCM pin n
+        self.directions = bytearray(max(GPIO_PINS) + 1)
+        self.on_diff: Callable[[dict], None] | None = None
+        self._lock = threading.Lock()
+        self._pins: dict[int, object] = {}
+        self._watched: set[int] = set()
+        for bcm in self.pins:
+            self._refresh(bcm)
+
+    def _pin(self, bcm: int):
+        pin = self._pins.get(bcm)
+        if pin is None:
+            pin = self._pins[bcm] = self.factory.pin(bcm)
+        return pin
+
+    def _refresh(self, bcm: int) -> bool:
+        """Re-read one pin into the table; True if anything changed."""
+        try:
+            pin = self._pin(bcm)
+            # "input", "output" or an alternate function such as "i2c"
+            direction = FUNCTIONS.get(pin.function, ALT)
+            level = bool(pin.state) if direction in (INPUT, OUTPUT) else False
+        except Exception:
+            # gpiozero raises its own errors for pins it cannot claim
+            direction, level = UNAVAILABLE, False
+        bit = 1 << bcm
+        with self._lock:
+            previous = (self.directions[bcm], bool(self.levels & bit))
+            self.directions[bcm] = direction
+            self.levels = self.levels | bit if level else self.levels & ~bit
+        return previous != (direction, level)
+
+    def _edge(self, bcm: int) -> None:
+        if self._refresh(bcm) and self.on_diff is not None:
+            self.on_diff(self.diff([bcm]))
+
+    def _watch(self, bcm: int) -> None:
+        if self.directions[bcm] == INPUT and bcm not in self._watched:
+            pin = self._pin(bcm)
+            try:
+                pin.edges = "both"
+                pin.when_changed = lambda ticks, state: self._edge(bcm)
+            except Exception:
+                # Edge detection is taken or unsupported here; poll() still
+                # picks up the level
+                return
+            self._watched.add(bcm)
+        elif self.directions[bcm] != INPUT and bcm in self._watched:
+            self._pin(bcm).when_changed = None
+            self._watched.discard(bcm)
 
+    def start(self, on_diff: Callable[[dict], None]) -> None:
+        """Report changes to ``on_diff``; it may be called from GPIO threads."""
+        self.on_diff = on_diff
+        for bcm in self.pins:
+            self._watch(bcm)
+
+    def poll(self) -> dict | None:
+        """Re-read the pins without an edge watch; a diff or None."""
+        changed = [
+            bcm for bcm in self.pins if bcm not in self._watched and self._refresh(bcm)
+        ]
+        for bcm in changed:
+            self._watch(bcm)
+        if not changed:
+            return None
+        diff = self.diff(changed)
+        if self.on_diff is not None:
+            self.on_diff(diff)
+        return diff
+
+    def state(self, bcm: int) -> tuple[int, str]:
+        with self._lock:
+            return (self.levels >> bcm) & 1, MODES[self.directions[bcm]]
+
+    def diff(self, pins: list[int]) -> dict:
+        """Compact update: [header pin, level, mode] for each changed pin."""
         return {
-            "pin": pin_num,
-            "type": pin_info["type"],
-            "gpio": gpio_num,
-            "function": pin_function,
-            "value": state["value"],
-            "mode": state["mode"],
-            "active": state["active"],
+            "t": time.time(),
+            "pins": [[GPIO_PINS[bcm], *self.state(bcm)] for bcm in pins],
         }
 
-    def read_pin_states(self):
-        """Read current state of all pins"""
-        current_states = {}
+    def snapshot(self) -> dict:
+        """Static header metadata plus the full state, for new viewers."""
+        return {"header": HEADER, **self.diff(self.pins)}
 
-        for pin in self.pin_info.keys():
-            pin_info = self.pin_info[pin]
-
-            if pin_info["type"] == "GPIO":
-                try:
-                    device = Device.pin_factory.pin(pin_info["gpio"])
-                    current_states[pin] = {
-                        "value": device.state,
-                        "mode": "INPUT" if device.direction == "input" else "OUTPUT",
-                        "active": device.state == 1,
-                    }
-                except Exception as e:
-                    current_states[pin] = {
-                        "value": None,
-                        "mode": "UNAVAILABLE",
-                        "active": False,
-                    }
+    def read_pin_states(self) -> dict[int, dict]:
+        """Current state of all pins, from the table"""
+        current_states = {}
+        for pin, info in self.pin_info.items():
+            if info["type"] == "GPIO" and info["gpio"] in self.pins:
+                value, mode = self.state(info["gpio"])
+                current_states[pin] = {
+                    "value": value if mode != "UNAVAILABLE" else None,
+                    "mode": mode,
+                    "active": value == 1,
+                }
             else:
                 current_states[pin] = {
                     "value": "N/A",
-                    "mode": pin_info["type"],
+                    "mode": info["type"],
                     "active": "N/A",
                 }
-
         return current_states
 
-    def monitor_pins(self, show_power_ground=True):
+    def close(self) -> None:
+        for bcm in list(self._watched):
+            self._pin(bcm).when_changed = None
+        self._watched.clear()
+        self.on_diff = None
+
+    def monitor_pins(self, show_power_ground=True, poll_interval=1.0):
         """Continuously monitor and display pin states
 
+        The table is drawn once; afterwards only rows of changed pins are
+        rewritten in place.
+
         Args:
             show_power_ground (bool): If False, hide power and ground pins from display
+            poll_interval (float): Seconds between checks of output pins
         """
-        try:
-            while True:
-                states = self.read_pin_states()
-                print("\033[2J\033[H")  # Clear screen
-                print(
-                    f"Raspberry Pi Pin States at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-                print("-" * 85)
-                print(
-                    "PIN | TYPE    | GPIO | FUNCTION    | VALUE | MODE        | ACTIVE"
-                )
-                print("-" * 85)
-
-                for pin in sorted(self.pin_info.keys()):
-                    pin_info = self.pin_info[pin]
-                    # Skip power and ground pins if show_power_ground is False
-                    if not show_power_ground and pin_info["type"] in [
-                        "POWER",
-                        "GROUND",
-                        "ID",
-                    ]:
-                        continue
-
-                    display_info = self.get_pin_display_info(pin, pin_info, states[pin])
-                    print(
-                        f"{display_info['pin']:3} | "
-                        f"{display_info['type']:<7} | "
-                        f"{display_info['gpio']:<4} | "
-                        f"{display_info['function']:<11} | "
-                        f"{display_info['value']!s:5} | "
-                        f"{display_info['mode']:<10} | "
-                        f"{display_info['active']!s}"
-                    )
+        rows = [
+            info
+            for info in HEADER
+            if show_power_ground or info["type"] not in ("POWER", "GROUND", "ID")
+        ]
+        # Screen line of each header pin: title, rule, heading, rule, rows
+        lines = {info["pin"]: 5 + i for i, info in enumerate(rows)}
+        states = self.read_pin_states()
+        changes = threading.Event()
 
-                return
-                time.sleep(1)
+        def row(info: dict) -> str:
+            state = states[info["pin"]]
+            return (
+                f"{info['pin']:3} | "
+                f"{info['type']:<7} | "
+                f"{info['gpio']:<4} | "
+                f"{info['function']:<11} | "
+                f"{state['value']!s:5} | "
+                f"{state['mode']:<11} | "
+                f"{state['active']!s}"
+            )
 
+        def title() -> str:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            return f"\033[1;1H\033[2KRaspberry Pi Pin States at {now}"
+
+        print("\033[2J\033[H", end="")  # Clear screen
+        print(title())
+        print("-" * 85)
+        print("PIN | TYPE    | GPIO | FUNCTION    | VALUE | MODE        | ACTIVE")
+        print("-" * 85)
+        for info in rows:
+            print(row(info))
+
+        try:
+            self.start(lambda diff: changes.set())
+            while True:
+                changes.wait(poll_interval)
+                changes.clear()
+                self.poll()
+                current = self.read_pin_states()
+                updates = [
+                    info for info in rows if current[info["pin"]] != states[info["pin"]]
+                ]
+                states = current
+                out = [title()]
+                out += [
+                    f"\033[{lines[info['pin']]};1H\033[2K{row(info)}"
+                    for info in updates
+                ]
+                print("".join(out), end=f"\033[{5 + len(rows)};1H", flush=True)
         except KeyboardInterrupt:
             print("\nMonitoring stopped by user")
         except Exception as e:
             print(f"Error during monitoring: {e}")
+        finally:
+            self.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import math
+
+import pytest
+
+from sensors.adaptive import AdaptiveRate
+
+
+def run(rate: AdaptiveRate, signal, samples: int) -> list[float]:
+    """Sample ``signal`` at whatever period the controller asks for."""
+    t, periods = 0.0, []
+    for _ in range(samples):
+        periods.append(rate.update(t, {"value": signal(t)}))
+        t += rate.period
+    return periods
+
+
+def test_needs_two_samples_before_changing():
+    rate = AdaptiveRate(0.1, 10.0, 0.1, period=1.0)
+    assert rate.update(0.0, {"value": 0.0}) == 1.0
+    assert rate.update(1.0, {"value": 5.0}) == 1.0
+    assert rate.update(2.0, {"value": None}) == 1.0
+
+
+def test_backs_off_on_a_slow_linear_signal():
+    rate = AdaptiveRate(0.1, 10.0, 0.1, period=1.0)
+    periods = run(rate, lambda t: 0.003 * t + 1.0, 30)
+    steps = [b / a for a, b in zip(periods, periods[1:])]
+    assert all(step <= AdaptiveRate.SLOWER + 1e-9 for step in steps)
+    assert periods[-1] == 10.0 and rate.misses == 0
+
+
+def test_steep_ramp_is_sampled_by_its_rate_of_change():
+    rate = AdaptiveRate(0.1, 10.0, 0.1, period=10.0)
+    # 3 units/s is 30 tolerances/s; a perfect line, so it never misses
+    periods = run(rate, lambda t: 3.0 * t + 1.0, 10)
+    assert rate.misses == 0
+    assert periods[-1] == pytest.approx(AdaptiveRate.STEP * 0.1 / 3.0)
+
+
+def test_steps_up_when_the_signal_starts_changing():
+    rate = AdaptiveRate(0.1, 10.0, 0.1, period=10.0)
+    periods = run(rate, lambda t: 0.0 if t < 50 else 5 * math.sin(10 * t), 40)
+    assert periods[2] == 10.0  # flat so far
+    # Each sample at most halves the period, down to min_period
+    steps = [b / a for a, b in zip(periods, periods[1:])]
+    assert min(steps) >= AdaptiveRate.FASTER - 1e-9
+    assert min(periods) == pytest.approx(0.1)
+    assert rate.misses > 0
+
+
+def test_noise_keeps_the_period_short():
+    noise = [0.0, 1.0, -1.0, 0.5, -0.5] * 10
+    rate = AdaptiveRate(0.1, 10.0, 0.1, period=1.0)
+    for t, value in enumerate(noise):
+        rate.update(t * 0.1, {"value": value})
+    assert rate.period == 0.1
+
+
+def test_fields_without_a_tolerance_are_ignored():
+    rate = AdaptiveRate(0.1, 10.0, {"pressure": 0.1}, period=1.0)
+    for t in range(5):
+        rate.update(t, {"pressure": 1000.0, "temperature": (-1) ** t * 10.0})
+    assert rate.period > 1.0
+
+
+def test_from_spec_defaults():
+    rate = AdaptiveRate.from_spec(
+        {"tolerance": {"pressure": 0.05}}, {"pressure": 1.0, "temperature": 0.2}, 2.0
+    )
+    assert (rate.min_period, rate.max_period, rate.period) == (2.0, 20.0, 2.0)
+    assert rate.tolerance == {"pressure": 0.05, "temperature": 0.2}
+    with pytest.raises(ValueError):
+        AdaptiveRate(1.0, 0.5, 0.1)
+
+
+def test_scalar_tolerance_overrides_the_driver_defaults():
+    defaults = {"pressure": 0.05, "temperature": 0.05}
+    rate = AdaptiveRate.from_spec({"tolerance": 0.5}, defaults, 1.0)
+    assert rate.tolerance_for("pressure") == rate.tolerance_for("temperature") == 0.5
+    # A "*" entry does the same; named fields still win over it
+    rate = AdaptiveRate.from_spec(
+        {"tolerance": {"*": 0.5, "pressure": 0.1}}, defaults, 1.0
+    )
+    assert rate.tolerance_for("temperature") == 0.5
+    assert rate.tolerance_for("pressure") == 0.1
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+from sensors.aio import AsyncBMP280, AsyncDS18B20Bus, bus_executor, run_on_bus
+from sensors.bmp280 import BMP280
+from sensors.ds18b20 import MAX_WAIT, DS18B20Bus
+from sensors.fake import FakeSMBus, SimulatedBMP280, make_w1_tree
+
+
+class Tracker:
+    """Records how many calls are inside a bus transaction at once."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.active = 0
+        self.most = 0
+        self.threads: set[str] = set()
+
+    def transaction(self, duration: float = 0.005) -> None:
+        with self.lock:
+            self.active += 1
+            self.most = max(self.most, self.active)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(duration)
+        with self.lock:
+            self.active -= 1
+
+
+def test_one_bus_is_serialized_and_buses_overlap():
+    async def main(buses):
+        await asyncio.gather(
+            *(run_on_bus(bus, tracker.transaction) for bus in buses for _ in range(8))
+        )
+
+    tracker = Tracker()
+    asyncio.run(main(["test-serial"]))
+    assert tracker.most == 1
+    assert len(tracker.threads) == 1
+    assert bus_executor("test-serial") is bus_executor("test-serial")
+
+    tracker = Tracker()
+    asyncio.run(main(["test-a", "test-b"]))
+    assert tracker.most == 2
+
+
+def test_async_bmp280_runs_on_its_bus_thread():
+    class Recording(FakeSMBus):
+        threads: set[str] = set()
+
+        def _read(self, addr, register, length):
+            self.threads.add(threading.current_thread().name)
+            return super()._read(addr, register, length)
+
+    bus = Recording({0x76: SimulatedBMP280(latency_scale=0.1)})
+    sensor = BMP280(bus_number=7, bus=bus)
+
+    async def main():
+        asensor = AsyncBMP280(sensor)
+        await asensor.configure("weather")
+        await asensor.trigger()
+        while await asensor.is_measuring():
+            await asyncio.sleep(0.001)
+        return await asensor.read_all()
+
+    Recording.threads.clear()
+    sample = asyncio.run(main())
+    assert sample.temperature == 25.08
+    [thread] = Recording.threads
+    assert thread.startswith("i2c-7")
+
+
+def test_stuck_conversion_waits_max_wait_without_blocking(tmp_path):
+    class StuckBus(DS18B20Bus):
+        def is_converting(self) -> bool:
+            return True
+
+    probes = {"28-000000000001": 21.5}
+    root = make_w1_tree(str(tmp_path), probes, bulk=True, conv_time=20)
+    bus = StuckBus(root)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        sample = await AsyncDS18B20Bus(bus, poll_interval=0.002).sample()
+        elapsed = time.monotonic() - started
+        task.cancel()
+        return sample, elapsed, ticks
+
+    sample, elapsed, ticks = asyncio.run(main())
+    limit = MAX_WAIT * bus.conversion_time
+    assert limit <= elapsed < limit + 0.1
+    assert bus.timeouts == 1
+    assert sample.probes["28-000000000001"].temperature == 21.5
+    assert ticks > 10  # the event loop kept running during the wait
+    bus.close()
@@ -0,0 +1,65 @@
+import pytest
+
+from backend.align import Aligner
+
+S = 1_000_000_000  # ns
+
+
+def frames_of(aligner: Aligner, samples) -> list:
+    frames = []
+    for channel, t, values in samples:
+        frames += aligner.push(channel, t, values)
+    return frames + aligner.finish()
+
+
+def test_interpolates_and_holds_onto_the_grid():
+    aligner = Aligner(1.0, latency=10.0, channels=["a", "b"], hold=("b",))
+    frames = frames_of(
+        aligner,
+        [
+            ("a", 0, {"x": 0.0}),
+            ("b", 0, {"y": 5.0}),
+            ("b", 1.5 * S, {"y": 6.0}),
+            ("a", 2 * S, {"x": 20.0}),
+        ],
+    )
+    assert [frame.t for frame in frames] == [0, S, 2 * S]
+    assert [frame.values for frame in frames] == [
+        {"a.x": 0.0, "b.y": 5.0},
+        {"a.x": 10.0, "b.y": 5.0},
+        {"a.x": 20.0, "b.y": 6.0},
+    ]
+
+
+def test_edge_of_the_interpolation_window():
+    aligner = Aligner(1.0, latency=10.0, channels=["a"], max_age=2.0)
+    frames = frames_of(
+        aligner, [("a", S // 2, {"x": 0.0}), ("a", 5 * S + S // 2, {"x": 50.0})]
+    )
+    values = {frame.t // S: frame.values["a.x"] for frame in frames}
+    # 2.5 s is exactly max_age after the sample at 0.5 s; 3.5 s is past it
+    assert values[1] == pytest.approx(5.0)
+    assert values[2] == pytest.approx(15.0)
+    assert values[3] is None and values[4] is None
+    assert values[5] is None
+
+
+def test_points_wait_for_every_channel_until_the_latency():
+    aligner = Aligner(1.0, latency=2.0, channels=["a", "b"])
+    assert aligner.push("a", 0, {"x": 1.0}) == []
+    assert aligner.push("b", 0, {"y": 1.0}) == [(0, {"a.x": 1.0, "b.y": 1.0})]
+    assert aligner.push("a", 1 * S, {"x": 2.0}) == []
+    # b has gone quiet: a point is given up waiting for once a is 2 s past it
+    frames = aligner.push("a", 3 * S, {"x": 4.0})
+    assert [frame.t for frame in frames] == [S]
+    assert frames[0].values == {"a.x": 2.0, "b.y": 1.0}
+
+
+def test_late_and_foreign_samples_are_counted():
+    aligner = Aligner(1.0, latency=1.0, channels=["a"], capacity=2)
+    aligner.push("a", 2 * S, {"x": 1.0})
+    aligner.push("a", S, {"x": 0.0})
+    aligner.push("z", 3 * S, {"x": 0.0})
+    assert (aligner.late, aligner.ignored) == (1, 1)
+    with pytest.raises(ValueError):
+        Aligner(0.0)
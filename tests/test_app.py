@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from backend.app import SensorServer
+from backend.config import Config
+
+
+def test_one_worker_acquires_and_the_others_follow(tmp_path):
+    config = Config(data_dir=str(tmp_path), flush_interval=0.01, gpio_monitor=False)
+    leader, follower = SensorServer(config), SensorServer(config)
+
+    async def main():
+        started = {leader: asyncio.Event(), follower: asyncio.Event()}
+
+        def acquire(server):
+            # Stands in for the sensors: one sample, logged and flushed
+            async def run():
+                await server.record("bmp280", time.time(), {"temperature": 21.5})
+                server.logs["bmp280"].flush()
+                started[server].set()
+                await asyncio.Event().wait()
+
+            return run
+
+        leader.acquire = acquire(leader)
+        follower.acquire = acquire(follower)
+        leading = asyncio.create_task(leader.run_role())
+        await started[leader].wait()
+        following = asyncio.create_task(follower.run_role())
+        await asyncio.sleep(0.1)
+        assert leader.acquiring and not follower.acquiring
+        # The follower publishes what the leader logged
+        history = follower.history.query("bmp280", 0.0, time.time() + 1)
+        assert history["temperature"] == [21.5]
+
+        # Once the leader exits and drops the lock, the follower takes over
+        leading.cancel()
+        await asyncio.gather(leading, return_exceptions=True)
+        leader._lock_file.close()
+        await asyncio.wait_for(started[follower].wait(), 1.0)
+        assert follower.acquiring
+        following.cancel()
+        await asyncio.gather(following, return_exceptions=True)
+        leader._close_logs()
+        follower._close_logs()
+        follower._lock_file.close()
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from backend.binary import MAX_QUEUE, BinaryHub, Subscriber, decode
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.messages: list[bytes | str] = []
+
+    async def send_text(self, text: str) -> None:
+        self.messages.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.messages.append(data)
+
+
+def received(websocket: FakeWebSocket) -> list:
+    """Decode the messages in order, as a client holding the latest schema."""
+    schema, samples = None, []
+    for message in websocket.messages:
+        if isinstance(message, str):
+            schema = json.loads(message)
+        else:
+            assert schema is not None, "frame before any schema"
+            samples += decode(schema, message)
+    return samples
+
+
+async def drain(subscriber: Subscriber) -> None:
+    sender = asyncio.create_task(subscriber.send())
+    await asyncio.sleep(0)
+    sender.cancel()
+    await asyncio.gather(sender, return_exceptions=True)
+
+
+def test_round_trip_with_gaps():
+    async def main():
+        hub = BinaryHub()
+        subscriber = Subscriber(FakeWebSocket(), None)
+        hub.subscribers.add(subscriber)
+        hub.publish("bmp280", 1.5, {"temperature": 21.25, "pressure": None})
+        hub.publish("hcsr04", 2.0, {"distance": 10.5})
+        await drain(subscriber)
+        return received(subscriber.websocket)
+
+    assert asyncio.run(main()) == [
+        ("bmp280", 1.5, {"temperature": 21.25, "pressure": None}),
+        ("hcsr04", 2.0, {"distance": 10.5}),
+    ]
+
+
+def test_schema_survives_a_full_queue():
+    async def main():
+        hub = BinaryHub()
+        subscriber = Subscriber(FakeWebSocket(), None)
+        hub.subscribers.add(subscriber)
+        for i in range(MAX_QUEUE):
+            hub.publish("bmp280", float(i), {"temperature": 20.0})
+        # A new channel arrives while the client is a full queue behind,
+        # and its frames keep pushing older ones out
+        for i in range(MAX_QUEUE + 5):
+            hub.publish("hcsr04", 1000.0 + i, {"distance": float(i)})
+        await drain(subscriber)
+        return subscriber, received(subscriber.websocket)
+
+    subscriber, samples = asyncio.run(main())
+    assert subscriber.dropped == MAX_QUEUE + 5
+    assert len(samples) == MAX_QUEUE
+    assert {name for name, _, _ in samples} == {"hcsr04"}
+    assert samples[-1][2] == {"distance": float(MAX_QUEUE + 4)}
+
+
+def test_new_schema_goes_out_before_later_frames():
+    async def main():
+        hub = BinaryHub()
+        websocket = FakeWebSocket()
+        subscriber = Subscriber(websocket, None)
+        hub.subscribers.add(subscriber)
+        hub.publish("bmp280", 1.0, {"temperature": 20.0})
+        sender = asyncio.create_task(subscriber.send())
+        await asyncio.sleep(0)
+        # Queued while the sender is between messages
+        hub.publish("bmp280", 2.0, {"temperature": 21.0})
+        hub.publish("ds18b20", 2.0, {"28-000000000001": 19.5})
+        await asyncio.sleep(0)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        return websocket
+
+    websocket = asyncio.run(main())
+    assert [type(m) for m in websocket.messages] == [str, bytes, str, bytes]
+    assert [name for name, _, _ in received(websocket)] == [
+        "bmp280",
+        "bmp280",
+        "ds18b20",
+    ]
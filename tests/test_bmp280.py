@@ -0,0 +1,85 @@
+import pytest
+
+from sensors.bmp280 import (
+    BMP280,
+    PROFILES,
+    compensate_pressure,
+    compensate_temperature,
+)
+from sensors.fake import BMP280_ADC_P, BMP280_ADC_T, FakeSMBus, bmp280_registers
+
+
+@pytest.fixture
+def bus() -> FakeSMBus:
+    return FakeSMBus({0x76: bmp280_registers()})
+
+
+def test_calibration_is_one_block_read(bus):
+    sensor = BMP280(bus=bus)
+    assert (bus.transactions, bus.reads) == (1, 1)
+    cached = sensor.calibration
+    bus.reset_counters()
+    for _ in range(10):
+        sensor.read_temperature()
+        sensor.read_pressure()
+    # One ADC burst per temperature, two per pressure; no trimming re-reads
+    assert (bus.transactions, bus.writes) == (30, 0)
+    assert sensor.calibration is cached
+
+
+def test_read_all_is_one_transaction(bus):
+    sensor = BMP280(bus=bus)
+    bus.reset_counters()
+    sample = sensor.read_all()
+    assert bus.transactions == 1
+    assert sample.temperature == pytest.approx(sensor.read_temperature())
+    assert sample.pressure == pytest.approx(sensor.read_pressure())
+
+
+def test_unchanged_settings_are_not_rewritten(bus):
+    sensor = BMP280(bus=bus)
+    sensor.configure("indoor-nav")
+    assert bus.writes == 2
+    bus.reset_counters()
+    for _ in range(5):
+        sensor.configure("indoor-nav")
+        sensor.set_config(t_sb="0.5ms", filter="16")
+        sensor.read_all()
+    assert (bus.transactions, bus.writes) == (5, 0)
+
+    # Only the register that differs goes out
+    bus.reset_counters()
+    sensor.configure(PROFILES["indoor-nav"]._replace(t_sb="62.5ms"))
+    assert bus.writes == 1
+    assert bus.devices[0x76].registers[0xF5] >> 5 == BMP280.T_SB["62.5ms"]
+
+
+def test_invalidated_shadow_and_forced_triggers_reach_the_bus(bus):
+    sensor = BMP280(bus=bus)
+    sensor.configure("weather")
+    bus.reset_counters()
+    sensor.invalidate_registers()
+    sensor.configure("weather")
+    assert bus.writes == 2
+    # The chip sleeps after each forced conversion, so every trigger is sent
+    bus.reset_counters()
+    for _ in range(3):
+        sensor.trigger()
+    assert bus.writes == 3
+
+
+def test_read_all_is_one_burst_of_compensated_values(bus):
+    sensor = BMP280(bus=bus)
+    calls = []
+    read_block = bus.read_i2c_block_data
+    bus.read_i2c_block_data = lambda *args: calls.append(args) or read_block(*args)
+    sample = sensor.read_all()
+    assert calls == [(0x76, 0xF7, 6)]
+    assert (sample.adc_T, sample.adc_P) == (BMP280_ADC_T, BMP280_ADC_P)
+
+    temperature, t_fine = compensate_temperature(BMP280_ADC_T, sensor.calibration)
+    pressure = compensate_pressure(BMP280_ADC_P, t_fine, sensor.calibration)
+    assert (sample.temperature, sample.pressure) == (temperature, pressure)
+    # The worked example in datasheet section 8.1
+    assert sample.temperature == 25.08
+    assert sample.pressure == pytest.approx(1006.53, abs=0.01)
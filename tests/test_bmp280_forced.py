@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from sensors.bmp280 import BMP280, PROFILES
+from sensors.fake import FakeSMBus, SimulatedBMP280
+from sensors.scheduler import ForcedModeSampler, JitterStats
+
+
+def simulated(latency_scale: float = 1.0) -> tuple[SimulatedBMP280, FakeSMBus]:
+    device = SimulatedBMP280(latency_scale=latency_scale)
+    return device, FakeSMBus({0x76: device})
+
+
+async def collect(sampler: ForcedModeSampler, count: int) -> list:
+    samples = []
+    async for sample in sampler:
+        samples.append(sample)
+        if len(samples) == count:
+            return samples
+
+
+def test_jitter_stats():
+    stats = JitterStats()
+    assert stats.as_dict() == {
+        "count": 0,
+        "mean": 0.0,
+        "stdev": 0.0,
+        "min": 0.0,
+        "max": 0.0,
+    }
+    for value in (1.0, 2.0, 3.0, 4.0):
+        stats.add(value)
+    assert stats.count == 4
+    assert stats.mean == pytest.approx(2.5)
+    assert stats.stdev == pytest.approx(1.2909944)
+    assert (stats.min, stats.max) == (1.0, 4.0)
+
+
+@pytest.mark.parametrize("latency_scale", [1.0, 1.5])
+def test_every_sample_is_a_fresh_conversion(latency_scale):
+    device, bus = simulated(latency_scale)
+    sampler = ForcedModeSampler(BMP280(bus=bus), profile="indoor-nav", period=0.02)
+    samples = asyncio.run(collect(sampler, 5))
+    assert device.conversions == sampler.samples == 5
+    assert samples[-1].temperature == pytest.approx(25.08, abs=0.01)
+    assert sampler.jitter.count == 5
+    assert sampler.latency >= PROFILES["indoor-nav"].measurement_time
+    # A late conversion is caught by the status poll rather than read stale
+    assert (sampler.polls > 0) == (latency_scale > 1.0)
+
+
+def test_sampler_leaves_the_chip_in_forced_mode():
+    device, bus = simulated()
+    sampler = ForcedModeSampler(BMP280(bus=bus), profile="weather", period=0.01)
+    asyncio.run(collect(sampler, 3))
+    assert sampler.profile.mode == "forced"
+    assert device.registers[0xF4] & 0x03 == 0  # back to sleep between samples
+
+
+def test_stuck_status_bit_times_out():
+    bus = FakeSMBus({0x76: SimulatedBMP280()})
+    sensor = BMP280(bus=bus)
+    bus.devices[0x76].registers[0xF3] = 0xFF
+    with pytest.raises(TimeoutError):
+        sensor.wait_ready(poll_interval=0, max_polls=5)
+    sampler = ForcedModeSampler(sensor, poll_interval=0, max_polls=5)
+    sampler.configured = True
+    with pytest.raises(TimeoutError):
+        asyncio.run(sampler.sample())
+
+
+def test_wait_ready_counts_busy_polls():
+    device, bus = simulated()
+    sensor = BMP280(bus=bus)
+    assert sensor.wait_ready() == 0
+    sensor.configure(PROFILES["weather"]._replace(mode="forced"))
+    assert device.ready_at is not None
+    assert sensor.wait_ready() > 0
+    assert not sensor.is_measuring()
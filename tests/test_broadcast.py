@@ -0,0 +1,146 @@
+import asyncio
+
+from backend.broadcast import Broadcaster
+
+
+async def settle() -> None:
+    # Let delivery tasks run up to their ack
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class AckingClients:
+    """An emit that resolves when the test acknowledges the frame."""
+
+    def __init__(self, slow: set[str]) -> None:
+        self.slow = slow
+        self.frames: dict[str, list[dict]] = {}
+        self.acks: list[asyncio.Future] = []
+
+    async def __call__(self, event: str, data: dict, sid: str, ack: bool) -> None:
+        self.frames.setdefault(sid, []).append(data)
+        if ack and sid in self.slow:
+            ack = asyncio.get_running_loop().create_future()
+            self.acks.append(ack)
+            await ack
+
+
+def test_unacknowledged_client_is_coalesced_not_queued():
+    async def main():
+        emit = AckingClients(slow={"slow"})
+        broadcaster = Broadcaster(emit, ack_timeout=10.0)
+        for sid in ("fast", "slow"):
+            broadcaster.subscribe(sid, "bmp280", window=0.05, ack=True)
+        for n in range(5):
+            broadcaster.publish("bmp280", float(n), {"temperature": 20.0 + n})
+            broadcaster.flush(now=float(n))
+            await settle()
+        fast, slow = broadcaster.clients["fast"], broadcaster.clients["slow"]
+        assert (fast.sent, fast.dropped) == (5, 0)
+        # One frame waits for its ack; the frames after it are not queued
+        assert len(emit.frames["slow"]) == 1
+        assert (slow.sent, slow.dropped) == (0, 4)
+        assert slow.in_flight == {"bmp280"}
+        assert slow.held["bmp280"] == (4.0, {"temperature": 24.0})
+
+        # The ack releases the newest sample at once
+        emit.acks.pop().set_result(None)
+        await settle()
+        assert slow.sent == 1 and not slow.held
+        assert emit.frames["slow"][-1]["samples"] == [{"t": 4000, "temperature": 24.0}]
+
+        emit.acks.pop().set_result(None)
+        await settle()
+        broadcaster.publish("bmp280", 5.0, {"temperature": 25.0})
+        broadcaster.flush(now=5.0)
+        await settle()
+        assert len(emit.frames["slow"]) == 3
+        assert emit.frames["slow"][-1]["samples"][-1]["temperature"] == 25.0
+        assert (broadcaster.sent, broadcaster.dropped) == (8, 4)
+
+    asyncio.run(main())
+
+
+def test_ack_timeout_frees_the_channel():
+    async def main():
+        emit = AckingClients(slow={"stalled"})
+        broadcaster = Broadcaster(emit, ack_timeout=0.01)
+        broadcaster.subscribe("stalled", "bmp280", window=0.05, ack=True)
+        broadcaster.publish("bmp280", 0.0, {"temperature": 20.0})
+        broadcaster.flush(now=0.0)
+        await asyncio.sleep(0.05)
+        client = broadcaster.clients["stalled"]
+        assert (client.sent, client.timeouts) == (0, 1)
+        assert not client.in_flight
+        assert broadcaster.timeouts == 1
+
+    asyncio.run(main())
+
+
+def test_subscribe_groups_share_one_frame():
+    async def main():
+        emit = AckingClients(slow=set())
+        broadcaster = Broadcaster(emit)
+        broadcaster.subscribe("a", "bmp280", rate=1, format="columns")
+        broadcaster.subscribe("b", "bmp280", rate=1, format="columns")
+        assert len(broadcaster.channels["bmp280"]) == 1
+        for n in range(4):
+            broadcaster.publish("bmp280", n * 0.5, {"temperature": float(n)})
+        broadcaster.flush(now=0.0)
+        await settle()
+        assert emit.frames["a"][0] is emit.frames["b"][0]
+        assert emit.frames["a"][0]["columns"]["temperature"] == [0.0, 2.0]
+
+    asyncio.run(main())
+
+
+def test_clients_without_acks_are_paced_by_their_transport():
+    async def main():
+        # These clients never ack; only their transport queue can hold them up
+        emit = AckingClients(slow={"reader", "stalled"})
+        queued = {"reader": 0, "stalled": 10}
+        broadcaster = Broadcaster(emit, backlog=queued.__getitem__, max_backlog=4)
+        for sid in queued:
+            broadcaster.subscribe(sid, "bmp280", window=0.05)
+        for n in range(3):
+            broadcaster.publish("bmp280", float(n), {"temperature": 20.0 + n})
+            broadcaster.flush(now=float(n))
+            await settle()
+        reader, stalled = broadcaster.clients["reader"], broadcaster.clients["stalled"]
+        assert (reader.sent, reader.dropped) == (3, 0)
+        assert (stalled.sent, stalled.dropped) == (0, 3)
+
+        assert stalled.held["bmp280"] == (2.0, {"temperature": 22.0})
+
+        # Once the queue drains the held sample leads the next frame
+        queued["stalled"] = 0
+        broadcaster.publish("bmp280", 3.0, {"temperature": 23.0})
+        broadcaster.flush(now=3.0)
+        await settle()
+        assert stalled.sent == 1
+        assert [sample["t"] for sample in emit.frames["stalled"][-1]["samples"]] == [
+            2000,
+            3000,
+        ]
+
+    asyncio.run(main())
+
+
+def test_held_sample_goes_out_when_the_transport_drains():
+    async def main():
+        emit = AckingClients(slow=set())
+        queued = {"client": 10}
+        broadcaster = Broadcaster(emit, backlog=queued.__getitem__)
+        broadcaster.subscribe("client", "bmp280", window=10.0, format="columns")
+        broadcaster.publish("bmp280", 0.0, {"temperature": 20.0})
+        broadcaster.publish("bmp280", 0.5, {"temperature": 21.0})
+        assert broadcaster.flush(now=0.0) == 0
+        # No new window yet, but the held sample no longer has to wait
+        queued["client"] = 0
+        assert broadcaster.flush(now=1.0) == 1
+        await settle()
+        assert emit.frames["client"] == [
+            {"channel": "bmp280", "columns": {"t": [500], "temperature": [21.0]}}
+        ]
+
+    asyncio.run(main())
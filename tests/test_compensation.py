@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from sensors.bmp280 import Calibration, compensate_pressure, compensate_temperature
+from sensors.bmp280_batch import compensate_batch
+from sensors.fake import BMP280_ADC_P, BMP280_ADC_T, BMP280_CALIBRATION
+
+DATASHEET = Calibration(*BMP280_CALIBRATION)
+
+
+def random_calibration(rng: random.Random) -> Calibration:
+    u16 = lambda: rng.randrange(1, 1 << 16)  # noqa: E731  (dig_P1 == 0 is degenerate)
+    s16 = lambda: rng.randrange(-(1 << 15), 1 << 15)  # noqa: E731
+    return Calibration(u16(), s16(), s16(), u16(), *(s16() for _ in range(8)))
+
+
+def scalar(adc_T: list[int], adc_P: list[int], cal: Calibration) -> tuple[list, list]:
+    temperatures, pressures = [], []
+    for t_raw, p_raw in zip(adc_T, adc_P):
+        temp, t_fine = compensate_temperature(t_raw, cal)
+        temperatures.append(temp)
+        pressures.append(compensate_pressure(p_raw, t_fine, cal))
+    return temperatures, pressures
+
+
+def test_datasheet_example():
+    temperature, pressure = compensate_batch(
+        np.array([BMP280_ADC_T]), np.array([BMP280_ADC_P]), DATASHEET
+    )
+    assert temperature[0] == 25.08
+    assert pressure[0] == pytest.approx(1006.53, abs=0.01)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_bit_exact_with_scalar(seed):
+    rng = random.Random(seed)
+    cal = DATASHEET if seed == 0 else random_calibration(rng)
+    adc_T = [rng.randrange(1 << 20) for _ in range(200)]
+    adc_P = [rng.randrange(1 << 20) for _ in range(200)]
+    # The corners of the 20-bit range exercise the 64-bit wraparound
+    adc_T[:4] = [0, (1 << 20) - 1, 0, (1 << 20) - 1]
+    adc_P[:4] = [0, 0, (1 << 20) - 1, (1 << 20) - 1]
+    temperature, pressure = compensate_batch(np.array(adc_T), np.array(adc_P), cal)
+    expected_temperature, expected_pressure = scalar(adc_T, adc_P, cal)
+    assert temperature.tolist() == expected_temperature
+    assert pressure.tolist() == expected_pressure
+
+
+def test_zero_pressure_divisor():
+    # dig_P1 == 0 makes the pressure divisor zero; both paths report 0
+    cal = DATASHEET._replace(dig_P1=0)
+    adc = np.array([BMP280_ADC_T, BMP280_ADC_T]), np.array([BMP280_ADC_P, 0])
+    _, pressure = compensate_batch(*adc, cal)
+    assert pressure.tolist() == [0.0, 0.0]
+    assert scalar(*(a.tolist() for a in adc), cal)[1] == [0.0, 0.0]
+
+
+def test_accepts_lists_and_empty_input():
+    temperature, pressure = compensate_batch([BMP280_ADC_T], [BMP280_ADC_P], DATASHEET)
+    assert temperature.dtype == pressure.dtype == np.float64
+    temperature, pressure = compensate_batch(np.array([]), np.array([]), DATASHEET)
+    assert temperature.shape == pressure.shape == (0,)
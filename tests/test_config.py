@@ -0,0 +1,68 @@
+import pytest
+
+from backend.app import create_app
+from backend.config import CONFIG_ENV, DEFAULT_SENSORS, Config, load_config, parse_args
+
+SETTINGS = """
+port = 6000
+data_dir = "/var/lib/sensors"
+align_hold = ["hcsr04"]
+
+[[sensors]]
+driver = "hcsr04"
+period = 0.2
+
+[[rules]]
+channel = "hcsr04"
+field = "distance"
+op = "<"
+threshold = 20
+"""
+
+
+@pytest.fixture
+def settings(tmp_path) -> str:
+    path = tmp_path / "settings.toml"
+    path.write_text(SETTINGS)
+    return str(path)
+
+
+def test_file_sits_between_defaults_and_flags(settings):
+    config = load_config(
+        settings, defaults={"port": 5500, "fake": True}, port=7000, host=None
+    )
+    assert config.port == 7000  # the flag wins over the file
+    assert config.fake  # a default the file leaves alone
+    assert config.host == Config().host  # None means the flag was not given
+    assert config.data_dir == "/var/lib/sensors"
+    # Arrays become tuples, as in the built-in defaults
+    assert config.sensors == ({"driver": "hcsr04", "period": 0.2},)
+    assert config.align_hold == ("hcsr04",)
+    assert config.rules[0]["threshold"] == 20
+
+
+def test_unknown_settings_are_rejected(tmp_path):
+    path = tmp_path / "typo.toml"
+    path.write_text('prot = 6000\ndata_dir = "data"\nsensor = []\n')
+    with pytest.raises(ValueError, match=r"\['prot', 'sensor'\]"):
+        load_config(str(path))
+
+
+def test_command_line(settings):
+    config = parse_args(
+        ["--config", settings, "--fake", "--no-gpio-monitor", "--speedup", "20"]
+    )
+    assert (config.port, config.fake, config.gpio_monitor) == (6000, True, False)
+    assert config.speedup == 20.0
+    assert parse_args([]).sensors == DEFAULT_SENSORS
+
+
+def test_workers_get_the_config_from_the_environment(settings, monkeypatch):
+    config = load_config(settings, fake=True)
+    assert Config.from_json(config.to_json()) == config
+    # What server.py hands to uvicorn workers, read back by the app factory
+    monkeypatch.setenv(CONFIG_ENV, config.to_json())
+    app = create_app()
+    assert app.other_asgi_app.state.server.config == config
+    monkeypatch.delenv(CONFIG_ENV)
+    assert create_app().other_asgi_app.state.server.config == Config()
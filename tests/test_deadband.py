@@ -0,0 +1,58 @@
+import pytest
+
+from backend.deadband import DeadBand, DeltaEncoder, decode
+
+
+def test_dead_band_passes_changes_and_heartbeats():
+    band = DeadBand({"temperature": 0.05}, heartbeat=30.0)
+    checks = [
+        (0.0, 21.00, "key"),
+        (1.0, 21.03, None),  # inside the band
+        (2.0, 21.04, None),  # still within 0.05 of the last one sent
+        (3.0, 21.06, "change"),
+        (4.0, 21.02, None),
+        (33.0, 21.02, "key"),  # a heartbeat after 30 s of silence
+    ]
+    for t, value, kind in checks:
+        assert band.check(t, {"temperature": value}) == kind, t
+    assert (band.passed, band.suppressed) == (3, 3)
+
+
+def test_dead_band_treats_missing_values_as_changes():
+    band = DeadBand({"distance": 1.0})
+    band.check(0.0, {"distance": 50.0})
+    assert band.check(1.0, {"distance": None}) == "change"
+    assert band.check(2.0, {"distance": None}) is None
+    assert band.check(3.0, {"distance": 50.0}) == "change"
+    # Fields without a delta pass on any change
+    assert band.check(4.0, {"distance": 50.0, "other": 1.0}) == "change"
+
+
+def test_delta_frames_decode_exactly():
+    encoder = DeltaEncoder({"temperature": 0.01, "pressure": 0.01})
+    readings = [
+        {"temperature": 21.004, "pressure": 1006.5},
+        {"temperature": 21.004, "pressure": 1006.52},
+        {"temperature": 21.1, "pressure": 1006.52},
+        {"temperature": None, "pressure": 1006.52},
+        {"temperature": 21.2, "pressure": 1006.4},
+    ]
+    frames = [encoder.encode(t, values) for t, values in enumerate(readings)]
+    assert "key" in frames[0]
+    assert frames[1] == {"t": 1000, "d": {"pressure": 2}}
+    assert frames[2] == {"t": 2000, "d": {"temperature": 10}}
+    assert "key" in frames[3] and "key" in frames[4]  # a field went missing
+
+    state = None
+    for frame, values in zip(frames, readings):
+        state, decoded = decode(state, frame)
+        for field, value in values.items():
+            if value is None:
+                assert decoded[field] is None
+            else:
+                assert decoded[field] == pytest.approx(round(value, 2), abs=1e-9)
+
+
+def test_delta_before_key_is_rejected():
+    with pytest.raises(ValueError):
+        decode(None, {"t": 0, "d": {}})
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from sensors.aio import AsyncDS18B20Bus
+from sensors.ds18b20 import (
+    CONVERSION_TIME,
+    MAX_WAIT,
+    DS18B20Bus,
+    DS18B20Driver,
+    parse_w1_slave,
+)
+from sensors.fake import make_w1_tree, w1_slave_text
+
+PROBES = {f"28-00000000000{i}": 20.0 + i / 16 for i in range(4)}
+BAD = "28-000000000002"
+
+
+class StuckBus(DS18B20Bus):
+    """A bus master whose bulk conversion never reports done."""
+
+    def trigger(self) -> float:
+        started = super().trigger()
+        for path in self.triggers:
+            with open(path, "w") as f:
+                f.write("-1\n")
+        return started
+
+
+def check(sample, bad=BAD):
+    for device_id, temperature in PROBES.items():
+        probe = sample.probes[device_id]
+        if device_id == bad:
+            assert probe == (None, False)
+        else:
+            assert probe.crc_ok
+            assert probe.temperature == pytest.approx(temperature, abs=1e-3)
+
+
+def test_parse_w1_slave():
+    assert parse_w1_slave(w1_slave_text(-10.125).splitlines()) == -10.125
+    assert parse_w1_slave(w1_slave_text(21.5, crc_ok=False).splitlines()) is None
+    assert parse_w1_slave([]) is None
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_sample_reads_every_probe(tmp_path, bulk):
+    root = make_w1_tree(str(tmp_path), PROBES, bad_crc=[BAD], bulk=bulk, conv_time=10)
+    bus = DS18B20Bus(root)
+    assert len(bus.probes) == len(PROBES)
+    assert bus.bulk == bulk
+    assert bus.conversion_time == 0.01
+    check(bus.sample())
+    if bulk:
+        with open(bus.triggers[0]) as f:
+            assert f.read() == "trigger"
+    assert bus.timeouts == 0
+    bus.close()
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_async_sample(tmp_path, bulk):
+    root = make_w1_tree(str(tmp_path), PROBES, bad_crc=[BAD], bulk=bulk, conv_time=10)
+    bus = DS18B20Bus(root)
+    check(asyncio.run(AsyncDS18B20Bus(bus).sample()))
+    bus.close()
+
+
+def test_conversion_time_defaults_without_conv_time(tmp_path):
+    bus = DS18B20Bus(make_w1_tree(str(tmp_path), PROBES))
+    assert bus.conversion_time == CONVERSION_TIME
+
+
+def test_vanished_probe_reads_as_crc_failure(tmp_path):
+    bus = DS18B20Bus(make_w1_tree(str(tmp_path), PROBES))
+    os.remove(os.path.join(str(tmp_path), "28-000000000001", "w1_slave"))
+    check(bus.read(), bad="28-000000000001")
+
+
+def test_stuck_bulk_conversion_falls_back_to_reading(tmp_path):
+    root = make_w1_tree(str(tmp_path), PROBES, bad_crc=[BAD], bulk=True, conv_time=10)
+    bus = StuckBus(root)
+    started = time.monotonic()
+    check(bus.sample(poll_interval=0.001))
+    assert time.monotonic() - started < MAX_WAIT * bus.conversion_time + 0.5
+    assert bus.timeouts == 1
+
+
+def test_async_stuck_bulk_conversion_falls_back_to_reading(tmp_path):
+    root = make_w1_tree(str(tmp_path), PROBES, bad_crc=[BAD], bulk=True, conv_time=10)
+    bus = StuckBus(root)
+    check(asyncio.run(AsyncDS18B20Bus(bus, poll_interval=0.001).sample()))
+    assert bus.timeouts == 1
+
+
+def test_fake_driver_removes_its_tree():
+    driver = DS18B20Driver.fake({"28-000000000001": 21.5, "28-000000000002": -3.0})
+    root = driver.owned_dir
+    assert os.path.isdir(root)
+    assert driver.read() == {"28-000000000001": 21.5, "28-000000000002": -3.0}
+    driver.close()
+    assert not os.path.exists(root)
+    driver.close()  # closing twice is harmless
+
+
+def test_driver_leaves_a_given_tree_alone(tmp_path):
+    driver = DS18B20Driver(base_dir=make_w1_tree(str(tmp_path), PROBES))
+    driver.close()
+    assert os.path.isdir(os.path.join(str(tmp_path), BAD))
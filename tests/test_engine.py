@@ -0,0 +1,60 @@
+import asyncio
+
+from sensors.adaptive import AdaptiveRate
+from sensors.engine import AcquisitionEngine
+from sensors.registry import Driver
+
+
+class Counter(Driver):
+    def __init__(self, name: str = "counter", fail: bool = False) -> None:
+        super().__init__(name, bus=f"test-{name}", period=0.01, cost=0.0)
+        self.fail = fail
+        self.reads = 0
+
+    def read(self) -> dict[str, float | None]:
+        self.reads += 1
+        if self.fail:
+            raise OSError("no ack")
+        return {"value": float(self.reads)}
+
+
+async def run_for(engine: AcquisitionEngine, seconds: float) -> None:
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_failing_reads_are_counted():
+    engine = AcquisitionEngine([Counter(), Counter("broken", fail=True)])
+    asyncio.run(run_for(engine, 0.1))
+    assert engine.counts["counter"] > 0 and engine.errors["counter"] == 0
+    assert engine.counts["broken"] == 0 and engine.errors["broken"] > 0
+
+
+def test_failing_callback_counts_against_the_driver():
+    def on_reading(reading):
+        raise ValueError("consumer broke")
+
+    async def main():
+        unretrieved = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: unretrieved.append(context))
+        engine = AcquisitionEngine([Counter()], on_reading)
+        await run_for(engine, 0.1)
+        return engine, unretrieved
+
+    engine, unretrieved = asyncio.run(main())
+    assert engine.errors["counter"] == engine.counts["counter"] > 0
+    assert unretrieved == []
+
+
+def test_failing_controller_counts_against_the_driver():
+    class Broken(AdaptiveRate):
+        def update(self, now, values):
+            raise ZeroDivisionError
+
+    controller = Broken(min_period=0.01, max_period=1.0, tolerance=1.0)
+    engine = AcquisitionEngine([Counter()], adaptive={"counter": controller})
+    asyncio.run(run_for(engine, 0.1))
+    assert engine.errors["counter"] > 0
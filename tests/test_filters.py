@@ -0,0 +1,67 @@
+import pytest
+
+from sensors.filters import (
+    Gap,
+    Kalman1D,
+    OutlierGate,
+    Point,
+    RollingMedian,
+    pipeline,
+    speed_of_sound,
+)
+
+
+def test_rolling_median_after_eviction():
+    median = RollingMedian(window=3)
+    assert [median.update(t, v) for t, v in enumerate([5.0, 1.0])] == [5.0, 3.0]
+    assert median.update(2, 9.0) == 5.0
+    # 5 leaves the window: median of 1, 9, 2
+    assert median.update(3, 2.0) == 2.0
+    assert list(median.fifo) == [1.0, 9.0, 2.0]
+    assert median.ordered == [1.0, 2.0, 9.0]
+    # Evicting a duplicate removes only one copy
+    for t, value in enumerate([2.0, 2.0, 7.0], start=4):
+        median.update(t, value)
+    assert median.ordered == [2.0, 2.0, 7.0]
+
+
+def test_kalman_converges_and_trusts_a_measurement_after_a_gap():
+    kalman = Kalman1D(process_noise=1.0, measurement_noise=4.0)
+    assert kalman.update(0.0, 10.0) == 10.0
+    for t in range(1, 50):
+        estimate = kalman.update(t * 0.1, 20.0)
+    assert estimate == pytest.approx(20.0, abs=0.1)
+    p_steady = kalman.p
+    # A long silence lets uncertainty grow, so the next point moves it further
+    after_gap = Kalman1D(1.0, 4.0)
+    after_gap.update(0.0, 10.0)
+    short = Kalman1D(1.0, 4.0)
+    short.update(0.0, 10.0)
+    assert after_gap.update(30.0, 20.0) - 10 > short.update(0.1, 20.0) - 10
+    assert p_steady < 4.0
+
+
+def test_outlier_gate_drops_isolated_jumps():
+    gate = OutlierGate(window=5, threshold=3.0, floor=1.0)
+    values = [100.0, 100.5, 99.8, 100.2, 250.0, 100.1, 99.9]
+    passed = [gate.update(t, v) for t, v in enumerate(values)]
+    assert passed == [100.0, 100.5, 99.8, 100.2, None, 100.1, 99.9]
+    assert gate.rejected == 1
+
+
+def test_pipeline_passes_gaps_and_drops_rejected_points():
+    source = [Point(0, 50.0), Point(1, 50.0), Point(2, 50.0), Gap(3)]
+    source += [Point(4, 400.0), Point(5, 51.0)]
+    out = list(pipeline(source, OutlierGate(), RollingMedian(3)))
+    assert out == [
+        Point(0, 50.0),
+        Point(1, 50.0),
+        Point(2, 50.0),
+        Gap(3),
+        Point(5, 50.0),
+    ]
+
+
+def test_speed_of_sound():
+    assert speed_of_sound(0.0) == 33130
+    assert speed_of_sound(20.0) == pytest.approx(34350, rel=1e-3)
@@ -0,0 +1,150 @@
+import asyncio
+import shutil
+
+from backend.gateway import (
+    HELLO,
+    Gateway,
+    Spool,
+    Uplink,
+    decode_batch,
+    encode_batch,
+    write_message,
+)
+
+
+class Central:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.received: list[tuple[str, float]] = []
+
+    async def publish(self, channel: str, t: float, values: dict) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append((channel, t))
+
+
+class Edge:
+    """One node: a spool in ``directory`` and an uplink task that can be killed."""
+
+    def __init__(self, node: str, directory: str, port: int) -> None:
+        self.node = node
+        self.directory = directory
+        self.port = port
+        self.sent: list[tuple[str, float]] = []
+        self.start()
+
+    def start(self) -> None:
+        # A fresh Spool over the same directory, as after a process restart
+        self.spool = Spool(self.directory, segment_bytes=256, fsync=False)
+        self.uplink = Uplink(
+            self.node, "127.0.0.1", self.port, self.spool, interval=3600, window=4
+        )
+        self.task = asyncio.create_task(self.uplink.run())
+
+    async def kill(self) -> None:
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.spool.close()
+
+    def add(self, batches: int, per_batch: int = 3) -> None:
+        for _ in range(batches):
+            for _ in range(per_batch):
+                t = 1000.0 + len(self.sent)
+                self.uplink.add("bmp280", t, {"temperature": t})
+                self.sent.append((f"{self.node}:bmp280", t))
+            self.uplink.seal()
+
+    async def drained(self, timeout: float = 5.0) -> None:
+        async with asyncio.timeout(timeout):
+            while self.spool.pending or not self.uplink.connected:
+                await asyncio.sleep(0.01)
+
+
+def test_batch_round_trip():
+    samples = [("a", 1.5, {"x": 1.0, "y": None}), ("b", 2.0, {"z": 3.0})]
+    samples.append(("a", 1.75, {"x": 2.0, "y": 4.0}))
+    decoded = decode_batch(encode_batch(samples))
+    assert sorted(decoded) == sorted(samples)
+
+
+def test_spool_survives_reopen_and_acks(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=64, fsync=False)
+    for i in range(5):
+        assert spool.put(b"x" * 40) == i + 1
+    spool.ack(2)
+    spool.close()
+    spool = Spool(str(tmp_path), segment_bytes=64, fsync=False)
+    assert [entry.seq for entry in spool.pending] == [3, 4, 5]
+    assert (spool.acked, spool.last_seq) == (2, 5)
+    assert spool.put(b"y") == 6
+
+
+def test_loopback_delivers_exactly_once_through_restarts(tmp_path):
+    async def main():
+        central = Central(delay=0.002)
+        gateway = Gateway(central.publish, str(tmp_path / "gateway.json"))
+        server = await asyncio.start_server(gateway.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        a = Edge("a", str(tmp_path / "a"), port)
+        b = Edge("b", str(tmp_path / "b"), port)
+
+        a.add(3)
+        b.add(3)
+        await a.drained()
+        await b.drained()
+
+        # Kill a's uplink with batches on the wire: the gateway applies them
+        # but the acks never arrive, so the restarted uplink sends them again
+        a.add(8)
+        while central.received[-1] != ("a:bmp280", 1009.0):
+            await asyncio.sleep(0.001)
+        await a.kill()
+        a.start()
+        a.add(2)
+        await a.drained()
+        assert gateway.nodes["a"].duplicates > 0
+
+        # b loses its spool and numbers batches from 1 again, spooling more
+        # than the gateway had applied before it reconnects
+        await b.kill()
+        shutil.rmtree(b.directory)
+        b.port = 1  # nothing listens here
+        b.start()
+        b.add(6)
+        await b.kill()
+        b.port = port
+        b.start()
+        await b.drained()
+
+        await a.kill()
+        await b.kill()
+        server.close()
+        for writer in list(gateway.connections):
+            writer.transport.abort()
+        await asyncio.sleep(0.05)  # let the handlers see the abort
+        return central, gateway, a.sent + b.sent
+
+    central, gateway, sent = asyncio.run(main())
+    assert len(central.received) == len(set(central.received)), "duplicated"
+    assert sorted(central.received) == sorted(sent), "lost"
+    assert gateway.nodes["a"].lost == gateway.nodes["b"].lost == 0
+
+
+def test_malformed_hello_is_rejected(tmp_path, capsys):
+    async def main():
+        central = Central()
+        gateway = Gateway(central.publish)
+        server = await asyncio.start_server(gateway.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        for payload in (b"[]", b"1", b'{"node": 5, "acked": 0}', b"{"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            write_message(writer, HELLO, 0, payload)
+            # The gateway hangs up without acknowledging anything
+            assert await reader.read() == b""
+            writer.close()
+        server.close()
+        await server.wait_closed()
+        assert not gateway.nodes and not gateway.connections
+
+    asyncio.run(main())
+    assert capsys.readouterr().out.count("Gateway connection from unknown node") == 4
@@ -0,0 +1,54 @@
+from state import GPIOMonitor
+
+
+class FakePin:
+    def __init__(self, function: str = "input", state: int = 0) -> None:
+        self._function = function
+        self._state = state
+        self.reads = 0
+        self.edges = "none"
+        self.when_changed = None
+
+    @property
+    def function(self) -> str:
+        self.reads += 1
+        return self._function
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    def set(self, state: int) -> None:
+        self._state = state
+        if self.when_changed is not None:
+            self.when_changed(0, state)
+
+
+class FakeFactory:
+    def __init__(self, pins: dict[int, FakePin]) -> None:
+        self.pins = pins
+
+    def pin(self, bcm: int) -> FakePin:
+        return self.pins[bcm]
+
+
+def test_poll_skips_pins_with_an_edge_watch():
+    pins = {17: FakePin("input"), 27: FakePin("output")}
+    monitor = GPIOMonitor(factory=FakeFactory(pins), pins=list(pins))
+    diffs = []
+    monitor.start(diffs.append)
+    assert pins[17].edges == "both" and pins[27].when_changed is None
+
+    reads = pins[17].reads
+    for _ in range(3):
+        assert monitor.poll() is None
+    assert pins[17].reads == reads  # the input is never polled
+
+    # Inputs arrive through their edge callback, outputs through poll()
+    pins[17].set(1)
+    assert diffs[-1]["pins"] == [[11, 1, "INPUT"]]
+    pins[27]._state = 1
+    assert monitor.poll()["pins"] == [[13, 1, "OUTPUT"]]
+    assert monitor.state(17) == (1, "INPUT")
+    monitor.close()
+    assert pins[17].when_changed is None
@@ -0,0 +1,52 @@
+import pytest
+
+from sensors.fake import FakeSMBus, RegisterFile, SimulatedBMP280
+from sensors.i2c import I2CBus
+
+
+def test_stats_per_device():
+    bus = I2CBus(FakeSMBus({0x76: SimulatedBMP280()}))
+    bus.read_i2c_block_data(0x76, 0x88, 24)
+    bus.write_byte_data(0x76, 0xF4, 0x27)
+    stats = bus.stats()[0x76]
+    assert (stats["reads"], stats["writes"], stats["errors"]) == (1, 1, 0)
+    assert (stats["bytes_read"], stats["bytes_written"]) == (24, 1)
+    assert sum(stats["histogram"].values()) == 2
+
+
+def test_scan_keeps_no_stats_for_empty_addresses():
+    bus = I2CBus(FakeSMBus({0x50: RegisterFile(), 0x76: SimulatedBMP280()}))
+    assert bus.scan() == [0x50, 0x76]
+    assert sorted(bus.devices) == [0x50, 0x76]
+
+
+def test_failing_device_keeps_its_history_through_a_scan():
+    handle = FakeSMBus({0x76: SimulatedBMP280()})
+    bus = I2CBus(handle)
+    bus.read_byte_data(0x76, 0xD0)
+    del handle.devices[0x76]  # the sensor drops off the bus
+    for _ in range(3):
+        with pytest.raises(OSError):
+            bus.read_byte_data(0x76, 0xD0)
+
+    assert bus.scan([0x76, 0x77]) == []
+    stats = bus.stats()[0x76]
+    assert (stats["transactions"], stats["errors"]) == (5, 4)
+    assert stats["present"] is False
+    assert 0x77 not in bus.devices
+
+    handle.devices[0x76] = RegisterFile()
+    assert bus.scan((addr for addr in [0x76])) == [0x76]
+    assert bus.stats()[0x76]["present"] is True
+
+
+def test_consistently_failing_device_is_not_forgotten():
+    handle = FakeSMBus({})
+    bus = I2CBus(handle)
+    for _ in range(3):
+        with pytest.raises(OSError):
+            bus.read_byte_data(0x76, 0xD0)
+    bus.scan([0x76])
+    stats = bus.stats()[0x76]
+    assert stats["errors"] == stats["transactions"] == 4
+    assert stats["present"] is False
@@ -0,0 +1,40 @@
+import math
+
+from backend import metrics
+
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    reads = metrics.Counter(
+        "sensor_reads", "Reads per sensor", ("sensor",), registry=registry
+    )
+    reads.labels(sensor='bmp"280').inc(3)
+    metrics.Gauge("temperature", "Air", registry=registry).set(math.nan)
+    latency = metrics.Histogram(
+        "latency_seconds", "Read latency", buckets=(0.1, 1.0), registry=registry
+    )
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    assert registry.render() == (
+        "# HELP sensor_reads_total Reads per sensor\n"
+        "# TYPE sensor_reads_total counter\n"
+        'sensor_reads_total{sensor="bmp\\"280"} 3\n'
+        "# HELP temperature Air\n"
+        "# TYPE temperature gauge\n"
+        "temperature NaN\n"
+        "# HELP latency_seconds Read latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+def test_special_values():
+    assert metrics._format_value(math.nan) == "NaN"
+    assert metrics._format_value(math.inf) == "+Inf"
+    assert metrics._format_value(-math.inf) == "-Inf"
+    assert metrics._format_value(0.25) == "0.25"
+    assert metrics._format_value(True) == "1"
@@ -0,0 +1,109 @@
+import pytest
+
+from backend.rules import Extreme, Rule, RuleEngine
+
+
+def states(events) -> list[tuple[str, str]]:
+    return [(event.rule.name, event.state) for event in events]
+
+
+@pytest.mark.parametrize(
+    "op, fires_at",
+    [(">", [31.0]), (">=", [30.0, 31.0]), ("<", [29.0]), ("<=", [29.0, 30.0])],
+)
+def test_operators_at_the_threshold(op, fires_at):
+    holding = []
+    for t, value in enumerate([29.0, 30.0, 31.0]):
+        engine = RuleEngine([Rule("bmp280", "temperature", op, 30)])
+        engine.update("bmp280", t, {"temperature": value})
+        if engine.rules[0].active:
+            holding.append(value)
+    assert holding == fires_at
+
+
+def test_only_rules_between_old_and_new_boundary_change():
+    rules = [Rule("bmp280", "temperature", ">", limit) for limit in (10, 20, 30)]
+    engine = RuleEngine(rules)
+    assert states(engine.update("bmp280", 0, {"temperature": 25})) == [
+        ("bmp280.temperature > 10", "firing"),
+        ("bmp280.temperature > 20", "firing"),
+    ]
+    assert states(engine.update("bmp280", 1, {"temperature": 35})) == [
+        ("bmp280.temperature > 30", "firing")
+    ]
+    changes = engine.changes
+    engine.update("bmp280", 2, {"temperature": 36})
+    assert engine.changes == changes  # nothing crossed, nothing touched
+    assert states(engine.update("bmp280", 3, {"temperature": 15})) == [
+        ("bmp280.temperature > 20", "cleared"),
+        ("bmp280.temperature > 30", "cleared"),
+    ]
+
+
+def test_for_duration_ignores_a_brief_crossing():
+    rule = Rule("hcsr04", "distance", "<", 20, duration=5)
+    engine = RuleEngine([rule])
+    # Dips below for 2 s only: the armed timer goes stale
+    assert engine.update("hcsr04", 0, {"distance": 15}) == []
+    assert engine.update("hcsr04", 2, {"distance": 25}) == []
+    assert engine.tick(10) == []
+    # Holds for the full 5 s: fires at the due time, clears on the way back
+    engine.update("hcsr04", 20, {"distance": 10})
+    assert engine.update("hcsr04", 24, {"distance": 12}) == []
+    events = engine.tick(25)
+    assert states(events) == [(rule.name, "firing")] and events[0].t == 25
+    assert engine.active == [rule]
+    assert states(engine.update("hcsr04", 26, {"distance": 30})) == [
+        (rule.name, "cleared")
+    ]
+
+
+def test_missing_values_leave_rules_alone():
+    engine = RuleEngine([Rule("hcsr04", "distance", "<", 20)])
+    engine.update("hcsr04", 0, {"distance": 10})
+    assert engine.update("hcsr04", 1, {"distance": None}) == []
+    assert engine.rules[0].active
+
+
+def test_drop_rule_compares_with_the_window_maximum():
+    rule = Rule("bmp280", "pressure", ">", 2, kind="drop", within=10)
+    engine = RuleEngine([rule])
+    for t, pressure in enumerate([1000, 1003, 1002, 1001.5]):
+        assert engine.update("bmp280", t, {"pressure": pressure}) == []
+    events = engine.update("bmp280", 4, {"pressure": 1000.5})
+    assert states(events) == [(rule.name, "firing")]
+    assert events[0].value == pytest.approx(2.5)
+    # Once 1003 is out of the window the drop is measured from 1002
+    assert states(engine.update("bmp280", 12, {"pressure": 1000.5})) == [
+        (rule.name, "cleared")
+    ]
+
+
+def test_extreme_evicts_by_age():
+    highest, lowest = Extreme(3.0), Extreme(3.0, largest=False)
+    series = [5.0, 1.0, 4.0, 2.0, 3.0, 0.0]
+    assert [highest.update(t, v) for t, v in enumerate(series)] == [
+        5.0,
+        5.0,
+        5.0,
+        5.0,
+        4.0,
+        4.0,
+    ]
+    assert [lowest.update(t, v) for t, v in enumerate(series)] == [
+        5.0,
+        1.0,
+        1.0,
+        1.0,
+        1.0,
+        0.0,
+    ]
+    # Only candidates that can still be the maximum are kept
+    assert len(highest.window) <= 3
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        Rule("bmp280", "temperature", "!=", 1)
+    with pytest.raises(ValueError):
+        Rule("bmp280", "pressure", ">", 1, kind="drop")
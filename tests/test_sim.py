@@ -0,0 +1,65 @@
+import pytest
+
+from sensors import backend
+from sensors.registry import create
+from sensors.sim import Target, Weather
+
+START = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self, t: float) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture(autouse=True)
+def restore_backend(monkeypatch):
+    monkeypatch.setattr(backend, "_current", None)
+    yield
+    if backend._current is not None:
+        backend._current.close()
+
+
+def readings(seed: int) -> list[dict]:
+    clock = Clock(START)
+    backend.select("sim", seed=seed, speedup=100.0, start=START, clock=clock)
+    drivers = [create("bmp280"), create("hcsr04")]
+    for driver in drivers:
+        driver.speed_up(100.0)
+    result = []
+    for i in range(20):
+        clock.t = START + i * 30.0
+        result.append({driver.name: driver.read() for driver in drivers})
+    for driver in drivers:
+        driver.close()
+    return result
+
+
+def test_same_seed_and_start_give_the_same_readings():
+    first = readings(seed=4)
+    assert readings(seed=4) == first
+    assert readings(seed=5) != first
+    assert len({reading["bmp280"]["temperature"] for reading in first}) > 1
+
+
+def test_signals_do_not_depend_on_how_often_they_are_read():
+    def sample(step: float) -> dict[float, tuple]:
+        clock = Clock(START)
+        weather = Weather(7, clock=clock)
+        target = Target(weather, seed=7)
+        values = {}
+        for i in range(int(600 / step)):
+            t = clock.t = START + i * step
+            values[t] = (weather.at(t), target.true_distance(t))
+        return values
+
+    sparse, dense = sample(10.0), sample(0.5)
+    assert sparse.items() <= dense.items()
+
+
+def test_weather_starts_at_the_clock_start():
+    sim = backend.select("sim", seed=1, start=START)
+    assert sim.weather.origin == START
@@ -0,0 +1,117 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from backend import storage
+from backend.storage import SampleLog, replay
+
+FIELDS = ["temperature", "pressure"]
+
+
+def write(directory, count: int, **options) -> SampleLog:
+    log = SampleLog(str(directory), FIELDS, **options)
+    for i in range(count):
+        log.append(1000.0 + i, {"temperature": 20.0 + i, "pressure": None})
+    return log
+
+
+def replayed(log: SampleLog) -> list[dict]:
+    published = []
+    asyncio.run(replay(log, "bmp280", lambda c, t, v: published.append(v), speed=1e9))
+    return published
+
+
+def test_segments_rotate_and_read_back_in_order(tmp_path):
+    log = write(tmp_path, 10, segment_records=4, flush_records=2, fsync=False)
+    log.close()
+    names = sorted(name for name in os.listdir(tmp_path) if name.endswith(".seg"))
+    assert len(names) == 3
+    assert [segment.size for segment in log.segments] == [4, 4, 2]
+    assert names[1] == f"{int(1004.0 * 1e9):020d}.seg"
+
+    log = SampleLog(str(tmp_path))
+    records = log.range(1000.0, 1010.0)
+    assert list(records["temperature"]) == [20.0 + i for i in range(10)]
+    assert np.isnan(records["pressure"]).all()
+    # A range inside one segment is a view of its mapping
+    assert log.range(1004.0, 1006.0).base is not None
+    log.close()
+
+
+def test_max_segments_drops_the_oldest(tmp_path):
+    log = write(tmp_path, 10, segment_records=2, max_segments=2, fsync=False)
+    log.close()
+    assert len(log.segments) == 2
+    assert list(SampleLog(str(tmp_path)).range(0, 2000)["temperature"]) == [
+        26.0,
+        27.0,
+        28.0,
+        29.0,
+    ]
+
+
+def test_fsync_once_per_batch(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(storage.os, "fsync", synced.append)
+    log = write(tmp_path, 10, flush_records=4, flush_interval=3600)
+    assert len(synced) == 2  # after samples 4 and 8
+    assert log.segments[-1].size == 8
+    log.close()
+    assert len(synced) == 3
+    assert log.segments[-1].size == 10
+
+
+@pytest.mark.parametrize("torn", [1, 8, 23])
+def test_torn_tail_record_is_trimmed_on_open(tmp_path, torn):
+    write(tmp_path, 7, segment_records=4, fsync=False).close()
+    last = SampleLog(str(tmp_path)).segments[-1].path
+    itemsize = storage.record_dtype(FIELDS).itemsize
+    with open(last, "r+b") as f:
+        f.truncate(os.path.getsize(last) - itemsize + torn)
+
+    log = SampleLog(str(tmp_path), fsync=False)
+    assert os.path.getsize(last) % itemsize == 0
+    values = replayed(log)
+    assert [v["temperature"] for v in values] == [20.0 + i for i in range(6)]
+    assert all(v["pressure"] is None for v in values)
+
+    # Appending carries on after the last complete record
+    log.append(2000.0, {"temperature": 99.0, "pressure": 1000.0})
+    log.close()
+    values = replayed(SampleLog(str(tmp_path)))
+    assert len(values) == 7
+    assert values[-1] == {"temperature": 99.0, "pressure": 1000.0}
+
+
+def test_readonly_log_follows_a_writer(tmp_path):
+    writer = write(tmp_path, 3, segment_records=2, flush_records=1, fsync=False)
+    reader = SampleLog(str(tmp_path), readonly=True)
+    assert len(reader.range(0, 2000)) == 3
+    writer.append(1003.0, {"temperature": 23.0})
+    writer.append(1004.0, {"temperature": 24.0})
+    reader.refresh()
+    assert len(reader.range(0, 2000)) == 5
+    with pytest.raises(OSError):
+        reader.append(1005.0, {})
+    writer.close()
+    reader.close()
+
+
+def test_flush_if_due_writes_out_a_slow_channel(tmp_path, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(storage.time, "monotonic", lambda: clock[0])
+    log = write(tmp_path, 1, flush_records=256, flush_interval=1.0, fsync=False)
+    follower = SampleLog(str(tmp_path), readonly=True)
+    assert len(follower.range(0.0, 2000.0)) == 0
+
+    # No further sample arrives; only the timer can flush it
+    clock[0] = 0.5
+    log.flush_if_due()
+    assert len(follower.range(0.0, 2000.0)) == 0
+    clock[0] = 1.0
+    log.flush_if_due()
+    assert list(follower.range(0.0, 2000.0)["temperature"]) == [20.0]
+    follower.close()
+    log.close()
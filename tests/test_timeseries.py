@@ -0,0 +1,54 @@
+import json
+
+from backend.timeseries import TimeSeriesStore
+
+
+def test_raw_query_reports_gaps_as_none():
+    store = TimeSeriesStore(raw_capacity=8)
+    store.append("hcsr04", 0.0, {"distance": 10.0})
+    store.append("hcsr04", 1.0, {"distance": None})
+    store.append("hcsr04", 2.0, {"distance": 12.5})
+    result = store.query("hcsr04", 0.0, 3.0)
+    assert result["t"] == [0.0, 1.0, 2.0]
+    assert result["distance"] == [10.0, None, 12.5]
+    # Must survive the strict encoder the web framework uses
+    assert json.loads(json.dumps(result, allow_nan=False)) == result
+
+
+def test_aggregate_query_over_a_gap_is_json():
+    store = TimeSeriesStore(raw_capacity=8)
+    for t in range(5):
+        store.append("ds18b20", float(t), {"temperature": None})
+    store.append("ds18b20", 5.0, {"temperature": 21.0})
+    result = store.query("ds18b20", 0.0, 6.0, resolution=1.0)
+    assert result["temperature"]["mean"] == [None] * 5 + [21.0]
+    json.dumps(result, allow_nan=False)
+
+
+def test_raw_ring_wraps_oldest_first():
+    store = TimeSeriesStore(raw_capacity=3)
+    for t in range(5):
+        store.append("bmp280", float(t), {"temperature": t * 2.0})
+    result = store.query("bmp280", 0.0, 10.0)
+    assert result["t"] == [2.0, 3.0, 4.0]
+    assert result["temperature"] == [4.0, 6.0, 8.0]
+
+
+def test_coarse_query_includes_the_open_buckets():
+    store = TimeSeriesStore(raw_capacity=8)
+    # Two samples a second for just over two minutes; value == t
+    for n in range(261):
+        store.append("bmp280", n / 2, {"pressure": n / 2})
+
+    minutes = store.query("bmp280", 0.0, 3600.0, resolution=60.0)
+    assert minutes["t"] == [0.0, 60.0, 120.0]
+    # The last minute is partial and ends at the newest sample, which is
+    # still in the open 1 s bucket
+    assert minutes["pressure"]["min"][-1] == 120.0
+    assert minutes["pressure"]["max"][-1] == 130.0
+    assert minutes["pressure"]["mean"][-1] == 125.0
+
+    hours = store.query("bmp280", 0.0, 7200.0, resolution=3600.0)
+    assert hours["t"] == [0.0]
+    assert hours["pressure"]["max"] == [130.0]
+    assert hours["pressure"]["mean"] == [65.0]
@@ -0,0 +1,63 @@
+import pytest
+
+from sensors.fake import FakeGPIO
+from sensors.ultrasonic import SPEED_OF_SOUND, HCSR04
+
+
+class LateCallbackGPIO(FakeGPIO):
+    """Edge callbacks that run only after the echo has already ended, so
+    reading the pin from them always finds it low."""
+
+    def input(self, pin: int) -> int:
+        return 0
+
+
+class LevelGPIO(FakeGPIO):
+    """A GPIO layer whose edge callbacks are handed the new level."""
+
+    def set_input(self, pin: int, value: int) -> None:
+        self.levels[pin] = value
+        if pin in self.callbacks:
+            self.callbacks[pin][1](pin, value)
+
+
+def ranger(gpio: FakeGPIO, distance: float | None) -> HCSR04:
+    sensor = HCSR04(trigger_pin=23, echo_pin=24, gpio=gpio)
+    gpio.attach_hcsr04(23, 24, distance)
+    return sensor
+
+
+@pytest.mark.parametrize("gpio_cls", [FakeGPIO, LateCallbackGPIO, LevelGPIO])
+def test_measure(gpio_cls):
+    sensor = ranger(gpio_cls(realtime=False), 100.0)
+    assert sensor.measure(SPEED_OF_SOUND) == pytest.approx(100.0, abs=1e-3)
+    assert sensor.measure(SPEED_OF_SOUND) == pytest.approx(100.0, abs=1e-3)
+    sensor.close()
+
+
+def test_short_echo_is_not_missed():
+    # 2 cm: an echo about 117 µs wide, over before a callback thread could
+    # read the pin
+    sensor = ranger(LateCallbackGPIO(realtime=False), 2.0)
+    assert sensor.measure(SPEED_OF_SOUND) == pytest.approx(2.0, abs=1e-3)
+
+
+def test_level_pairs_edges_past_a_stray_fall():
+    gpio = LevelGPIO(realtime=False)
+    sensor = ranger(gpio, None)
+    sensor._rise = sensor._fall = None
+    sensor._done.clear()
+    gpio.now_ns = 1_000
+    sensor._edge(24, 0)  # a late fall from an earlier echo
+    assert sensor._rise is None and not sensor._done.is_set()
+    gpio.now_ns = 2_000
+    sensor._edge(24, 1)
+    gpio.now_ns = 5_000
+    sensor._edge(24, 0)
+    assert sensor._done.is_set()
+    assert (sensor._rise, sensor._fall) == (2_000, 5_000)
+
+
+def test_missing_echo_times_out():
+    sensor = ranger(FakeGPIO(realtime=False), None)
+    assert sensor.measure() is None